@@ -0,0 +1,182 @@
+"""
+Admission Control
+Per-endpoint concurrency limits and load shedding for expensive endpoints
+
+Expensive endpoints get a small number of concurrent slots and a bounded wait
+queue. When the queue is full the request is rejected at once with 429; when it
+waits longer than the queue timeout it is rejected with 503. Both carry a
+Retry-After header.
+
+Sync handlers of every endpoint run in one threadpool. All non-interactive
+requests additionally share a budget of ADMISSION_THREADPOOL_SIZE minus
+ADMISSION_INTERACTIVE_RESERVED slots, so however much batch and list traffic
+arrives, the reserved threads stay free for the interactive paths (/predict/,
+/students/{id}), which are never queued. Event streams and health probes are
+long-lived or trivial and are not counted.
+"""
+import asyncio
+import json
+import re
+from typing import Dict, Any, Optional, Tuple
+from app.config import (
+    ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER,
+    ADMISSION_THREADPOOL_SIZE, ADMISSION_INTERACTIVE_RESERVED, ADMISSION_SHARED_QUEUE_DEPTH
+)
+
+# (method, path) -> max concurrent requests
+ENDPOINT_LIMITS = {
+    ("POST", "/risk/analyze-all"): 1,
+    ("GET", "/risk/visualize/tree"): 2,
+    ("POST", "/upload"): 2,
+    ("POST", "/alerts/send"): 1,
+    ("GET", "/students/export"): 2,
+    ("POST", "/archive/run"): 1,
+}
+
+# Single-student paths: never queued, and they alone may use the reserved threads
+INTERACTIVE_PATHS = re.compile(r"^/(predict|students/[^/]+)$")
+
+# Paths outside the shared budget
+UNMETERED_PREFIXES = ("/events", "/health", "/admission", "/docs", "/openapi.json", "/profiling")
+
+class EndpointLimiter:
+    """Concurrency slots plus a bounded wait queue for one endpoint"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self) -> Optional[int]:
+        """Take a slot; returns None when admitted, or the HTTP status to reject with"""
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                return 429
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                return 503
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.active += 1
+        self.admitted += 1
+        return None
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying EndpointLimiter to the expensive endpoints"""
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], int] = None):
+        self.app = app
+        self.limiters = {
+            key: EndpointLimiter(max_concurrent, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT)
+            for key, max_concurrent in (limits or ENDPOINT_LIMITS).items()
+        }
+        self.shared = EndpointLimiter(
+            max(1, ADMISSION_THREADPOOL_SIZE - ADMISSION_INTERACTIVE_RESERVED),
+            ADMISSION_SHARED_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT
+        )
+        self.interactive_requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"].rstrip("/") or "/"
+        limiter = self.limiters.get((scope["method"], path))
+        if limiter is None:
+            if INTERACTIVE_PATHS.match(path):
+                self.interactive_requests += 1
+                await self.app(scope, receive, send)
+                return
+            if path == "/" or path.startswith(UNMETERED_PREFIXES):
+                await self.app(scope, receive, send)
+                return
+
+        # Endpoint slot first, so requests queued for a busy endpoint do not hold shared slots
+        acquired = []
+        for slots in (limiter, self.shared):
+            if slots is None:
+                continue
+            rejection = await slots.acquire()
+            if rejection is not None:
+                for held in acquired:
+                    held.release()
+                await _reject(send, rejection)
+                return
+            acquired.append(slots)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for held in acquired:
+                held.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "interactive_requests": self.interactive_requests,
+            "interactive_reserved": ADMISSION_INTERACTIVE_RESERVED,
+            "shared": self.shared.stats(),
+            "endpoints": {
+                f"{method} {path}": limiter.stats()
+                for (method, path), limiter in self.limiters.items()
+            },
+        }
+
+async def _reject(send, status: int):
+    """Send a fast rejection with a Retry-After hint"""
+    detail = "Too many queued requests" if status == 429 else "Server busy, queue wait timed out"
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def admission_stats() -> Dict[str, Any]:
+    """Queue and reject counters of the running middleware"""
+    if admission_middleware is None:
+        return {"enabled": False}
+    return admission_middleware.stats()
+
+# Set when the middleware is built by Starlette
+admission_middleware = None
+
+def build_admission_middleware(app):
+    """Middleware factory that keeps a handle on the instance for the stats endpoint"""
+    global admission_middleware
+    admission_middleware = AdmissionControlMiddleware(app)
+    return admission_middleware
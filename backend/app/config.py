@@ -3,6 +3,158 @@ import os
 
 load_dotenv()
 
+# Numeric settings that could not be parsed; reported by validate_mongo_settings at startup
+SETTING_ERRORS = []
+
+def _number_env(name, default, parse, kind):
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return parse(value.strip())
+    except ValueError:
+        SETTING_ERRORS.append(f"{name} must be {kind}, got '{value}'")
+        return default
+
+def _int_env(name, default):
+    return _number_env(name, default, int, "an integer")
+
+def _float_env(name, default):
+    return _number_env(name, float(default), float, "a number")
+
 MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("DB_NAME")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 FROM_EMAIL = os.getenv("FROM_EMAIL")
+# Recipient of digests for students without a counsellor (or counsellors without an email)
+DEFAULT_ALERT_EMAIL = os.getenv("DEFAULT_ALERT_EMAIL", "mentor@example.com")
+
+# MongoDB client tuning (validated by validate_mongo_settings at startup)
+MONGO_MAX_POOL_SIZE = _int_env("MONGO_MAX_POOL_SIZE", 100)
+MONGO_MIN_POOL_SIZE = _int_env("MONGO_MIN_POOL_SIZE", 0)
+MONGO_MAX_IDLE_TIME_MS = _int_env("MONGO_MAX_IDLE_TIME_MS", 300000)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)
+MONGO_CONNECT_TIMEOUT_MS = _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000)
+# Comma-separated wire compressors in order of preference, e.g. "zstd,snappy,zlib" (empty = off)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Read preference for dashboard, list and export reads (writes and lookups always use the primary)
+MONGO_ANALYTICS_READ_PREFERENCE = os.getenv("MONGO_ANALYTICS_READ_PREFERENCE", "primary")
+# Write concern for bulk upload/analyze/attendance writes: w is a number, "majority" or
+# empty for the server default; set e.g. MONGO_BULK_WRITE_W=1 MONGO_BULK_WRITE_JOURNAL=false for nightly loads
+MONGO_BULK_WRITE_W = os.getenv("MONGO_BULK_WRITE_W", "")
+MONGO_BULK_WRITE_JOURNAL = os.getenv("MONGO_BULK_WRITE_JOURNAL", "")
+
+READ_PREFERENCES = ("primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest")
+COMPRESSORS = ("snappy", "zlib", "zstd")
+
+def _bulk_write_w():
+    if MONGO_BULK_WRITE_W.isdigit():
+        return int(MONGO_BULK_WRITE_W)
+    return MONGO_BULK_WRITE_W or None
+
+def _bulk_write_journal():
+    if not MONGO_BULK_WRITE_JOURNAL:
+        return None
+    return MONGO_BULK_WRITE_JOURNAL.lower() == "true"
+
+MONGO_BULK_WRITE_CONCERN = {
+    key: value for key, value in {"w": _bulk_write_w(), "j": _bulk_write_journal()}.items()
+    if value is not None
+}
+
+def validate_mongo_settings():
+    """
+    Check the settings before the Mongo client is created; raises RuntimeError listing
+    every problem (including any numeric setting that could not be parsed)
+    """
+    errors = list(SETTING_ERRORS)
+    if not MONGO_URI:
+        errors.append("MONGO_URI not found in environment variables")
+    if not DB_NAME:
+        errors.append("DB_NAME not found in environment variables")
+    if MONGO_MAX_POOL_SIZE < 1:
+        errors.append("MONGO_MAX_POOL_SIZE must be at least 1")
+    if not 0 <= MONGO_MIN_POOL_SIZE <= MONGO_MAX_POOL_SIZE:
+        errors.append("MONGO_MIN_POOL_SIZE must be between 0 and MONGO_MAX_POOL_SIZE")
+    for name, value in (("MONGO_MAX_IDLE_TIME_MS", MONGO_MAX_IDLE_TIME_MS),
+                        ("MONGO_SERVER_SELECTION_TIMEOUT_MS", MONGO_SERVER_SELECTION_TIMEOUT_MS),
+                        ("MONGO_CONNECT_TIMEOUT_MS", MONGO_CONNECT_TIMEOUT_MS)):
+        if value <= 0:
+            errors.append(f"{name} must be positive")
+    for compressor in mongo_compressors():
+        if compressor not in COMPRESSORS:
+            errors.append(f"MONGO_COMPRESSORS: unknown compressor '{compressor}' (use {', '.join(COMPRESSORS)})")
+    if MONGO_ANALYTICS_READ_PREFERENCE not in READ_PREFERENCES:
+        errors.append(f"MONGO_ANALYTICS_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}")
+    w = MONGO_BULK_WRITE_CONCERN.get("w")
+    if isinstance(w, str) and w != "majority":
+        errors.append("MONGO_BULK_WRITE_W must be a number, 'majority' or empty")
+    if MONGO_BULK_WRITE_JOURNAL and MONGO_BULK_WRITE_JOURNAL.lower() not in ("true", "false"):
+        errors.append("MONGO_BULK_WRITE_JOURNAL must be true, false or empty")
+    if w == 0 and MONGO_BULK_WRITE_CONCERN.get("j"):
+        errors.append("MONGO_BULK_WRITE_W=0 cannot be combined with MONGO_BULK_WRITE_JOURNAL=true")
+    if errors:
+        raise RuntimeError("Invalid settings:\n  " + "\n  ".join(errors))
+
+def mongo_compressors():
+    return [c.strip() for c in MONGO_COMPRESSORS.split(",") if c.strip()]
+
+# Attendance ingestion
+ATTENDANCE_FLUSH_SIZE = _int_env("ATTENDANCE_FLUSH_SIZE", 50000)
+ATTENDANCE_PRIOR_SESSIONS = _int_env("ATTENDANCE_PRIOR_SESSIONS", 40)
+
+# Admission control for expensive endpoints
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_QUEUE_DEPTH = _int_env("ADMISSION_QUEUE_DEPTH", 4)
+ADMISSION_QUEUE_TIMEOUT = _float_env("ADMISSION_QUEUE_TIMEOUT", 10)
+ADMISSION_RETRY_AFTER = _int_env("ADMISSION_RETRY_AFTER", 30)
+# Worker threads serving sync handlers (AnyIO's default limiter) and how many of
+# them non-interactive requests may never take
+ADMISSION_THREADPOOL_SIZE = _int_env("ADMISSION_THREADPOOL_SIZE", 40)
+ADMISSION_INTERACTIVE_RESERVED = _int_env("ADMISSION_INTERACTIVE_RESERVED", 8)
+ADMISSION_SHARED_QUEUE_DEPTH = _int_env("ADMISSION_SHARED_QUEUE_DEPTH", 64)
+
+# Background health probing
+HEALTH_PROBE_INTERVAL = _float_env("HEALTH_PROBE_INTERVAL", 10)
+# Readiness fails when the last successful probe is older than this many seconds
+HEALTH_STALE_AFTER = _float_env("HEALTH_STALE_AFTER", 30)
+
+# Student search index
+SEARCH_REFRESH_INTERVAL = _float_env("SEARCH_REFRESH_INTERVAL", 60)
+# Students written since the last rebuild that are searched from a side list; beyond this a rebuild is triggered
+SEARCH_OVERLAY_LIMIT = _int_env("SEARCH_OVERLAY_LIMIT", 5000)
+
+# Per-request profiling (nothing is installed unless enabled)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Requests sending this value in the X-Profile-Token header are profiled (empty = header trigger off);
+# the same header is required to read saved profiles (without a token they cannot be read over HTTP)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_RATE = _float_env("PROFILING_SAMPLE_RATE", 0)
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_MAX_PROFILES = _int_env("PROFILING_MAX_PROFILES", 200)
+
+# Archive tier for past cohorts
+ARCHIVE_BATCH_SIZE = _int_env("ARCHIVE_BATCH_SIZE", 1000)
+
+# Server-Sent Events push of dashboard stats and job progress
+# Writes trigger a stats recomputation at most this often (seconds)
+EVENTS_STATS_MIN_INTERVAL = _float_env("EVENTS_STATS_MIN_INTERVAL", 1)
+# Stats are also recomputed this often while anyone is subscribed (picks up other workers' writes)
+EVENTS_STATS_INTERVAL = _float_env("EVENTS_STATS_INTERVAL", 30)
+EVENTS_HEARTBEAT_INTERVAL = _float_env("EVENTS_HEARTBEAT_INTERVAL", 15)
+# Events buffered per subscriber; a slow client loses the oldest ones
+EVENTS_QUEUE_SIZE = _int_env("EVENTS_QUEUE_SIZE", 100)
+
+# Alert feed: an unreleased seq reservation older than this (seconds) no longer holds the feed back
+ALERT_FEED_PENDING_TIMEOUT = _float_env("ALERT_FEED_PENDING_TIMEOUT", 60)
+
+# Shadow model scored next to the primary model, off the request path
+# File in app/ml/models (e.g. risk_model.pkl); empty = no shadow scoring
+SHADOW_MODEL = os.getenv("SHADOW_MODEL", "")
+# Comma-separated input features of the shadow model; empty = inferred from the artifact
+SHADOW_MODEL_FEATURES = os.getenv("SHADOW_MODEL_FEATURES", "")
+# Batches waiting for the shadow executor; further batches are dropped, never waited on
+SHADOW_MAX_PENDING = _int_env("SHADOW_MAX_PENDING", 8)
+SHADOW_STORE_OUTPUTS = os.getenv("SHADOW_STORE_OUTPUTS", "true").lower() == "true"
+# Stored shadow outputs expire after this many days
+SHADOW_RETENTION_DAYS = _int_env("SHADOW_RETENTION_DAYS", 30)
@@ -1,43 +1,94 @@
-import os
-from dotenv import load_dotenv
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-
-load_dotenv()
+from pymongo import MongoClient, ReadPreference, WriteConcern
+from pymongo.errors import OperationFailure
+from app.config import (
+    MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_ANALYTICS_READ_PREFERENCE,
+    MONGO_BULK_WRITE_CONCERN, SHADOW_RETENTION_DAYS, validate_mongo_settings, mongo_compressors
+)
 
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME")
+# Fail fast on bad settings, before anything tries to use the database
+validate_mongo_settings()
 
-if not MONGO_URI:
-    raise RuntimeError("MONGO_URI not found in environment variables")
+READ_PREFERENCE_MODES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
 
-if not DB_NAME:
-    raise RuntimeError("DB_NAME not found in environment variables")
+client_options = {
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+    "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+}
+if mongo_compressors():
+    client_options["compressors"] = ",".join(mongo_compressors())
 
-# Create client with timeout settings
-client = MongoClient(
-    MONGO_URI,
-    serverSelectionTimeoutMS=5000,  # 5 second timeout
-    connectTimeoutMS=5000
-)
+# MongoClient connects in the background, so importing this module never blocks
+# on the network; app/health.py probes it.
+client = MongoClient(MONGO_URI, **client_options)
 db = client[DB_NAME]
 
 students_collection = db["students"]
 alerts_collection = db["alerts"]
+counsellors_collection = db["counsellors"]
+# Named sequences ({_id: name, value: last issued, pending: open reservations}), e.g. alert feed ids
+counters_collection = db["counters"]
+# Shadow model outputs next to the primary's, for offline comparison (app/ml/registry.py)
+shadow_scores_collection = db["shadow_scores"]
+# Past cohorts moved out of the active tier by app/services/archive.py
+students_archive_collection = db["students_archive"]
+
+# Dashboard, list and export reads, which tolerate slightly stale data
+students_read_collection = students_collection.with_options(
+    read_preference=READ_PREFERENCE_MODES[MONGO_ANALYTICS_READ_PREFERENCE]
+)
+
+# Bulk upload/analyze/attendance writes, with a tunable write concern
+students_bulk_collection = students_collection.with_options(
+    write_concern=WriteConcern(**MONGO_BULK_WRITE_CONCERN)
+)
 
-# Try to connect but don't fail on startup
-try:
-    client.admin.command('ping')
-    print("✅ MongoDB connected successfully")
-    print(f"   Database: {DB_NAME}")
+def ensure_unique_student_id():
+    """
+    One active document per student_id. An older non-unique index is replaced; if
+    the collection already holds duplicates, a plain index is kept and a warning
+    printed until they are cleaned up.
+    """
+    existing = students_collection.index_information().get("student_id_1")
+    if existing and existing.get("unique"):
+        return
+    if existing:
+        students_collection.drop_index("student_id_1")
     try:
-        collections = db.list_collection_names()
-        print(f"   Collections: {collections}")
-    except:
-        print("   Collections: Unable to list")
-except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-    print("⚠️  Warning: MongoDB is not connected")
-    print("   The server will start but database operations will fail")
-    print("   Please ensure MongoDB is running or check your connection string")
-except Exception as e:
-    print(f"⚠️  Database connection warning: {str(e)}")
+        students_collection.create_index("student_id", unique=True)
+    except OperationFailure as e:
+        print(f"⚠️  students.student_id is not unique yet, keeping a plain index: {str(e).splitlines()[0][:200]}")
+        students_collection.create_index("student_id")
+
+def ensure_indexes():
+    """Create the indexes the API relies on (no-op if they already exist)"""
+    ensure_unique_student_id()
+    # Riskiest students first, overall and per scope (student_id breaks ties for keyset paging);
+    # the counsellor index also serves caseloads
+    students_collection.create_index([("dropout_probability", -1), ("student_id", 1)])
+    students_collection.create_index([("department", 1), ("dropout_probability", -1), ("student_id", 1)])
+    students_collection.create_index([("semester", 1), ("dropout_probability", -1), ("student_id", 1)])
+    students_collection.create_index([("department", 1), ("semester", 1), ("dropout_probability", -1), ("student_id", 1)])
+    students_collection.create_index([("counsellor_id", 1), ("dropout_probability", -1), ("student_id", 1)])
+    students_collection.create_index([("counsellor_id", 1), ("risk_level", 1)])
+    # Latest write (search index change check) and the archive inactivity rule
+    students_collection.create_index("updated_at")
+    counsellors_collection.create_index("counsellor_id", unique=True)
+    students_archive_collection.create_index("student_id")
+    students_archive_collection.create_index([("department", 1), ("semester", 1)])
+    students_archive_collection.create_index("archived_at")
+    alerts_collection.create_index([("sent", 1), ("risk_level", 1), ("created_at", 1)])
+    # Feed reads: seq range, overall or per risk level
+    alerts_collection.create_index("seq", unique=True, sparse=True)
+    alerts_collection.create_index([("risk_level", 1), ("seq", 1)])
+    shadow_scores_collection.create_index([("model", 1), ("scored_at", -1)])
+    shadow_scores_collection.create_index("scored_at", expireAfterSeconds=SHADOW_RETENTION_DAYS * 86400)
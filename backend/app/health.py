@@ -0,0 +1,112 @@
+"""
+Health Probing
+Background thread that checks MongoDB and the model on an interval and caches the result
+
+Liveness and readiness endpoints read the cached status only, so orchestrator
+probes never touch the database and answer even while Mongo is slow. Indexes are
+created by the prober after the first successful ping, not at import or startup.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from app.config import HEALTH_PROBE_INTERVAL, HEALTH_STALE_AFTER
+from app.database import client, DB_NAME, ensure_indexes
+from app.ml.load_model import load_model, get_model_version
+
+class HealthProber:
+    """Refreshes a cached database/model status from a daemon thread"""
+
+    def __init__(self, interval: float, stale_after: float):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.started_at = time.monotonic()
+        self.status: Dict[str, Any] = {
+            "database": {"status": "unknown", "latency_ms": None, "error": None},
+            "model": {"status": "unknown", "version": None, "error": None},
+            "checked_at": None,
+        }
+        self._last_ok: Optional[float] = None
+        self._indexes_created = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def probe(self):
+        """Check database and model once and replace the cached status"""
+        database = self._probe_database()
+        model = self._probe_model()
+        if database["status"] == "connected" and model["status"] == "loaded":
+            self._last_ok = time.monotonic()
+        # Swap in a new dict so readers never see a half-updated status
+        self.status = {
+            "database": database,
+            "model": model,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _probe_database(self) -> Dict[str, Any]:
+        previous = self.status["database"]["status"]
+        started = time.perf_counter()
+        try:
+            client.admin.command("ping")
+        except Exception as e:
+            if previous != "disconnected":
+                print(f"⚠️  MongoDB is not reachable: {str(e).splitlines()[0][:200]}")
+            return {"status": "disconnected", "latency_ms": None, "error": str(e)[:200]}
+
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        if previous != "connected":
+            print(f"✅ MongoDB connected successfully (database: {DB_NAME})")
+        if not self._indexes_created:
+            try:
+                ensure_indexes()
+                self._indexes_created = True
+            except Exception as e:
+                print(f"⚠️  Could not create indexes: {str(e)}")
+        return {"status": "connected", "latency_ms": latency_ms, "error": None}
+
+    def _probe_model(self) -> Dict[str, Any]:
+        try:
+            load_model()
+            return {"status": "loaded", "version": get_model_version(), "error": None}
+        except Exception as e:
+            return {"status": "unavailable", "version": None, "error": str(e)[:200]}
+
+    def liveness(self) -> Dict[str, Any]:
+        alive = self._thread is not None and self._thread.is_alive()
+        return {
+            "status": "alive",
+            "prober": "running" if alive else "stopped",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        status = self.status
+        age = None if self._last_ok is None else round(time.monotonic() - self._last_ok, 1)
+        # The last probe must have passed and not be stale (a stuck prober is not ready)
+        ready = (
+            status["database"]["status"] == "connected"
+            and status["model"]["status"] == "loaded"
+            and age is not None and age <= self.stale_after
+        )
+        return {
+            "ready": ready,
+            "last_ok_seconds_ago": age,
+            **status,
+        }
+
+health_prober = HealthProber(HEALTH_PROBE_INTERVAL, HEALTH_STALE_AFTER)
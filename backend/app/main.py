@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import students, upload, risk, alerts, predict
-from app.database import db
+from fastapi.responses import JSONResponse
+from app.routers import students, upload, risk, alerts, predict, attendance, counsellors, archive, events
+from app.services.attendance import attendance_buffer
+from app.health import health_prober
+from app.services.search import student_search
+from app.services.events import stats_publisher
+from app.ml.registry import model_registry
+from app.admission import build_admission_middleware, admission_stats
+from app.config import ADMISSION_ENABLED, PROFILING_ENABLED
 
 app = FastAPI(
     title="EarlySignal.AI Backend",
@@ -9,6 +16,16 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Opt-in request profiling, innermost so it measures only the request's own work
+if PROFILING_ENABLED:
+    from app.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Admission control / load shedding for expensive endpoints
+# (added before CORS so rejections still carry CORS headers)
+if ADMISSION_ENABLED:
+    app.add_middleware(build_admission_middleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +41,41 @@ app.include_router(upload.router)
 app.include_router(risk.router)
 app.include_router(alerts.router)
 app.include_router(predict.router)
+app.include_router(attendance.router)
+app.include_router(counsellors.router)
+app.include_router(archive.router)
+app.include_router(events.router)
+
+if PROFILING_ENABLED:
+    from app.routers import profiling
+    app.include_router(profiling.router)
+
+@app.on_event("startup")
+def start_health_prober():
+    """Probe database and model in the background (also creates indexes once Mongo is reachable)"""
+    health_prober.start()
+
+@app.on_event("startup")
+def start_search_index():
+    """Build the student search index in the background and keep it refreshed"""
+    student_search.start()
+
+@app.on_event("startup")
+def start_stats_publisher():
+    """Push dashboard stats to /events/stream subscribers"""
+    stats_publisher.start()
+
+@app.on_event("startup")
+def start_shadow_model():
+    """Load the shadow model (if configured) in the background, so no request waits on it"""
+    model_registry.start()
+
+@app.on_event("shutdown")
+def flush_buffers():
+    """Write any buffered attendance marks before the process exits"""
+    health_prober.stop()
+    if attendance_buffer.pending:
+        attendance_buffer.flush()
 
 @app.get("/")
 def root():
@@ -37,21 +89,36 @@ def root():
             "risk": "/risk",
             "alerts": "/alerts",
             "predict": "/predict",
+            "attendance": "/attendance",
+            "counsellors": "/counsellors",
+            "archive": "/archive",
+            "events": "/events/stream",
             "docs": "/docs"
         }
     }
 
 @app.get("/health")
-def health_check():
-    """Health check endpoint"""
-    try:
-        # Test database connection
-        db.command('ping')
-        db_status = "connected"
-    except:
-        db_status = "disconnected"
-    
+async def health_check():
+    """Health check endpoint (cached status from the background prober)"""
     return {
         "status": "healthy",
-        "database": db_status
+        "database": health_prober.status["database"]["status"]
     }
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving"""
+    return health_prober.liveness()
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: database reachable and model loaded as of the last probe"""
+    readiness_status = health_prober.readiness()
+    if not readiness_status["ready"]:
+        return JSONResponse(status_code=503, content=readiness_status)
+    return readiness_status
+
+@app.get("/admission/stats")
+def get_admission_stats():
+    """Concurrency, queue and rejection counters of the admission control layer"""
+    return admission_stats()
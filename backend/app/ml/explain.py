@@ -0,0 +1,108 @@
+"""
+Prediction Explanations
+Vectorized per-feature contributions for batches of predictions
+
+- Linear models: coefficient x scaled feature value (log-odds contribution)
+- Decision trees / random forests: path-based contributions, i.e. the change in
+  dropout probability at every split a student passes through, credited to the
+  split feature and averaged over the trees of a forest
+"""
+from typing import Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+# Contribution matrices per fitted tree model, keyed by id(model)
+_tree_cache = {}
+
+def explain_batch(model, features: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Compute feature contributions for a batch of (already scaled) feature rows.
+
+    Returns an array of shape (n_students, n_features), or None when the model
+    type has no supported explanation.
+    """
+    if features.shape[0] == 0:
+        return np.zeros((0, features.shape[1]))
+
+    if hasattr(model, "coef_"):
+        coefficients = np.asarray(model.coef_)[0]
+        return features * coefficients
+
+    if hasattr(model, "tree_") or hasattr(model, "estimators_"):
+        node_contributions = _tree_contribution_matrix(model, features.shape[1])
+        paths = model.decision_path(features)
+        # A forest returns (indicator, n_nodes_ptr); a single tree just the indicator
+        indicator = paths[0] if isinstance(paths, tuple) else paths
+        return np.asarray((indicator @ node_contributions).todense())
+
+    return None
+
+def expected_value(model) -> Optional[float]:
+    """Dropout probability before any split is taken (the root of the tree/forest)"""
+    trees = tree_estimators(model)
+    if not trees:
+        return None
+    class_index = positive_class_index(model)
+    roots = [node_probabilities(tree.tree_, class_index)[0] for tree in trees]
+    return float(np.mean(roots))
+
+def _tree_contribution_matrix(model, n_features: int) -> sparse.csr_matrix:
+    """
+    Build a sparse (total_nodes x n_features) matrix whose row for node i holds the
+    probability change from its parent to i, in the column of the parent's split
+    feature. Multiplying a decision path indicator by it sums contributions per feature.
+    """
+    cached = _tree_cache.get(id(model))
+    if cached is not None and cached[0] is model:
+        return cached[1]
+
+    trees = tree_estimators(model)
+    class_index = positive_class_index(model)
+    blocks = []
+    for tree in trees:
+        tree_ = tree.tree_
+        probabilities = node_probabilities(tree_, class_index)
+        parents, parent_features = _parents(tree_)
+
+        children = np.nonzero(parents >= 0)[0]
+        deltas = (probabilities[children] - probabilities[parents[children]]) / len(trees)
+        blocks.append(sparse.csr_matrix(
+            (deltas, (children, parent_features[children])),
+            shape=(tree_.node_count, n_features)
+        ))
+
+    matrix = sparse.vstack(blocks, format="csr")
+    _tree_cache.clear()
+    _tree_cache[id(model)] = (model, matrix)
+    return matrix
+
+def tree_estimators(model):
+    """Fitted decision trees of a tree or forest model (empty for other models)"""
+    if hasattr(model, "estimators_"):
+        return list(model.estimators_)
+    if hasattr(model, "tree_"):
+        return [model]
+    return []
+
+def positive_class_index(model) -> int:
+    """Column of the dropout (1) class in predict_proba output"""
+    classes = list(getattr(model, "classes_", [0, 1]))
+    return classes.index(1) if 1 in classes else len(classes) - 1
+
+def node_probabilities(tree_, class_index: int) -> np.ndarray:
+    """Dropout probability at every node of a fitted tree"""
+    values = tree_.value[:, 0, :]
+    totals = values.sum(axis=1)
+    return values[:, class_index] / np.where(totals > 0, totals, 1)
+
+def _parents(tree_) -> Tuple[np.ndarray, np.ndarray]:
+    """Parent node id and parent split feature of every node (-1 for the root)"""
+    parents = np.full(tree_.node_count, -1, dtype=np.int64)
+    internal = np.nonzero(tree_.children_left >= 0)[0]
+    parents[tree_.children_left[internal]] = internal
+    parents[tree_.children_right[internal]] = internal
+
+    parent_features = np.zeros(tree_.node_count, dtype=np.int64)
+    has_parent = parents >= 0
+    parent_features[has_parent] = tree_.feature[parents[has_parent]]
+    return parents, parent_features
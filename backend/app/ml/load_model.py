@@ -7,11 +7,13 @@ BASE_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE_DIR, "models", "dropout_model.pkl")
 SCALER_PATH = os.path.join(BASE_DIR, "models", "scaler.pkl")
 FEATURE_ORDER_PATH = os.path.join(BASE_DIR, "models", "feature_order.json")
+METADATA_PATH = os.path.join(BASE_DIR, "models", "model_metadata.json")
 
 # Global variables to cache loaded models
 model = None
 scaler = None
 feature_order = None
+model_metadata = None
 
 def load_model():
     """Load the trained dropout prediction model"""
@@ -20,7 +22,7 @@ def load_model():
         if not os.path.exists(MODEL_PATH):
             raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
         model = joblib.load(MODEL_PATH)
-        print(f"✅ Model loaded from {MODEL_PATH}")
+        print(f"✅ Model loaded from {MODEL_PATH} (version {get_model_version()})")
     return model
 
 def load_scaler():
@@ -47,3 +49,24 @@ def load_feature_order():
             feature_order = ["attendance", "internal_marks", "backlogs", "study_hours", "previous_failures"]
             print(f"⚠️  Using default feature order: {feature_order}")
     return feature_order
+
+def load_model_metadata():
+    """Load the metadata written by the training pipeline (app/ml/train.py)"""
+    global model_metadata
+    if model_metadata is None:
+        if os.path.exists(METADATA_PATH):
+            with open(METADATA_PATH, 'r') as f:
+                model_metadata = json.load(f)
+        else:
+            # Artifacts predating the training pipeline carry no metadata
+            model_metadata = {"version": "unversioned"}
+    return model_metadata
+
+def get_model_version():
+    """Get the version string of the deployed model"""
+    return load_model_metadata().get("version", "unversioned")
+
+def reload_models():
+    """Drop cached artifacts so the next call picks up newly trained files"""
+    global model, scaler, feature_order, model_metadata
+    model = scaler = feature_order = model_metadata = None
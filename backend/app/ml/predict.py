@@ -1,6 +1,42 @@
+import time
 import numpy as np
-from typing import Dict, Any, List
+import pandas as pd
+from typing import Dict, Any, List, Union, Iterable
 from app.ml.load_model import load_model, load_scaler, load_feature_order
+from app.ml.explain import explain_batch
+from app.ml.registry import model_registry
+from app.ml.risk_factors import risk_factor_flags, risk_flags_for, describe_risk_factors
+
+# Thresholds used by calculate_risk_level
+HIGH_RISK_PROBABILITY = 0.7
+MEDIUM_RISK_PROBABILITY = 0.4
+HIGH_RISK_ATTENDANCE = 60
+MEDIUM_RISK_ATTENDANCE = 75
+HIGH_RISK_BACKLOGS = 3
+MEDIUM_RISK_BACKLOGS = 1
+
+# Subject-level features derived in MongoDB by app/services/academics.py
+ACADEMIC_FEATURES = [
+    "academic_mean_score",
+    "academic_min_score",
+    "academic_score_slope",
+    "academic_total_attempts",
+    "academic_repeat_subjects",
+]
+
+# Values assumed for features missing from a stored student record
+FEATURE_DEFAULTS = {
+    "attendance": 75,
+    "internal_marks": 75,
+    "backlogs": 0,
+    "study_hours": 4,
+    "previous_failures": 0,
+    "academic_mean_score": 75,
+    "academic_min_score": 75,
+    "academic_score_slope": 0,
+    "academic_total_attempts": 0,
+    "academic_repeat_subjects": 0
+}
 
 def prepare_features(student_data: Dict[str, Any]) -> np.ndarray:
     """Prepare features in the correct order for model prediction"""
@@ -9,14 +45,29 @@ def prepare_features(student_data: Dict[str, Any]) -> np.ndarray:
     # Extract features in the correct order
     features = []
     for feature_name in feature_names:
-        value = student_data.get(feature_name, 0)
-        # Handle missing or invalid values
-        if value is None or value == "":
-            value = 0
+        value = student_data.get(feature_name)
+        # Missing or invalid values get the same defaults as batch scoring
+        if value is None or value == "" or value != value:
+            value = FEATURE_DEFAULTS.get(feature_name, 0)
         features.append(float(value))
     
     return np.array([features])
 
+def prepare_feature_matrix(students: Union[pd.DataFrame, Iterable[Dict[str, Any]]]) -> np.ndarray:
+    """Prepare a feature matrix for a batch of students in the model's feature order"""
+    feature_names = load_feature_order()
+    frame = students if isinstance(students, pd.DataFrame) else pd.DataFrame(list(students))
+    
+    matrix = np.zeros((len(frame), len(feature_names)), dtype=float)
+    for i, feature_name in enumerate(feature_names):
+        if feature_name in frame.columns:
+            column = pd.to_numeric(frame[feature_name], errors='coerce')
+            matrix[:, i] = column.fillna(FEATURE_DEFAULTS.get(feature_name, 0)).to_numpy(dtype=float)
+        else:
+            matrix[:, i] = FEATURE_DEFAULTS.get(feature_name, 0)
+    
+    return matrix
+
 def predict_dropout_probability(student_data: Dict[str, Any]) -> float:
     """Predict dropout probability for a student"""
     try:
@@ -31,20 +82,122 @@ def predict_dropout_probability(student_data: Dict[str, Any]) -> float:
             features = scaler.transform(features)
         
         # Get probability of dropout (class 1)
+        started = time.perf_counter()
         try:
             probability = model.predict_proba(features)[0][1]
         except AttributeError:
             # If model doesn't have predict_proba, use predict
             prediction = model.predict(features)[0]
             probability = float(prediction)
+        model_registry.record_primary(1, time.perf_counter() - started)
         
-        return round(float(probability), 4)
+        probability = round(float(probability), 4)
+        if model_registry.shadow_enabled:
+            model_registry.submit(
+                pd.DataFrame([student_data]), np.array([probability]),
+                np.array([calculate_risk_level(probability, student_data)]), source="predict"
+            )
+        return probability
     
     except Exception as e:
         print(f"Error in prediction: {str(e)}")
         # Fallback to rule-based prediction
         return estimate_risk_fallback(student_data)
 
+def predict_dropout_probabilities(students: Union[pd.DataFrame, Iterable[Dict[str, Any]]]) -> np.ndarray:
+    """Predict dropout probabilities for a batch of students with a single model call"""
+    frame = students if isinstance(students, pd.DataFrame) else pd.DataFrame(list(students))
+    if frame.empty:
+        return np.zeros(0)
+    
+    probabilities, _ = _predict_batch(frame, explain=False)
+    return probabilities
+
+def score_students(students: Union[pd.DataFrame, Iterable[Dict[str, Any]]], source: str = "batch") -> pd.DataFrame:
+    """
+    Score a batch of students with a single model call.
+    
+    Returns a frame aligned with the input holding dropout_probability, risk_level,
+    risk_flags (bitmask, see app/ml/risk_factors.py) and feature_contributions (one
+    value per feature in feature_order, None when the model cannot be explained). The same batch is queued for the
+    shadow model, if one is configured, tagged with source.
+    """
+    frame = students if isinstance(students, pd.DataFrame) else pd.DataFrame(list(students))
+    scores = pd.DataFrame(index=frame.index)
+    if frame.empty:
+        return scores.assign(dropout_probability=[], risk_level=[], risk_flags=[], feature_contributions=[])
+    
+    probabilities, contributions = _predict_batch(frame, explain=True)
+    
+    scores["dropout_probability"] = probabilities
+    scores["risk_level"] = calculate_risk_levels(probabilities, frame)
+    scores["risk_flags"] = risk_factor_flags(frame)
+    scores["feature_contributions"] = (
+        np.round(contributions, 4).tolist() if contributions is not None else [None] * len(frame)
+    )
+    
+    student_ids = frame["student_id"].tolist() if "student_id" in frame.columns else None
+    model_registry.submit(frame, probabilities, scores["risk_level"].to_numpy(), source, student_ids)
+    return scores
+
+def score_columns(frame: pd.DataFrame, source: str = "predict_batch") -> Dict[str, list]:
+    """
+    Score a batch of feature columns and return the results column-oriented
+    (no per-student explanation, unlike score_students)
+    """
+    if frame.empty:
+        return {"dropout_probability": [], "risk_level": [], "prediction": [], "confidence": [], "risk_factors": []}
+    
+    probabilities, _ = _predict_batch(frame, explain=False)
+    risk_levels = calculate_risk_levels(probabilities, frame)
+    model_registry.submit(frame, probabilities, risk_levels, source)
+    flags = risk_factor_flags(frame)
+    
+    return {
+        "dropout_probability": probabilities.tolist(),
+        "risk_level": risk_levels.tolist(),
+        "prediction": (probabilities > 0.5).astype(int).tolist(),
+        "confidence": prediction_confidences(probabilities).tolist(),
+        "risk_factors": [describe_risk_factors(int(f), record) for f, record in zip(flags, frame.to_dict("records"))],
+    }
+
+def _predict_batch(frame: pd.DataFrame, explain: bool):
+    """Run the model once over a batch, falling back to rules if the model fails"""
+    try:
+        model = load_model()
+        scaler = load_scaler()
+        
+        features = prepare_feature_matrix(frame)
+        if scaler is not None:
+            features = scaler.transform(features)
+        
+        started = time.perf_counter()
+        try:
+            probabilities = model.predict_proba(features)[:, 1]
+        except AttributeError:
+            probabilities = model.predict(features)
+        model_registry.record_primary(len(frame), time.perf_counter() - started)
+    
+    except Exception as e:
+        print(f"Error in batch prediction: {str(e)}")
+        return estimate_risk_fallback_batch(frame), None
+    
+    contributions = None
+    if explain:
+        try:
+            contributions = explain_batch(model, features)
+        except Exception as e:
+            print(f"Error explaining predictions: {str(e)}")
+    
+    return np.round(probabilities.astype(float), 4), contributions
+
+def contributions_by_feature(contributions: List[float]) -> Dict[str, float]:
+    """Label stored feature contributions with the current feature order"""
+    feature_names = load_feature_order()
+    if not contributions or len(contributions) != len(feature_names):
+        return {}
+    return dict(zip(feature_names, contributions))
+
 def predict_dropout(attendance: float, internal_marks: float = 75, backlogs: int = 0, 
                    study_hours: float = 4, previous_failures: int = 0) -> Dict[str, Any]:
     """Predict dropout for student with individual parameters"""
@@ -74,37 +227,36 @@ def calculate_risk_level(probability: float, student_data: Dict[str, Any]) -> st
     backlogs = student_data.get("backlogs", 0)
     
     # High risk criteria
-    if probability > 0.7 or attendance < 60 or backlogs >= 3:
+    if (probability > HIGH_RISK_PROBABILITY or attendance < HIGH_RISK_ATTENDANCE
+            or backlogs >= HIGH_RISK_BACKLOGS):
         return "high"
     # Medium risk criteria
-    elif probability > 0.4 or attendance < 75 or backlogs >= 1:
+    elif (probability > MEDIUM_RISK_PROBABILITY or attendance < MEDIUM_RISK_ATTENDANCE
+            or backlogs >= MEDIUM_RISK_BACKLOGS):
         return "medium"
     # Low risk
     else:
         return "low"
 
+def calculate_risk_levels(probabilities: np.ndarray, students: pd.DataFrame) -> np.ndarray:
+    """Vectorized calculate_risk_level for a batch of students"""
+    attendance = numeric_column(students, "attendance", 100)
+    backlogs = numeric_column(students, "backlogs", 0)
+    
+    high = ((probabilities > HIGH_RISK_PROBABILITY) | (attendance < HIGH_RISK_ATTENDANCE)
+            | (backlogs >= HIGH_RISK_BACKLOGS))
+    medium = ((probabilities > MEDIUM_RISK_PROBABILITY) | (attendance < MEDIUM_RISK_ATTENDANCE)
+              | (backlogs >= MEDIUM_RISK_BACKLOGS))
+    
+    return np.select([high, medium], ["high", "medium"], default="low")
+
+def attendance_band(attendance: np.ndarray) -> np.ndarray:
+    """Map attendance values to the calculate_risk_level band they fall into (0=high, 1=medium, 2=low)"""
+    return np.digitize(attendance, [HIGH_RISK_ATTENDANCE, MEDIUM_RISK_ATTENDANCE])
+
 def identify_risk_factors(student_data: Dict[str, Any]) -> List[str]:
     """Identify specific risk factors for a student"""
-    factors = []
-    
-    attendance = student_data.get("attendance", 100)
-    internal_marks = student_data.get("internal_marks", 100)
-    backlogs = student_data.get("backlogs", 0)
-    study_hours = student_data.get("study_hours", 0)
-    previous_failures = student_data.get("previous_failures", 0)
-    
-    if attendance < 75:
-        factors.append(f"Low attendance ({attendance}%)")
-    if internal_marks < 50:
-        factors.append(f"Low internal marks ({internal_marks})")
-    if backlogs > 0:
-        factors.append(f"{backlogs} backlog(s)")
-    if study_hours < 3:
-        factors.append(f"Insufficient study hours ({study_hours}h/day)")
-    if previous_failures > 0:
-        factors.append(f"{previous_failures} previous failure(s)")
-    
-    return factors if factors else ["No significant risk factors identified"]
+    return describe_risk_factors(risk_flags_for(student_data), student_data)
 
 def get_prediction_confidence(probability: float) -> str:
     """Get confidence level of prediction"""
@@ -115,6 +267,12 @@ def get_prediction_confidence(probability: float) -> str:
     else:
         return "low"
 
+def prediction_confidences(probabilities: np.ndarray) -> np.ndarray:
+    """Vectorized get_prediction_confidence"""
+    high = (probabilities > 0.8) | (probabilities < 0.2)
+    medium = (probabilities > 0.6) | (probabilities < 0.4)
+    return np.select([high, medium], ["high", "medium"], default="low")
+
 def estimate_risk_fallback(student_data: Dict[str, Any]) -> float:
     """Fallback risk estimation using rules"""
     score = 0.0
@@ -149,3 +307,21 @@ def estimate_risk_fallback(student_data: Dict[str, Any]) -> float:
         factors += 1
     
     return min(score, 0.95)  # Cap at 95%
+
+def estimate_risk_fallback_batch(students: pd.DataFrame) -> np.ndarray:
+    """Vectorized estimate_risk_fallback for a batch of students"""
+    attendance = numeric_column(students, "attendance", 100)
+    internal_marks = numeric_column(students, "internal_marks", 100)
+    backlogs = numeric_column(students, "backlogs", 0)
+    
+    score = np.select([attendance < 60, attendance < 75], [0.3, 0.15], default=0.0)
+    score += np.select([internal_marks < 40, internal_marks < 60], [0.3, 0.15], default=0.0)
+    score += np.select([backlogs >= 3, backlogs > 0], [0.3, 0.1 * backlogs], default=0.0)
+    
+    return np.minimum(score, 0.95)
+
+def numeric_column(students: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    """Get a numeric column as an array, filling missing values with a default"""
+    if name not in students.columns:
+        return np.full(len(students), default, dtype=float)
+    return pd.to_numeric(students[name], errors='coerce').fillna(default).to_numpy(dtype=float)
@@ -0,0 +1,268 @@
+"""
+Model Registry
+The primary model (load_model.py) plus an optional shadow model scored on the
+same batches in a background executor
+
+Scoring paths hand each batch to submit() after the primary has scored it; the
+shadow predicts, its outputs are stored in shadow_scores_collection, and latency
+and agreement with the primary are accumulated per model. The primary response
+never waits on the shadow: when SHADOW_MAX_PENDING batches are already queued the
+batch is dropped and counted.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import joblib
+import numpy as np
+import pandas as pd
+from app.config import SHADOW_MODEL, SHADOW_MODEL_FEATURES, SHADOW_MAX_PENDING, SHADOW_STORE_OUTPUTS
+from app.ml.load_model import BASE_DIR, load_feature_order, load_scaler, get_model_version
+
+# Input order of artifacts that predate feature_order.json
+LEGACY_FEATURE_ORDER = ["attendance", "internal_marks", "backlogs", "study_hours", "previous_failures"]
+
+# Batch latencies kept per model for percentiles
+LATENCY_WINDOW = 1000
+
+class ModelStats:
+    """Latency of one model's predict calls"""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, rows: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.seconds += seconds
+            self._latencies.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+        summary = {"batches": self.batches, "rows": self.rows}
+        if len(latencies):
+            summary.update({
+                "batch_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+                "batch_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+                "row_us_mean": round(self.seconds / max(self.rows, 1) * 1e6, 2),
+            })
+        return summary
+
+class ShadowModel:
+    """A second model artifact with its own input features"""
+
+    def __init__(self, filename: str, features: Optional[List[str]] = None):
+        self.name = os.path.splitext(filename)[0]
+        self.path = os.path.join(BASE_DIR, "models", filename)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Shadow model file not found at {self.path}")
+        self.model = joblib.load(self.path)
+        self.version = time.strftime("%Y%m%d%H%M%S", time.gmtime(os.path.getmtime(self.path)))
+        self.features = features or self._infer_features()
+        n_features = getattr(self.model, "n_features_in_", len(self.features))
+        if len(self.features) != n_features:
+            raise ValueError(f"Shadow model {self.name} expects {n_features} features, got {self.features}")
+        # The primary scaler only fits a model trained on the same inputs
+        self.scaler = load_scaler() if self.features == load_feature_order() else None
+
+    def _infer_features(self) -> List[str]:
+        """Named inputs if the artifact records them, else the primary's or the legacy order"""
+        if hasattr(self.model, "feature_names_in_"):
+            return list(self.model.feature_names_in_)
+        n_features = getattr(self.model, "n_features_in_", None)
+        if n_features == len(load_feature_order()):
+            return list(load_feature_order())
+        return LEGACY_FEATURE_ORDER[:n_features]
+
+    def predict(self, frame: pd.DataFrame) -> np.ndarray:
+        """Dropout probabilities for a frame holding (some of) the model's features"""
+        from app.ml.predict import FEATURE_DEFAULTS
+
+        matrix = np.column_stack([
+            pd.to_numeric(frame[name], errors="coerce").fillna(FEATURE_DEFAULTS.get(name, 0)).to_numpy(dtype=float)
+            if name in frame.columns else np.full(len(frame), float(FEATURE_DEFAULTS.get(name, 0)))
+            for name in self.features
+        ])
+        if self.scaler is not None:
+            matrix = self.scaler.transform(matrix)
+        try:
+            probabilities = self.model.predict_proba(matrix)[:, 1]
+        except AttributeError:
+            probabilities = self.model.predict(matrix)
+        return np.round(probabilities.astype(float), 4)
+
+class ModelRegistry:
+    """Primary latency stats and the optional shadow model with its executor"""
+
+    def __init__(self, shadow_model: str, shadow_features: List[str], max_pending: int, store_outputs: bool):
+        self.shadow_model = shadow_model
+        self.shadow_features = shadow_features
+        self.max_pending = max_pending
+        self.store_outputs = store_outputs
+        self.stats = {"primary": ModelStats()}
+        self.shadow: Optional[ShadowModel] = None
+        self.shadow_error: Optional[str] = None
+        self.pending = 0
+        self.dropped = 0
+        self.failed = 0
+        self.agreement = {"rows": 0, "same_risk_level": 0, "same_label": 0, "abs_diff_sum": 0.0}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def shadow_enabled(self) -> bool:
+        return bool(self.shadow_model)
+
+    def load_shadow(self) -> Optional[ShadowModel]:
+        """Load the shadow artifact once; a broken one disables shadow scoring with a warning"""
+        with self._load_lock:
+            if self.shadow is None and self.shadow_enabled and self.shadow_error is None:
+                try:
+                    shadow = ShadowModel(self.shadow_model, self.shadow_features)
+                    self.stats[shadow.name] = ModelStats()
+                    self.shadow = shadow
+                    print(f"✅ Shadow model loaded from {shadow.path} (features {shadow.features})")
+                except Exception as e:
+                    self.shadow_error = str(e)[:200]
+                    print(f"⚠️  Shadow scoring disabled: {self.shadow_error}")
+            return self.shadow
+
+    def start(self):
+        """Load the shadow artifact on the shadow executor, off the request path (no-op if preloaded)"""
+        if self.shadow_enabled and self.shadow is None:
+            self._get_executor().submit(self.load_shadow)
+
+    def reload(self):
+        """Drop the loaded shadow so the next batch picks up a new artifact"""
+        with self._load_lock:
+            self.shadow = None
+            self.shadow_error = None
+
+    def record_primary(self, rows: int, seconds: float):
+        self.stats["primary"].record(rows, seconds)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            return self._executor
+
+    def submit(self, frame: pd.DataFrame, probabilities: np.ndarray, risk_levels: np.ndarray,
+               source: str, student_ids: Optional[List[Any]] = None):
+        """Queue a batch the primary has scored for shadow scoring; never blocks or loads anything"""
+        if not self.shadow_enabled or self.shadow_error is not None:
+            return
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending += 1
+
+        # Not loaded yet: the executor loads it before scoring, so keep every column
+        shadow = self.shadow
+        if shadow is None:
+            batch = frame.copy()
+        else:
+            columns = [name for name in set(shadow.features) | {"attendance", "backlogs"} if name in frame.columns]
+            batch = frame[columns].copy()
+        executor.submit(self._score, shadow, batch, np.asarray(probabilities).copy(),
+                        np.asarray(risk_levels).copy(), source, student_ids, get_model_version())
+
+    def _score(self, shadow, frame, primary_probabilities, primary_risk_levels, source, student_ids, primary_version):
+        # predict.py imports this module
+        from app.ml.predict import calculate_risk_levels
+
+        try:
+            shadow = shadow or self.load_shadow()
+            if shadow is None:
+                return
+            started = time.perf_counter()
+            probabilities = shadow.predict(frame)
+            self.stats[shadow.name].record(len(frame), time.perf_counter() - started)
+            risk_levels = calculate_risk_levels(probabilities, frame)
+
+            with self._lock:
+                self.agreement["rows"] += len(frame)
+                self.agreement["same_risk_level"] += int((risk_levels == primary_risk_levels).sum())
+                self.agreement["same_label"] += int(((probabilities > 0.5) == (primary_probabilities > 0.5)).sum())
+                self.agreement["abs_diff_sum"] += float(np.abs(probabilities - primary_probabilities).sum())
+
+            if self.store_outputs:
+                self._store(shadow, source, student_ids, probabilities, risk_levels,
+                            primary_probabilities, primary_risk_levels, primary_version)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"⚠️  Shadow scoring failed: {str(e).splitlines()[0][:200]}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _store(self, shadow, source, student_ids, probabilities, risk_levels,
+               primary_probabilities, primary_risk_levels, primary_version):
+        # Imported here so app.ml stays usable (e.g. by train.py) without the database module
+        from app.database import shadow_scores_collection
+
+        scored_at = datetime.now(timezone.utc)
+        ids = student_ids if student_ids is not None else [None] * len(probabilities)
+        shadow_scores_collection.insert_many([
+            {
+                "model": shadow.name,
+                "model_version": shadow.version,
+                "primary_version": primary_version,
+                "source": source,
+                "student_id": student_id,
+                "dropout_probability": float(probability),
+                "risk_level": str(risk_level),
+                "primary_probability": float(primary_probability),
+                "primary_risk_level": str(primary_risk_level),
+                "scored_at": scored_at,
+            }
+            for student_id, probability, risk_level, primary_probability, primary_risk_level
+            in zip(ids, probabilities, risk_levels, primary_probabilities, primary_risk_levels)
+        ], ordered=False)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-model latency plus shadow queue and agreement counters"""
+        rows = self.agreement["rows"]
+        summary = {
+            "primary": {"version": get_model_version(), **self.stats["primary"].summary()},
+            "shadow": None,
+        }
+        if self.shadow_enabled:
+            shadow = self.shadow
+            summary["shadow"] = {
+                "model": shadow.name if shadow else self.shadow_model,
+                "version": shadow.version if shadow else None,
+                "features": shadow.features if shadow else None,
+                "error": self.shadow_error,
+                "pending": self.pending,
+                "dropped_batches": self.dropped,
+                "failed_batches": self.failed,
+                **(self.stats[shadow.name].summary() if shadow else {}),
+                "agreement": {
+                    "rows": rows,
+                    "risk_level_rate": round(self.agreement["same_risk_level"] / rows, 4) if rows else None,
+                    "label_rate": round(self.agreement["same_label"] / rows, 4) if rows else None,
+                    "mean_abs_probability_diff": round(self.agreement["abs_diff_sum"] / rows, 4) if rows else None,
+                },
+            }
+        return summary
+
+model_registry = ModelRegistry(
+    SHADOW_MODEL,
+    [name.strip() for name in SHADOW_MODEL_FEATURES.split(",") if name.strip()],
+    SHADOW_MAX_PENDING,
+    SHADOW_STORE_OUTPUTS,
+)
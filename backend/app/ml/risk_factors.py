@@ -0,0 +1,118 @@
+"""
+Risk Factor Codes
+Risk factors are stored as a bitmask (risk_flags) next to the feature values that
+triggered them, and expanded to text only when a response is built
+
+Each factor has a stable code and bit; the text lives in a per-locale table, so
+adding a language means adding a table to RISK_FACTOR_TEXT.
+"""
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+# (code, bit, feature the factor is derived from); bits must never be reused
+RISK_FACTORS = [
+    ("low_attendance", 1 << 0, "attendance"),
+    ("low_marks", 1 << 1, "internal_marks"),
+    ("backlogs", 1 << 2, "backlogs"),
+    ("low_study_hours", 1 << 3, "study_hours"),
+    ("previous_failures", 1 << 4, "previous_failures"),
+]
+RISK_FACTOR_BITS = {code: bit for code, bit, _ in RISK_FACTORS}
+RISK_FACTOR_FEATURES = [feature for _, _, feature in RISK_FACTORS]
+
+# Thresholds, and the value assumed when a feature is missing (as identify_risk_factors always did)
+LOW_ATTENDANCE = 75
+LOW_MARKS = 50
+LOW_STUDY_HOURS = 3
+MISSING_VALUES = {"attendance": 100, "internal_marks": 100, "backlogs": 0, "study_hours": 0, "previous_failures": 0}
+
+DEFAULT_LOCALE = "en"
+
+# locale -> code -> (text with the triggering value, text when the value is not at hand)
+RISK_FACTOR_TEXT = {
+    "en": {
+        "low_attendance": ("Low attendance ({value}%)", "Low attendance"),
+        "low_marks": ("Low internal marks ({value})", "Low internal marks"),
+        "backlogs": ("{value} backlog(s)", "Backlogs"),
+        "low_study_hours": ("Insufficient study hours ({value}h/day)", "Insufficient study hours"),
+        "previous_failures": ("{value} previous failure(s)", "Previous failures"),
+        "none": ("No significant risk factors identified", "No significant risk factors identified"),
+    },
+}
+
+def risk_factor_flags(students: pd.DataFrame) -> np.ndarray:
+    """Bitmask of triggered risk factors for every row of a batch"""
+    def column(name):
+        if name not in students.columns:
+            return np.full(len(students), MISSING_VALUES[name], dtype=float)
+        return pd.to_numeric(students[name], errors="coerce").fillna(MISSING_VALUES[name]).to_numpy(dtype=float)
+
+    flags = np.zeros(len(students), dtype=np.int64)
+    flags |= np.where(column("attendance") < LOW_ATTENDANCE, RISK_FACTOR_BITS["low_attendance"], 0)
+    flags |= np.where(column("internal_marks") < LOW_MARKS, RISK_FACTOR_BITS["low_marks"], 0)
+    flags |= np.where(column("backlogs") > 0, RISK_FACTOR_BITS["backlogs"], 0)
+    flags |= np.where(column("study_hours") < LOW_STUDY_HOURS, RISK_FACTOR_BITS["low_study_hours"], 0)
+    flags |= np.where(column("previous_failures") > 0, RISK_FACTOR_BITS["previous_failures"], 0)
+    return flags
+
+def risk_flags_for(values: Dict[str, Any]) -> int:
+    """risk_factor_flags for a single student dict"""
+    def value(name):
+        raw = values.get(name)
+        return MISSING_VALUES[name] if raw is None or raw == "" else float(raw)
+
+    flags = 0
+    if value("attendance") < LOW_ATTENDANCE:
+        flags |= RISK_FACTOR_BITS["low_attendance"]
+    if value("internal_marks") < LOW_MARKS:
+        flags |= RISK_FACTOR_BITS["low_marks"]
+    if value("backlogs") > 0:
+        flags |= RISK_FACTOR_BITS["backlogs"]
+    if value("study_hours") < LOW_STUDY_HOURS:
+        flags |= RISK_FACTOR_BITS["low_study_hours"]
+    if value("previous_failures") > 0:
+        flags |= RISK_FACTOR_BITS["previous_failures"]
+    return flags
+
+def risk_factor_codes(flags: int) -> List[str]:
+    return [code for code, bit, _ in RISK_FACTORS if flags & bit]
+
+def risk_factor_mask(codes: List[str]) -> int:
+    """Bitmask for a list of codes; raises ValueError on unknown codes"""
+    unknown = [code for code in codes if code not in RISK_FACTOR_BITS]
+    if unknown:
+        raise ValueError(f"Unknown risk factor(s) {unknown}. Known: {list(RISK_FACTOR_BITS)}")
+    mask = 0
+    for code in codes:
+        mask |= RISK_FACTOR_BITS[code]
+    return mask
+
+def describe_risk_factors(flags: int, values: Dict[str, Any], locale: Optional[str] = None) -> List[str]:
+    """Text of the factors set in flags, filled with the triggering values from values"""
+    table = RISK_FACTOR_TEXT.get(locale or DEFAULT_LOCALE, RISK_FACTOR_TEXT[DEFAULT_LOCALE])
+    texts = []
+    for code, bit, feature in RISK_FACTORS:
+        if flags & bit:
+            with_value, without_value = table[code]
+            value = values.get(feature)
+            texts.append(without_value if value is None else with_value.format(value=value))
+    return texts or [table["none"][0]]
+
+def triggering_values(flags: int, values: Dict[str, Any]) -> Dict[str, Any]:
+    """Feature values behind the set factors, as plain Python numbers (stored on alerts)"""
+    triggering = {}
+    for _, bit, feature in RISK_FACTORS:
+        value = values.get(feature)
+        if flags & bit and value is not None:
+            triggering[feature] = value.item() if hasattr(value, "item") else value
+    return triggering
+
+def student_risk_factors(doc: Dict[str, Any], locale: Optional[str] = None) -> List[str]:
+    """
+    Risk factor text for a stored student or alert; the values come from the document's
+    features or its risk_factor_values. Documents written before risk_flags keep their text.
+    """
+    if doc.get("risk_flags") is None:
+        return doc.get("risk_factors", [])
+    return describe_risk_factors(int(doc["risk_flags"]), {**doc, **doc.get("risk_factor_values", {})}, locale)
@@ -0,0 +1,230 @@
+"""
+Model Training Pipeline
+Trains the dropout model offline and writes the artifacts that load_model.py consumes
+
+Usage (from the backend directory):
+    python -m app.ml.train --data app/ml/student_data.csv --n-jobs -1
+    python -m app.ml.train --data new_term.csv --warm-start
+"""
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from app.ml.load_model import MODEL_PATH, SCALER_PATH, FEATURE_ORDER_PATH, METADATA_PATH
+from app.ml.predict import ACADEMIC_FEATURES, FEATURE_DEFAULTS
+
+# Features the API can supply, in canonical order (academic ones come from POST /risk/academic-features)
+CANDIDATE_FEATURES = ["attendance", "internal_marks", "backlogs", "study_hours", "previous_failures"] + ACADEMIC_FEATURES
+LABEL_COLUMN = "dropout"
+
+# Model families and hyperparameters searched with cross-validation
+SEARCH_SPACE = [
+    {
+        "model": [LogisticRegression(max_iter=1000)],
+        "model__C": [0.01, 0.1, 1.0, 10.0],
+    },
+    {
+        "model": [DecisionTreeClassifier(random_state=42)],
+        "model__max_depth": [3, 5, 8],
+        "model__min_samples_leaf": [1, 5, 20],
+    },
+    {
+        "model": [RandomForestClassifier(random_state=42)],
+        "model__n_estimators": [100, 200],
+        "model__max_depth": [5, 8, None],
+        "model__min_samples_leaf": [1, 5],
+    },
+]
+
+def read_training_data(path: str, chunksize: int = 100_000) -> pd.DataFrame:
+    """Read only the feature and label columns of a training CSV, chunk by chunk"""
+    wanted = set(CANDIDATE_FEATURES) | {LABEL_COLUMN}
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=lambda c: c.strip().lower() in wanted, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip().str.lower()
+        chunk = chunk.apply(pd.to_numeric, errors='coerce')
+        chunks.append(chunk.dropna(subset=[LABEL_COLUMN]).astype(np.float32))
+
+    if not chunks:
+        raise ValueError(f"No rows found in {path}")
+
+    data = pd.concat(chunks, ignore_index=True)
+    if LABEL_COLUMN not in data.columns:
+        raise ValueError(f"Training data must contain a '{LABEL_COLUMN}' column")
+    return data
+
+def search_model(X: np.ndarray, y: np.ndarray, n_jobs: int, cv: int, scoring: str):
+    """Cross-validated search over model families and hyperparameters, in parallel"""
+    pipeline = Pipeline([("scaler", StandardScaler()), ("model", LogisticRegression())])
+    search = GridSearchCV(
+        pipeline,
+        SEARCH_SPACE,
+        scoring=scoring,
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=42),
+        n_jobs=n_jobs,
+        refit=True,
+    )
+    search.fit(X, y)
+
+    best = search.best_estimator_
+    best_params = {
+        key: value for key, value in search.best_params_.items() if key != "model"
+    }
+    return best.named_steps["model"], best.named_steps["scaler"], float(search.best_score_), best_params
+
+def warm_start_model(X: np.ndarray, y: np.ndarray, feature_names: List[str], add_estimators: int):
+    """Refit the current model on a new labeled term without rerunning the search"""
+    metadata = read_metadata()
+    if metadata.get("features") and metadata["features"] != feature_names:
+        raise ValueError(f"New data has features {feature_names}, current model uses {metadata['features']}")
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    # Keep the existing scaling so previously fitted parts of the model stay valid
+    X_scaled = scaler.transform(X)
+
+    if isinstance(model, RandomForestClassifier):
+        # Grow additional trees on the new term; existing trees are kept as-is
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + add_estimators)
+        model.fit(X_scaled, y)
+    elif isinstance(model, LogisticRegression):
+        # Start the solver from the current coefficients
+        model.set_params(warm_start=True)
+        model.fit(X_scaled, y)
+    else:
+        # No incremental update available, refit with the same hyperparameters
+        model.fit(X_scaled, y)
+
+    return model, scaler, metadata
+
+def read_metadata() -> Dict[str, Any]:
+    """Read the metadata of the currently deployed model, if any"""
+    if not os.path.exists(METADATA_PATH):
+        return {}
+    with open(METADATA_PATH, 'r') as f:
+        return json.load(f)
+
+def write_artifacts(model, scaler, feature_names: List[str], metadata: Dict[str, Any]):
+    """Write model, scaler, feature order and metadata, replacing each file atomically"""
+    def atomic_write(path: str, write):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def write_json(value):
+        def write(path):
+            with open(path, 'w') as f:
+                json.dump(value, f, indent=2)
+        return write
+
+    atomic_write(MODEL_PATH, lambda path: joblib.dump(model, path))
+    atomic_write(SCALER_PATH, lambda path: joblib.dump(scaler, path))
+    atomic_write(FEATURE_ORDER_PATH, write_json(feature_names))
+    # Metadata goes last so its version only ever describes a complete set of artifacts
+    atomic_write(METADATA_PATH, write_json(metadata))
+
+def train(data_path: str, chunksize: int = 100_000, n_jobs: int = -1, cv: int = 5,
+          scoring: str = "roc_auc", warm_start: bool = False, add_estimators: int = 50) -> Dict[str, Any]:
+    """Train (or incrementally refit) the dropout model and write its artifacts"""
+    data = read_training_data(data_path, chunksize=chunksize)
+    feature_names = [name for name in CANDIDATE_FEATURES if name in data.columns]
+    if not feature_names:
+        raise ValueError(f"Training data has none of the features {CANDIDATE_FEATURES}")
+
+    # Students without subject records have no academic features; the API scores them with the defaults
+    for name in ACADEMIC_FEATURES:
+        if name in data.columns:
+            data[name] = data[name].fillna(FEATURE_DEFAULTS[name])
+    data = data.dropna(subset=feature_names)
+    X = data[feature_names].to_numpy()
+    y = data[LABEL_COLUMN].astype(int).to_numpy()
+    print(f"📊 Loaded {len(data)} rows with features {feature_names}")
+
+    previous = read_metadata()
+    if warm_start:
+        print("🔁 Warm-starting from the current model...")
+        model, scaler, previous = warm_start_model(X, y, feature_names, add_estimators)
+        cv_score = None
+        params = previous.get("params", {})
+        n_samples = previous.get("n_samples", 0) + len(data)
+    else:
+        print(f"🔎 Searching models with {cv}-fold CV (n_jobs={n_jobs})...")
+        model, scaler, cv_score, params = search_model(X, y, n_jobs=n_jobs, cv=cv, scoring=scoring)
+        n_samples = len(data)
+
+    metadata = {
+        "version": datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "parent_version": previous.get("version"),
+        "model_type": type(model).__name__,
+        "params": {key: _json_safe(value) for key, value in params.items()},
+        "features": feature_names,
+        "label": LABEL_COLUMN,
+        "cv_scoring": scoring,
+        "cv_score": cv_score,
+        "n_samples": n_samples,
+        "warm_start": warm_start,
+        "training_data": os.path.basename(data_path),
+        "sklearn_version": sklearn.__version__,
+    }
+
+    write_artifacts(model, scaler, feature_names, metadata)
+    print(f"✅ Model {metadata['model_type']} version {metadata['version']} written to {os.path.dirname(MODEL_PATH)}")
+    if cv_score is not None:
+        print(f"   CV {scoring}: {cv_score:.4f}")
+    return metadata
+
+def _json_safe(value: Any) -> Any:
+    """Convert numpy scalars in hyperparameters to plain JSON values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the EarlySignal.AI dropout model")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(__file__), "student_data.csv"),
+                        help="Training CSV with feature columns and a 'dropout' label")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows read per CSV chunk")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel jobs for the search (-1 = all cores)")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--scoring", default="roc_auc", help="scikit-learn scoring metric")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Refit the current model on new labeled data instead of searching")
+    parser.add_argument("--add-estimators", type=int, default=50,
+                        help="Trees added to a random forest when warm-starting")
+    args = parser.parse_args()
+
+    train(
+        args.data,
+        chunksize=args.chunksize,
+        n_jobs=args.n_jobs,
+        cv=args.cv,
+        scoring=args.scoring,
+        warm_start=args.warm_start,
+        add_estimators=args.add_estimators,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Decision Tree Export
+Exports fitted trees as compact parallel node arrays for client-side rendering
+"""
+from typing import Dict, Any, List, Optional
+import numpy as np
+from app.ml.load_model import load_model, load_scaler, load_feature_order, get_model_version
+from app.ml.explain import tree_estimators, positive_class_index, node_probabilities
+
+def export_tree_structure(max_depth: Optional[int] = None, tree_indices: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Export trees of the dropout model as parallel node arrays.
+
+    Node i of a tree is described by feature[i], threshold[i], left[i], right[i],
+    value[i] (dropout probability) and samples[i]. Leaves have feature -1 and
+    children -1. Thresholds are converted back to raw feature units when the
+    scaler allows it. Trees deeper than max_depth are cut, turning the nodes at
+    max_depth into leaves.
+    """
+    model = load_model()
+    trees = tree_estimators(model)
+    model_type = type(model).__name__
+    if not trees:
+        return {"error": f"Model is {model_type}, not a tree-based model"}
+
+    tree_indices = tree_indices or [0]
+    invalid = [index for index in tree_indices if not 0 <= index < len(trees)]
+    if invalid:
+        return {"error": f"Tree index {invalid[0]} out of range (model has {len(trees)} trees)"}
+
+    class_index = positive_class_index(model)
+    scaler = load_scaler()
+    exported = [
+        _export_tree(trees[index].tree_, index, class_index, scaler, max_depth)
+        for index in tree_indices
+    ]
+
+    return {
+        "model_type": model_type,
+        "model_version": get_model_version(),
+        "feature_names": load_feature_order(),
+        "class_names": ["No Dropout", "Dropout"],
+        "n_trees": len(trees),
+        "max_depth": max_depth,
+        "trees": exported,
+    }
+
+def _export_tree(tree_, index: int, class_index: int, scaler, max_depth: Optional[int]) -> Dict[str, Any]:
+    """Export one fitted tree, keeping nodes up to max_depth in breadth-first order"""
+    left = tree_.children_left
+    right = tree_.children_right
+
+    # Breadth-first walk, one numpy step per level
+    kept = []
+    depths = []
+    level = np.array([0])
+    depth = 0
+    while level.size:
+        kept.append(level)
+        depths.append(np.full(level.size, depth))
+        if max_depth is not None and depth >= max_depth:
+            break
+        internal = level[left[level] >= 0]
+        level = np.column_stack([left[internal], right[internal]]).ravel()
+        depth += 1
+
+    nodes = np.concatenate(kept)
+    node_depths = np.concatenate(depths)
+    new_ids = np.full(tree_.node_count, -1, dtype=np.int64)
+    new_ids[nodes] = np.arange(nodes.size)
+
+    is_leaf = left[nodes] < 0
+    cut = ~is_leaf & (new_ids[left[nodes]] < 0)
+    as_leaf = is_leaf | cut
+
+    features = np.where(as_leaf, -1, tree_.feature[nodes])
+    thresholds = _raw_thresholds(tree_.threshold[nodes], tree_.feature[nodes], scaler)
+    thresholds = np.where(as_leaf, 0.0, thresholds)
+
+    return {
+        "tree_index": index,
+        "node_count": int(nodes.size),
+        "depth": int(node_depths.max()),
+        "truncated": bool(cut.any()),
+        "feature": features.tolist(),
+        "threshold": np.round(thresholds, 4).tolist(),
+        "left": np.where(as_leaf, -1, new_ids[np.maximum(left[nodes], 0)]).tolist(),
+        "right": np.where(as_leaf, -1, new_ids[np.maximum(right[nodes], 0)]).tolist(),
+        "value": np.round(node_probabilities(tree_, class_index)[nodes], 4).tolist(),
+        "samples": tree_.n_node_samples[nodes].tolist(),
+    }
+
+def _raw_thresholds(thresholds: np.ndarray, features: np.ndarray, scaler) -> np.ndarray:
+    """Undo standard scaling on split thresholds so they read in original units"""
+    if scaler is None or not hasattr(scaler, "scale_") or not hasattr(scaler, "mean_"):
+        return thresholds
+    safe_features = np.maximum(features, 0)
+    return thresholds * scaler.scale_[safe_features] + scaler.mean_[safe_features]
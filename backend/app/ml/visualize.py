@@ -4,19 +4,26 @@ Generates visualization images for the trained decision tree model
 """
 import os
 import joblib
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend
-import matplotlib.pyplot as plt
 from sklearn.tree import plot_tree, export_text
 from io import BytesIO
 import base64
+from app.ml.load_model import load_feature_order
 
 BASE_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE_DIR, "models", "dropout_model.pkl")
 
+def _pyplot():
+    """Import matplotlib only when an image is actually rendered (see /risk/tree for the image-free export)"""
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-GUI backend
+    import matplotlib.pyplot as plt
+    return plt
+
 def generate_tree_visualization(max_depth=4):
     """Generate decision tree visualization as base64 image"""
     try:
+        plt = _pyplot()
+        
         # Load the model
         model = joblib.load(MODEL_PATH)
         
@@ -33,7 +40,7 @@ def generate_tree_visualization(max_depth=4):
         plt.figure(figsize=(20, 10))
         
         # Feature names
-        feature_names = ["attendance", "internal_marks", "backlogs", "study_hours", "previous_failures"]
+        feature_names = load_feature_order()
         class_names = ["No Dropout", "Dropout"]
         
         # Plot the tree
@@ -103,7 +110,7 @@ def get_feature_importance():
         
         # Check if model has feature_importances_
         if hasattr(model, 'feature_importances_'):
-            feature_names = ["attendance", "internal_marks", "backlogs", "study_hours", "previous_failures"]
+            feature_names = load_feature_order()
             importances = model.feature_importances_
             
             # Create importance dictionary
@@ -118,6 +125,7 @@ def get_feature_importance():
                                           reverse=True))
             
             # Create visualization
+            plt = _pyplot()
             plt.figure(figsize=(10, 6))
             plt.barh(list(sorted_importance.keys()), list(sorted_importance.values()))
             plt.xlabel('Importance')
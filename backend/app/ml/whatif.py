@@ -0,0 +1,119 @@
+"""
+What-if Analysis
+Scores a grid of variations of one student in a single model call
+
+One or two features are swept over a range while the others keep the student's
+values. The grid is built as one matrix and passed through the same scaler and
+feature order as every other prediction; results are cached per model version.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
+import numpy as np
+import pandas as pd
+from app.ml.load_model import get_model_version
+from app.ml.predict import predict_dropout_probabilities, calculate_risk_levels
+
+# Features that can be swept, with their valid ranges
+SWEEP_RANGES = {
+    "attendance": (0, 100),
+    "internal_marks": (0, 100),
+    "backlogs": (0, 20),
+    "study_hours": (0, 24),
+    "previous_failures": (0, 10),
+}
+
+MAX_GRID_POINTS = 10000
+CACHE_SIZE = 256
+
+_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+# The endpoint runs in threadpool workers; every cache read and write holds this lock
+_cache_lock = threading.Lock()
+
+def sweep_axis(feature: str, start: float, stop: float, step: float) -> np.ndarray:
+    """Values of one swept feature, stop included"""
+    if feature not in SWEEP_RANGES:
+        raise ValueError(f"Cannot sweep '{feature}'. Sweepable features: {', '.join(SWEEP_RANGES)}")
+    low, high = SWEEP_RANGES[feature]
+    if not low <= start <= stop <= high:
+        raise ValueError(f"{feature} range must satisfy {low} <= start <= stop <= {high}")
+    if step <= 0:
+        raise ValueError("step must be positive")
+    if (stop - start) / step + 1 > MAX_GRID_POINTS:
+        raise ValueError(f"Too many points on the {feature} axis")
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+def whatif_grid(base: Dict[str, float], sweeps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Dropout probability and risk level over a grid of one or two swept features.
+    
+    Returns the axes, the probability and risk level surfaces (nested lists indexed
+    like the axes) and the risk level boundaries along the last axis.
+    """
+    if not 1 <= len(sweeps) <= 2:
+        raise ValueError("Sweep one or two features")
+    features = [sweep["feature"] for sweep in sweeps]
+    if len(set(features)) != len(features):
+        raise ValueError("Each feature can be swept only once")
+
+    model_version = get_model_version()
+    key = (
+        model_version,
+        tuple(sorted(base.items())),
+        tuple((s["feature"], float(s["start"]), float(s["stop"]), float(s["step"])) for s in sweeps),
+    )
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    axes = [sweep_axis(s["feature"], float(s["start"]), float(s["stop"]), float(s["step"])) for s in sweeps]
+    shape = tuple(len(axis) for axis in axes)
+    if int(np.prod(shape)) > MAX_GRID_POINTS:
+        raise ValueError(f"Grid has {int(np.prod(shape))} points, the maximum is {MAX_GRID_POINTS}")
+
+    # Every grid point as one row: swept features from the mesh, the rest from the base student
+    mesh = np.meshgrid(*axes, indexing="ij")
+    size = mesh[0].size
+    frame = pd.DataFrame({name: np.full(size, value, dtype=float) for name, value in base.items()})
+    for feature, values in zip(features, mesh):
+        frame[feature] = values.ravel()
+
+    probabilities = predict_dropout_probabilities(frame)
+    risk_levels = calculate_risk_levels(probabilities, frame)
+
+    result = {
+        "model_version": model_version,
+        "base": base,
+        "features": features,
+        "axes": {feature: axis.tolist() for feature, axis in zip(features, axes)},
+        "dropout_probability": probabilities.reshape(shape).tolist(),
+        "risk_level": risk_levels.reshape(shape).tolist(),
+        "boundaries": risk_boundaries(features, axes, risk_levels.reshape(shape)),
+        "cached": False,
+    }
+
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+def risk_boundaries(features: List[str], axes: List[np.ndarray], risk_levels: np.ndarray) -> List[Dict[str, Any]]:
+    """Points along the last swept feature where the risk level changes"""
+    last = features[-1]
+    changes = np.argwhere(risk_levels[..., 1:] != risk_levels[..., :-1])
+    boundaries = []
+    for position in changes:
+        *outer, i = position
+        boundary = {
+            last: [float(axes[-1][i]), float(axes[-1][i + 1])],
+            "from": str(risk_levels[tuple(position)]),
+            "to": str(risk_levels[(*outer, i + 1)]),
+        }
+        if outer:
+            boundary[features[0]] = float(axes[0][outer[0]])
+        boundaries.append(boundary)
+    return boundaries
@@ -0,0 +1,233 @@
+"""
+Request Profiling
+Opt-in cProfile capture of single requests, saved to PROFILING_DIR
+
+A request is profiled when it carries the X-Profile-Token header with the
+configured token, or when it is picked by PROFILING_SAMPLE_RATE. The event loop
+thread is profiled for the whole request (routing, async handlers, response
+serialization), and sync handlers decorated with @profile_threadpool are profiled
+in the threadpool thread that runs them; both are merged into one profile. Only one request per process is profiled
+at a time, since a thread has a single profiler hook.
+
+The event loop profiler cannot tell coroutines apart: while the profiled request
+awaits, any other request or background task running on the loop is recorded in
+its profile too. Threadpool profiles contain only the handler's own work, so
+profile slow sync handlers (@profile_threadpool) on a quiet worker, or read the
+loop part of a profile with that in mind.
+
+With PROFILING_ENABLED=false the middleware is not installed and
+@profile_threadpool returns handlers unchanged, so there is no per-request cost.
+"""
+import asyncio
+import contextvars
+import cProfile
+import functools
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from app.config import PROFILING_ENABLED, PROFILING_TOKEN, PROFILING_SAMPLE_RATE, PROFILING_DIR, PROFILING_MAX_PROFILES
+
+PROFILE_HEADER = b"x-profile-token"
+# Functions listed in a profile summary
+TOP_FUNCTIONS = 40
+# Never profiled
+SKIPPED_PREFIXES = ("/profiling", "/health", "/docs", "/openapi.json", "/events/stream")
+
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+class RequestProfile:
+    """cProfile data of one request, from the event loop and any threadpool threads"""
+
+    def __init__(self, method: str, path: str, query: str, trigger: str):
+        self.id = "{}-{}-{}".format(
+            datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"),
+            re.sub(r"[^A-Za-z0-9]+", "_", f"{method}{path}").strip("_")[:60],
+            uuid.uuid4().hex[:6],
+        )
+        self.method, self.path, self.query, self.trigger = method, path, query, trigger
+        self.loop_profiler = cProfile.Profile()
+        self._thread_profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def thread_profiler(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._thread_profilers.append(profiler)
+        return profiler
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.loop_profiler)
+        for profiler in self._thread_profilers:
+            try:
+                stats.add(profiler)
+            except TypeError:
+                # A profiler that never ran has no stats to add
+                pass
+        return stats
+
+def profile_threadpool(handler):
+    """
+    Decorator for sync route handlers: when the current request is profiled, also
+    profile the threadpool thread the handler runs in. Returns the handler
+    unchanged when profiling is disabled.
+    """
+    if not PROFILING_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return handler(*args, **kwargs)
+        profiler = profile.thread_profiler()
+        profiler.enable()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            profiler.disable()
+    return wrapper
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests picked by header or sampling"""
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith(SKIPPED_PREFIXES):
+            return None
+        if PROFILING_TOKEN:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER and value.decode("latin-1") == PROFILING_TOKEN:
+                    return "header"
+        if PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile = RequestProfile(scope["method"], scope["path"], scope.get("query_string", b"").decode(), trigger)
+        status = {}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        token = _active_profile.set(profile)
+        started = time.perf_counter()
+        profile.loop_profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.loop_profiler.disable()
+            duration_ms = (time.perf_counter() - started) * 1000
+            _active_profile.reset(token)
+            self._busy = False
+            # The response is already sent; summarize and write off the event loop
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, save_profile, profile, status.get("code"), duration_ms)
+
+def save_profile(profile: RequestProfile, status_code: Optional[int], duration_ms: float):
+    """Write <id>.prof (pstats format) and <id>.json (metadata and top functions)"""
+    try:
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        stats = profile.stats()
+        stats.dump_stats(os.path.join(PROFILING_DIR, f"{profile.id}.prof"))
+
+        metadata = {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "query": profile.query,
+            "status_code": status_code,
+            "trigger": profile.trigger,
+            "duration_ms": round(duration_ms, 2),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "top_functions": top_functions(stats),
+        }
+        with open(os.path.join(PROFILING_DIR, f"{profile.id}.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+        print(f"🔬 Profiled {profile.method} {profile.path} ({duration_ms:.1f} ms) -> {profile.id}")
+        prune_profiles()
+    except Exception as e:
+        print(f"⚠️  Could not save profile {profile.id}: {str(e)}")
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """Functions with the most cumulative time"""
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": name,
+            "file": _short_path(filename),
+            "line": line,
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+def _short_path(filename: str) -> str:
+    """Trim site-packages and project prefixes so rows stay readable"""
+    for marker in ("site-packages" + os.sep, os.sep + "backend" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+def prune_profiles():
+    """Keep only the newest PROFILING_MAX_PROFILES profiles"""
+    metadata_files = sorted(glob.glob(os.path.join(PROFILING_DIR, "*.json")))
+    for path in metadata_files[:-PROFILING_MAX_PROFILES] if PROFILING_MAX_PROFILES > 0 else []:
+        for stale in (path, path[:-len(".json")] + ".prof"):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+def list_profiles(limit: int = 100) -> List[Dict[str, Any]]:
+    """Saved profiles, newest first, without their function tables"""
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(PROFILING_DIR, "*.json")), reverse=True)[:limit]:
+        with open(path) as f:
+            metadata = json.load(f)
+        metadata.pop("top_functions", None)
+        profiles.append(metadata)
+    return profiles
+
+def load_profile(profile_id: str, sort: str = "cumulative", limit: int = TOP_FUNCTIONS) -> Optional[Dict[str, Any]]:
+    """Metadata plus a pstats text report of one saved profile"""
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", profile_id):
+        return None
+    metadata_path = os.path.join(PROFILING_DIR, f"{profile_id}.json")
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+
+    report = io.StringIO()
+    stats = pstats.Stats(profile_path(profile_id), stream=report)
+    stats.sort_stats(sort).print_stats(limit)
+    metadata["report"] = report.getvalue()
+    return metadata
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILING_DIR, f"{profile_id}.prof")
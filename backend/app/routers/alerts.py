@@ -1,43 +1,72 @@
-from fastapi import APIRouter, HTTPException
-from app.services.email_service import send_alert
-from app.database import students_collection
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from app.services.email_service import send_digest
+from app.services.alert_feed import pending_alerts, mark_sent, alerts_since
+from app.services.counsellors import counsellor_contacts
+from app.services.events import broadcaster
+from app.ml.risk_factors import student_risk_factors
+from app.config import DEFAULT_ALERT_EMAIL
+from app.profiling import profile_threadpool
+from typing import Optional
 import traceback
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 @router.post("/send")
-async def send_alerts(risk_level: str = "high"):
-    """Send alerts to mentors for high-risk students"""
+@profile_threadpool
+def send_alerts(risk_level: str = "high", limit: int = 1000):
+    """Send pending risk transition alerts as one digest per counsellor and mark them as sent"""
     try:
-        # Find students with specified risk level
-        query = {"risk_level": risk_level.lower()}
-        students = list(students_collection.find(query))
+        # Only alerts that have not been delivered yet
+        alerts = pending_alerts(risk_level, limit=limit)
         
-        if not students:
+        if not alerts:
             return {
-                "message": f"No {risk_level} risk students found",
-                "alerts_sent": 0
+                "message": f"No pending {risk_level} risk alerts",
+                "alerts_sent": 0,
+                "digests_sent": 0,
+                "digests_skipped": 0,
+                "digests_failed": 0
             }
         
-        alerts_sent = 0
+        # One digest per counsellor; students without one go to the default recipient
+        by_counsellor = {}
+        for alert in alerts:
+            by_counsellor.setdefault(alert.get("counsellor_id"), []).append(alert)
+        contacts = counsellor_contacts(by_counsellor)
         
-        for student in students:
+        sent_ids = []
+        digests_sent = digests_skipped = digests_failed = 0
+        
+        for counsellor_id, counsellor_alerts in by_counsellor.items():
+            contact = contacts.get(counsellor_id, {})
+            email = contact.get("email") or DEFAULT_ALERT_EMAIL
+            name = contact.get("name") or counsellor_id or "Mentor"
             try:
-                student_id = student.get("student_id", "Unknown")
-                name = student.get("name", "Unknown")
-                email = "mentor@example.com"  # Replace with actual mentor email logic
-                
-                send_alert(email, student_id, risk_level, name)
-                alerts_sent += 1
+                result = send_digest(email, counsellor_alerts, name)
             except Exception as e:
-                print(f"Failed to send alert for student {student_id}: {str(e)}")
-                continue
+                print(f"Failed to send digest for counsellor {counsellor_id}: {str(e)}")
+                result = {"status": "failed"}
+            
+            # Only delivered alerts are marked sent; skipped (SendGrid not configured) and failed ones stay pending
+            status = result.get("status")
+            if status == "sent":
+                sent_ids.extend(alert["_id"] for alert in counsellor_alerts)
+                digests_sent += 1
+            elif status == "skipped":
+                digests_skipped += 1
+            else:
+                digests_failed += 1
+        
+        mark_sent(sent_ids)
+        broadcaster.publish("alerts", {"sent": len(sent_ids), "digests_sent": digests_sent})
         
         return {
             "message": f"Alerts sent for {risk_level} risk students",
-            "total_students": len(students),
-            "alerts_sent": alerts_sent
+            "total_students": len(alerts),
+            "alerts_sent": len(sent_ids),
+            "digests_sent": digests_sent,
+            "digests_skipped": digests_skipped,
+            "digests_failed": digests_failed
         }
     
     except Exception as e:
@@ -46,27 +75,24 @@ async def send_alerts(risk_level: str = "high"):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/")
-async def get_alerts():
-    """Get all alert-worthy students (high risk)"""
+def get_alerts(
+    since: int = Query(0, ge=0, description="Return alerts after this seq (the previous next_since)"),
+    limit: int = Query(100, ge=1, le=1000, description="Page size"),
+    risk_level: Optional[str] = Query(None, description="Only alerts into this risk level"),
+    lang: Optional[str] = Query(None, description="Language of risk factor text (default en)")
+):
+    """Alert feed, oldest first; poll with since=next_since to receive only new alerts"""
     try:
-        students = list(students_collection.find({"risk_level": "high"}))
-        
-        alerts = []
-        for student in students:
-            alerts.append({
-                "student_id": student.get("student_id"),
-                "name": student.get("name"),
-                "department": student.get("department"),
-                "dropout_probability": student.get("dropout_probability", 0),
-                "risk_factors": student.get("risk_factors", []),
-                "attendance": student.get("attendance", 0)
-            })
+        alerts = alerts_since(since, limit, risk_level)
+        for alert in alerts:
+            alert["risk_factors"] = student_risk_factors(alert, lang)
         
         return {
-            "total_alerts": len(alerts),
-            "students": alerts
+            "alerts": alerts,
+            "count": len(alerts),
+            "next_since": alerts[-1]["seq"] if alerts else since,
+            "has_more": len(alerts) == limit
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from app.services.archive import (
+    retention_query, archive_students, restore_students, find_archived, find_archived_student, tier_stats
+)
+from app.routers.students import serialize_student, build_student_query
+from app.profiling import profile_threadpool
+from typing import List, Optional
+import traceback
+
+router = APIRouter(prefix="/archive", tags=["Archive"])
+
+class RetentionPolicy(BaseModel):
+    """Students matching any of the set criteria are archived"""
+    graduated: bool = Field(False, description="Archive students flagged graduated=true")
+    min_semester: Optional[int] = Field(None, ge=1, description="Archive students in this semester or later")
+    inactive_days: Optional[int] = Field(None, ge=1, description="Archive students not updated for this many days")
+    dry_run: bool = Field(False, description="Only count the students that would be archived")
+
+class RestoreRequest(BaseModel):
+    student_ids: List[str] = Field(..., min_length=1, max_length=100000)
+
+def serialize_archived(student):
+    return {**serialize_student(student), "archived_at": student.get("archived_at")}
+
+@router.post("/run")
+@profile_threadpool
+def run_archive(policy: RetentionPolicy):
+    """Move students matching the retention policy to the archive in bulk"""
+    try:
+        query = retention_query(policy.graduated, policy.min_semester, policy.inactive_days)
+        return {"message": "Archive run completed", **archive_students(query, dry_run=policy.dry_run)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error archiving students: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/restore")
+@profile_threadpool
+def restore_archived(request: RestoreRequest):
+    """Move archived students back to the active tier"""
+    try:
+        return {"message": "Students restored", **restore_students(request.student_ids)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/students")
+def get_archived_students(
+    department: Optional[str] = Query(None, description="Filter by department"),
+    semester: Optional[int] = Query(None, description="Filter by semester"),
+    risk_level: Optional[str] = Query(None, description="Filter by risk level (low/medium/high)"),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """Historical query over archived students, most recently archived first"""
+    try:
+        query = build_student_query(department, semester, risk_level)
+        return [serialize_archived(student) for student in find_archived(query, limit)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/students/{student_id}")
+def get_archived_student(student_id: str):
+    """One archived student"""
+    student = find_archived_student(student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail=f"Archived student {student_id} not found")
+    return serialize_archived(student)
+
+@router.get("/stats")
+def get_tier_stats():
+    """Size of the active and archive tiers"""
+    try:
+        return tier_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
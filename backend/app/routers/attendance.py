@@ -0,0 +1,78 @@
+"""
+Attendance Router
+Handles batched daily attendance marks for whole classes
+"""
+
+import datetime
+from typing import List, Optional
+import traceback
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app.services.attendance import attendance_buffer
+
+router = APIRouter(prefix="/attendance", tags=["Attendance"])
+
+
+class ClassAttendance(BaseModel):
+    """Attendance marks for one class session"""
+
+    class_id: Optional[str] = Field(None, description="Class or section identifier")
+    date: Optional[datetime.date] = Field(None, description="Session date, used to order sessions")
+    present: List[str] = Field(default_factory=list, description="Student IDs marked present")
+    absent: List[str] = Field(default_factory=list, description="Student IDs marked absent")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "class_id": "CSE-3A",
+                "date": "2024-08-12",
+                "present": ["STU001", "STU002"],
+                "absent": ["STU003"],
+            }
+        }
+
+
+@router.post("/")
+async def ingest_attendance(sessions: List[ClassAttendance], flush: bool = True):
+    """
+    Ingest daily attendance marks for one or more class sessions.
+
+    Marks are coalesced per student in a buffer; with flush=false they are only
+    written once the buffer fills up or /attendance/flush is called.
+    """
+    try:
+        for session in sorted(sessions, key=lambda s: s.date or datetime.date.min):
+            attendance_buffer.add_marks(session.present, session.absent)
+
+        marks = sum(len(s.present) + len(s.absent) for s in sessions)
+
+        if flush or attendance_buffer.should_flush():
+            summary = attendance_buffer.flush()
+            return {"message": "Attendance recorded", "marks_received": marks, "flushed": True, **summary}
+
+        return {
+            "message": "Attendance buffered",
+            "marks_received": marks,
+            "flushed": False,
+            "pending_students": attendance_buffer.pending,
+        }
+
+    except Exception as e:
+        print(f"Error ingesting attendance: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Attendance error: {str(e)}")
+
+
+@router.post("/flush")
+async def flush_attendance():
+    """Write all buffered attendance marks to the database"""
+    try:
+        summary = attendance_buffer.flush()
+        return {"message": "Attendance buffer flushed", **summary}
+
+    except Exception as e:
+        print(f"Error flushing attendance: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from app.database import students_read_collection
+from app.services.counsellors import get_counsellor, list_counsellors, save_counsellor, refresh_caseload_counts
+from app.routers.students import serialize_student
+from app.profiling import profile_threadpool
+from typing import Optional
+import traceback
+
+router = APIRouter(prefix="/counsellors", tags=["Counsellors"])
+
+class CounsellorContact(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+@router.get("/")
+async def get_counsellors():
+    """List counsellors with their caseload risk counts"""
+    try:
+        return list_counsellors()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/{counsellor_id}")
+async def update_counsellor(counsellor_id: str, contact: CounsellorContact):
+    """Set the name and email that digest alerts are sent to"""
+    try:
+        fields = contact.model_dump(exclude_none=True)
+        if not fields:
+            raise HTTPException(status_code=400, detail="Provide a name and/or email")
+        return save_counsellor(counsellor_id, fields)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/refresh-counts")
+@profile_threadpool
+def refresh_counts():
+    """Recompute the caseload risk counts of every counsellor"""
+    try:
+        return {"message": "Caseload counts refreshed", "counsellors": refresh_caseload_counts()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{counsellor_id}/students")
+@profile_threadpool
+def get_caseload(
+    counsellor_id: str,
+    risk_level: Optional[str] = Query(None, description="Filter by risk level (low/medium/high)"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum students returned")
+):
+    """A counsellor's students, riskiest first, with precomputed risk counts"""
+    try:
+        counsellor = get_counsellor(counsellor_id)
+        
+        query = {"counsellor_id": counsellor_id}
+        if risk_level:
+            query["risk_level"] = risk_level.lower()
+        
+        # Served by the (counsellor_id, dropout_probability, student_id) index
+        students = list(
+            students_read_collection.find(query)
+            .sort([("dropout_probability", -1), ("student_id", 1)])
+            .limit(limit)
+        )
+        
+        if not counsellor and not students:
+            raise HTTPException(status_code=404, detail=f"Counsellor {counsellor_id} not found")
+        
+        counsellor = counsellor or {"counsellor_id": counsellor_id}
+        return {
+            "counsellor_id": counsellor_id,
+            "name": counsellor.get("name"),
+            "email": counsellor.get("email"),
+            "risk_counts": counsellor.get("risk_counts", {"low": 0, "medium": 0, "high": 0}),
+            "total_students": counsellor.get("total_students", 0),
+            "students": [serialize_student(student) for student in students]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching caseload: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,48 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.services.events import broadcaster, stats_publisher, format_event
+from app.config import EVENTS_HEARTBEAT_INTERVAL
+import asyncio
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.get("/stream")
+async def stream_events():
+    """
+    Server-Sent Events stream of dashboard stats ("stats"), new alerts ("alerts") and
+    long-running job progress ("progress"). The latest stats are sent on connect.
+    """
+    subscription = broadcaster.subscribe()
+    if stats_publisher.stats is None or stats_publisher.stale:
+        stats_publisher.request_refresh()
+
+    async def event_source():
+        try:
+            if stats_publisher.stats is not None:
+                yield format_event("stats", {"stats": stats_publisher.stats, "delta": {}})
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=EVENTS_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/status")
+async def get_event_status():
+    """Subscriber count and stats computation counters"""
+    return {
+        "subscribers": broadcaster.subscriber_count,
+        "events_published": broadcaster.published,
+        "stats_computations": stats_publisher.computations,
+        "stats": stats_publisher.stats
+    }
@@ -1,13 +1,21 @@
 """
 Prediction Router
-Handles single student prediction requests
+Handles single student, batch and what-if prediction requests
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import List
 
-from app.ml.predict import predict_dropout
+from app.ml.predict import predict_dropout, score_columns
+from app.services.columnar import (
+    COLUMNAR_MEDIA_TYPES, ColumnarValidationError, column_specs, read_columnar, validate_columns
+)
+from app.ml.whatif import whatif_grid
+from app.ml.registry import model_registry
+from app.profiling import profile_threadpool
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
@@ -68,6 +76,57 @@ async def predict_student_dropout(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 
+class FeatureSweep(BaseModel):
+    """One feature swept over a range"""
+
+    feature: str = Field(..., description="attendance, internal_marks, backlogs, study_hours or previous_failures")
+    start: float
+    stop: float
+    step: float = Field(..., gt=0)
+
+
+class WhatIfRequest(BaseModel):
+    """Request model for a what-if grid"""
+
+    student: PredictionRequest
+    sweeps: List[FeatureSweep] = Field(..., min_length=1, max_length=2)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "student": {
+                    "attendance": 65.5,
+                    "internal_marks": 55,
+                    "backlogs": 2,
+                    "study_hours": 3,
+                    "previous_failures": 1,
+                },
+                "sweeps": [
+                    {"feature": "attendance", "start": 40, "stop": 100, "step": 5},
+                    {"feature": "internal_marks", "start": 30, "stop": 90, "step": 10},
+                ],
+            }
+        }
+
+
+@router.post("/whatif")
+@profile_threadpool
+def predict_whatif(request: WhatIfRequest):
+    """
+    Sweep one or two features of a student and score the whole grid in one model call
+    """
+    try:
+        return whatif_grid(
+            request.student.model_dump(),
+            [sweep.model_dump() for sweep in request.sweeps],
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"What-if error: {str(e)}")
+
+
 @router.post("/batch")
 async def predict_batch(students: List[PredictionRequest]):
     """Predict dropout for multiple students at once"""
@@ -94,6 +153,52 @@ async def predict_batch(students: List[PredictionRequest]):
         raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
 
 
+# Column rules of the columnar batch format, identical to PredictionRequest's
+COLUMN_SPECS = column_specs(PredictionRequest)
+
+
+@router.post("/batch/columnar")
+async def predict_batch_columnar(request: Request):
+    """
+    Predict dropout for a column-oriented batch: a JSON object with one array per
+    feature, CSV (text/csv) or Arrow IPC (application/vnd.apache.arrow.stream).
+    Same fields, defaults and bounds as /predict/batch; results come back as one
+    array per output (no recommendations).
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body_format = COLUMNAR_MEDIA_TYPES.get(content_type)
+    if body_format is None:
+        allowed = ", ".join(COLUMNAR_MEDIA_TYPES)
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Type. Allowed: {allowed}")
+
+    body = await request.body()
+    try:
+        columns = await run_in_threadpool(_score_columnar, body, body_format)
+    except ColumnarValidationError as e:
+        return JSONResponse(status_code=422, content={"detail": e.errors})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+    return {"total": len(columns["dropout_probability"]), "columns": columns}
+
+
+@profile_threadpool
+def _score_columnar(body: bytes, body_format: str):
+    """Parse, validate and score a columnar batch (runs in the threadpool)"""
+    frame = validate_columns(read_columnar(body, body_format), COLUMN_SPECS)
+    return score_columns(frame)
+
+
+@router.get("/models")
+async def get_model_stats():
+    """
+    Primary and shadow model latency, plus how often the shadow agrees with the primary
+    """
+    return model_registry.summary()
+
+
 def generate_recommendations(student_data: dict, risk_level: str) -> List[str]:
     """Generate intervention recommendations based on student data"""
 
@@ -169,3 +274,4 @@ def generate_recommendations(student_data: dict, risk_level: str) -> List[str]:
         ]
 
     return recommendations or ["✅ No specific interventions required"]
+
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import FileResponse
+from app.profiling import list_profiles, load_profile, profile_path
+from app.config import PROFILING_TOKEN
+from typing import Optional
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"])
+
+def check_token(token: Optional[str]):
+    """Saved profiles reveal internals; readable only with the profiling token (never without one configured)"""
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="Reading profiles requires PROFILING_TOKEN to be configured")
+    if token != PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="Missing or invalid X-Profile-Token header")
+
+@router.get("/")
+def get_profiles(
+    limit: int = Query(100, ge=1, le=1000),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """Index of saved request profiles, newest first"""
+    check_token(x_profile_token)
+    return {"profiles": list_profiles(limit)}
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    limit: int = Query(40, ge=1, le=500),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """One profile: metadata, top functions and a pstats report"""
+    check_token(x_profile_token)
+    profile = load_profile(profile_id, sort, limit)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+@router.get("/{profile_id}/download")
+def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Raw .prof file, for snakeviz or python -m pstats"""
+    check_token(x_profile_token)
+    if load_profile(profile_id, limit=1) is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(profile_path(profile_id), filename=f"{profile_id}.prof", media_type="application/octet-stream")
@@ -1,71 +1,74 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse
-from app.database import students_collection
-from app.ml.predict import predict_dropout_probability, calculate_risk_level, identify_risk_factors
+from app.database import students_collection, students_read_collection
+from app.services.scoring import analyze_students
+from app.services.events import JobProgress
+from app.services.academics import refresh_academic_features, model_uses_academic_features
+from app.ml.risk_factors import RISK_FACTOR_FEATURES, student_risk_factors
 from app.ml.visualize import generate_tree_visualization, get_feature_importance
-from typing import Optional
+from app.ml.tree_export import export_tree_structure
+from app.profiling import profile_threadpool
+from typing import List, Optional
+import base64
+import json
 import traceback
 
 router = APIRouter(prefix="/risk", tags=["Risk Analysis"])
 
+# Fields returned by /risk/top
+TOP_RISK_FIELDS = [
+    "student_id", "name", "department", "semester", "counsellor_id",
+    "risk_level", "dropout_probability", "risk_factors", "attendance",
+]
+# Stored fields read to expand risk_factors, dropped from the response
+RISK_FACTOR_SOURCE_FIELDS = ["risk_flags"] + [name for name in RISK_FACTOR_FEATURES if name not in TOP_RISK_FIELDS]
+
+def encode_cursor(student):
+    """Opaque keyset cursor for the position after this student"""
+    key = [student["dropout_probability"], student["student_id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor):
+    probability, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(probability), str(student_id)
+
 @router.post("/analyze-all")
-async def analyze_all_students():
+@profile_threadpool
+def analyze_all_students():
     """Analyze risk for all students in the database"""
     try:
-        students = list(students_collection.find())
-        
-        if not students:
-            return {"message": "No students found in database", "analyzed": 0}
+        # Derived academic features are refreshed in Mongo first when the model reads them
+        if model_uses_academic_features():
+            refresh_academic_features()
         
-        analyzed_count = 0
+        with JobProgress("analyze", total=students_collection.estimated_document_count()) as progress:
+            summary = analyze_students(progress=progress)
+            progress.finish(**summary)
         
-        for student in students:
-            try:
-                # Prepare student data
-                student_data = {
-                    "attendance": student.get("attendance", 75),
-                    "internal_marks": student.get("internal_marks", 75),
-                    "backlogs": student.get("backlogs", 0),
-                    "study_hours": student.get("study_hours", 4),
-                    "previous_failures": student.get("previous_failures", 0)
-                }
-                
-                # Get ML prediction
-                ml_probability = predict_dropout_probability(student_data)
-                risk_level = calculate_risk_level(ml_probability, student_data)
-                risk_factors = identify_risk_factors(student_data)
-                
-                # Update student record
-                students_collection.update_one(
-                    {"_id": student["_id"]},
-                    {"$set": {
-                        "dropout_probability": ml_probability,
-                        "risk_level": risk_level,
-                        "risk_factors": risk_factors,
-                        "last_analysis": None  # You can add datetime here
-                    }}
-                )
-                
-                analyzed_count += 1
-                
-            except Exception as e:
-                print(f"Error analyzing student {student.get('student_id', 'unknown')}: {str(e)}")
-                continue
+        if not summary["total_students"]:
+            return {"message": "No students found in database", "analyzed": 0}
         
-        return {
-            "message": "Risk analysis completed",
-            "total_students": len(students),
-            "analyzed": analyzed_count,
-            "failed": len(students) - analyzed_count
-        }
+        return {"message": "Risk analysis completed", **summary}
     
     except Exception as e:
         print(f"Error in analyze_all_students: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/academic-features")
+@profile_threadpool
+def refresh_academic_feature_values():
+    """Derive subject-level academic features for all students in one aggregation ($merge back onto students)"""
+    try:
+        return {"message": "Academic features refreshed", **refresh_academic_features()}
+    except Exception as e:
+        print(f"Error refreshing academic features: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/visualize/tree")
-async def visualize_decision_tree(max_depth: Optional[int] = 4):
+@profile_threadpool
+def visualize_decision_tree(max_depth: Optional[int] = 4):
     """Generate decision tree visualization"""
     try:
         result = generate_tree_visualization(max_depth=max_depth)
@@ -78,6 +81,86 @@ async def visualize_decision_tree(max_depth: Optional[int] = 4):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/tree")
+async def export_decision_tree(
+    max_depth: Optional[int] = Query(None, ge=0, description="Cut trees below this depth"),
+    tree: List[int] = Query([0], description="Forest member(s) to export")
+):
+    """Export decision tree(s) as compact node arrays for client-side rendering"""
+    try:
+        result = export_tree_structure(max_depth=max_depth, tree_indices=tree)
+        
+        if "error" in result and result["error"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/top")
+@profile_threadpool
+def get_top_at_risk(
+    k: int = Query(20, ge=1, le=500, description="Number of students"),
+    department: Optional[str] = Query(None, description="Only this department"),
+    semester: Optional[int] = Query(None, description="Only this semester"),
+    counsellor_id: Optional[str] = Query(None, description="Only this counsellor's caseload"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
+):
+    """
+    Top K students by dropout probability, optionally scoped, with keyset paging.
+    
+    Served from the (scope, dropout_probability, student_id) indexes, so the cost
+    depends on K rather than on the number of students in scope.
+    """
+    try:
+        query = {}
+        if department:
+            query["department"] = department
+        if semester:
+            query["semester"] = semester
+        if counsellor_id:
+            query["counsellor_id"] = counsellor_id
+        
+        if cursor:
+            try:
+                probability, student_id = decode_cursor(cursor)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # Strictly after the last student of the previous page in (probability desc, student_id asc) order
+            query["$or"] = [
+                {"dropout_probability": {"$lt": probability}},
+                {"dropout_probability": probability, "student_id": {"$gt": student_id}},
+            ]
+        else:
+            # Skips unscored students and keeps the scan inside the index bounds
+            query["dropout_probability"] = {"$gte": 0}
+        
+        projection = {"_id": 0, **{field: 1 for field in TOP_RISK_FIELDS + RISK_FACTOR_SOURCE_FIELDS}}
+        students = list(
+            students_read_collection.find(query, projection)
+            .sort([("dropout_probability", -1), ("student_id", 1)])
+            .limit(k)
+        )
+        for student in students:
+            student["risk_factors"] = student_risk_factors(student)
+            for field in RISK_FACTOR_SOURCE_FIELDS:
+                student.pop(field, None)
+        
+        return {
+            "students": students,
+            "count": len(students),
+            "next_cursor": encode_cursor(students[-1]) if len(students) == k else None
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching top at-risk students: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/feature-importance")
 async def feature_importance():
     """Get feature importance from the ML model"""
@@ -96,10 +179,10 @@ async def feature_importance():
 async def get_risk_statistics():
     """Get overall risk statistics"""
     try:
-        total = students_collection.count_documents({})
-        high_risk = students_collection.count_documents({"risk_level": "high"})
-        medium_risk = students_collection.count_documents({"risk_level": "medium"})
-        low_risk = students_collection.count_documents({"risk_level": "low"})
+        total = students_read_collection.count_documents({})
+        high_risk = students_read_collection.count_documents({"risk_level": "high"})
+        medium_risk = students_read_collection.count_documents({"risk_level": "medium"})
+        low_risk = students_read_collection.count_documents({"risk_level": "low"})
         
         # Calculate average dropout probability
         pipeline = [
@@ -109,7 +192,7 @@ async def get_risk_statistics():
             }}
         ]
         
-        result = list(students_collection.aggregate(pipeline))
+        result = list(students_read_collection.aggregate(pipeline))
         avg_probability = result[0]["avg_probability"] if result else 0.0
         
         return {
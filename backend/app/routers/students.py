@@ -1,20 +1,33 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.database import students_collection
-from app.ml.predict import predict_dropout_probability, calculate_risk_level, identify_risk_factors
+from fastapi.responses import StreamingResponse
+from app.database import students_collection, students_read_collection
+from app.ml.predict import score_students, contributions_by_feature, FEATURE_DEFAULTS
+from app.ml.load_model import load_feature_order, get_model_version
+from app.services.scoring import write_scores
+from app.services.export import export_students, EXPORT_MEDIA_TYPES
+from app.services.search import student_search, SEARCH_FIELDS
+from app.services.archive import find_archived_student
+from app.services.events import stats_publisher
+from app.ml.risk_factors import student_risk_factors, risk_factor_codes, risk_factor_mask
+from app.profiling import profile_threadpool
 from bson import ObjectId
-from typing import Optional
+from datetime import datetime, timezone
+import pandas as pd
+import re
+from typing import List, Optional
 import traceback
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
-def serialize_student(student):
-    """Serialize MongoDB document to JSON-compatible dict"""
+def serialize_student(student, lang=None):
+    """Serialize MongoDB document to JSON-compatible dict (risk factors expanded to text in lang)"""
     return {
         "id": str(student["_id"]),
         "student_id": student.get("student_id", ""),
         "name": student.get("name", ""),
         "email": student.get("email", ""),
         "department": student.get("department", ""),
+        "counsellor_id": student.get("counsellor_id", ""),
         "semester": student.get("semester", 1),
         "gpa": student.get("gpa", 0.0),
         "attendance": student.get("attendance", 0),
@@ -24,71 +37,126 @@ def serialize_student(student):
         "previous_failures": student.get("previous_failures", 0),
         "risk_level": student.get("risk_level", "low"),
         "dropout_probability": student.get("dropout_probability", 0.0),
-        "risk_factors": student.get("risk_factors", []),
+        "risk_factors": student_risk_factors(student, lang),
+        "risk_factor_codes": risk_factor_codes(student.get("risk_flags") or 0),
     }
 
+def build_student_query(department=None, semester=None, risk_level=None,
+                        min_probability=None, max_probability=None, risk_factors=None):
+    """Build a students_collection query from the list filters"""
+    query = {}
+    if risk_factors:
+        # Students having all of the given factor codes
+        query["risk_flags"] = {"$bitsAllSet": risk_factor_mask(risk_factors)}
+    if department:
+        query["department"] = department
+    if semester:
+        query["semester"] = semester
+    if risk_level:
+        query["risk_level"] = risk_level.lower()
+    if min_probability is not None or max_probability is not None:
+        query["dropout_probability"] = {}
+        if min_probability is not None:
+            query["dropout_probability"]["$gte"] = min_probability
+        if max_probability is not None:
+            query["dropout_probability"]["$lte"] = max_probability
+    return query
+
 @router.get("/")
 async def get_students(
     department: Optional[str] = Query(None, description="Filter by department"),
     semester: Optional[int] = Query(None, description="Filter by semester"),
-    risk_level: Optional[str] = Query(None, description="Filter by risk level (low/medium/high)")
+    risk_level: Optional[str] = Query(None, description="Filter by risk level (low/medium/high)"),
+    risk_factor: Optional[List[str]] = Query(None, description="Only students with all these risk factor codes"),
+    lang: Optional[str] = Query(None, description="Language of risk factor text (default en)")
 ):
     """Get all students with optional filters"""
     try:
-        # Build query
-        query = {}
-        if department:
-            query["department"] = department
-        if semester:
-            query["semester"] = semester
-        if risk_level:
-            query["risk_level"] = risk_level.lower()
+        try:
+            query = build_student_query(department, semester, risk_level, risk_factors=risk_factor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        students = list(students_collection.find(query).limit(500))
+        students = list(students_read_collection.find(query).limit(500))
         
         if not students:
             return []
         
-        return [serialize_student(student) for student in students]
+        return [serialize_student(student, lang) for student in students]
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching students: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@router.get("/export")
+async def export_students_data(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$", description="csv, ndjson or parquet"),
+    department: Optional[str] = Query(None, description="Filter by department"),
+    semester: Optional[int] = Query(None, description="Filter by semester"),
+    risk_level: Optional[str] = Query(None, description="Filter by risk level (low/medium/high)"),
+    min_probability: Optional[float] = Query(None, ge=0, le=1, description="Minimum dropout probability"),
+    max_probability: Optional[float] = Query(None, ge=0, le=1, description="Maximum dropout probability"),
+    risk_factor: Optional[List[str]] = Query(None, description="Only students with all these risk factor codes")
+):
+    """Stream all matching students and their risk results without building the result in memory"""
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow (pip install pyarrow)")
+    
+    try:
+        query = build_student_query(department, semester, risk_level, min_probability, max_probability,
+                                    risk_factors=risk_factor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        export_students(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="students.{format}"'}
+    )
+
+@router.get("/search")
+@profile_threadpool
+def search_students(
+    q: str = Query(..., min_length=1, max_length=100, description="Name or student ID, full or partial"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum results")
+):
+    """Typeahead search on name and student_id (prefix, then fuzzy matches)"""
+    try:
+        if student_search.ready:
+            return {"query": q, "results": student_search.search(q, limit)}
+        
+        # Index still building: anchored, case-insensitive prefix match in Mongo
+        pattern = {"$regex": f"^{re.escape(q.strip())}", "$options": "i"}
+        projection = {"_id": 0, **{field: 1 for field in SEARCH_FIELDS}}
+        students = students_read_collection.find(
+            {"$or": [{"student_id": pattern}, {"name": pattern}]}, projection
+        ).limit(limit)
+        return {"query": q, "results": list(students)}
+    
+    except Exception as e:
+        print(f"Error searching students: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/dashboard-stats")
 async def get_dashboard_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics (shared with the /events/stream push; recomputed only after writes or when old)"""
     try:
-        total = students_collection.count_documents({})
-        high_risk = students_collection.count_documents({"risk_level": "high"})
-        medium_risk = students_collection.count_documents({"risk_level": "medium"})
-        low_risk = students_collection.count_documents({"risk_level": "low"})
-        
-        # Calculate average dropout probability
-        pipeline = [
-            {"$group": {
-                "_id": None,
-                "avg_probability": {"$avg": "$dropout_probability"}
-            }}
-        ]
-        
-        result = list(students_collection.aggregate(pipeline))
-        avg_probability = result[0]["avg_probability"] if result else 0.0
-        
-        return {
-            "total_students": total,
-            "high_risk_count": high_risk,
-            "medium_risk_count": medium_risk,
-            "low_risk_count": low_risk,
-            "avg_dropout_probability": round(avg_probability, 4) if avg_probability else 0.0
-        }
+        return stats_publisher.current()
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{student_id}")
-async def get_student_detail(student_id: str):
+async def get_student_detail(
+    student_id: str,
+    include_archived: bool = Query(False, description="Also look in the archive of past cohorts"),
+    lang: Optional[str] = Query(None, description="Language of risk factor text (default en)")
+):
     """Get detailed information for a specific student"""
     try:
         # Try to find by student_id field first
@@ -101,11 +169,15 @@ async def get_student_detail(student_id: str):
             except:
                 pass
         
+        # Historical lookups may reach the archive tier
+        if not student and include_archived:
+            student = find_archived_student(student_id)
+        
         if not student:
             raise HTTPException(status_code=404, detail=f"Student {student_id} not found")
         
         # Serialize basic info
-        student_data = serialize_student(student)
+        student_data = serialize_student(student, lang)
         
         # Add additional details
         student_data.update({
@@ -114,6 +186,9 @@ async def get_student_detail(student_id: str):
             "academics": student.get("academics", []),
             "interventions": student.get("interventions", []),
             "last_analysis": student.get("last_analysis"),
+            "archived": student.get("archived_at") is not None,
+            "model_version": student.get("model_version"),
+            "feature_contributions": contributions_by_feature(student.get("feature_contributions")),
         })
         
         # Generate trends if data available
@@ -145,36 +220,32 @@ async def analyze_student(student_id: str):
         if not student:
             raise HTTPException(status_code=404, detail=f"Student {student_id} not found")
         
-        # Prepare data for prediction
-        student_data = {
-            "attendance": student.get("attendance", 75),
-            "internal_marks": student.get("internal_marks", 75),
-            "backlogs": student.get("backlogs", 0),
-            "study_hours": student.get("study_hours", 4),
-            "previous_failures": student.get("previous_failures", 0)
-        }
+        # Score with the model's feature order, the same way analyze-all does
+        feature_names = set(FEATURE_DEFAULTS) | set(load_feature_order())
+        frame = pd.DataFrame([{name: student.get(name) for name in feature_names}])
+        score = score_students(frame, source="analyze").iloc[0].to_dict()
+        model_version = get_model_version()
         
-        # Get prediction
-        probability = predict_dropout_probability(student_data)
-        risk_level = calculate_risk_level(probability, student_data)
-        risk_factors = identify_risk_factors(student_data)
-        
-        # Update student record
-        students_collection.update_one(
-            {"_id": student["_id"]},
-            {"$set": {
-                "dropout_probability": probability,
-                "risk_level": risk_level,
-                "risk_factors": risk_factors
-            }}
-        )
+        # Update student record (contributions and version replace any from an earlier batch run)
+        write_scores([{
+            "filter": {"_id": student["_id"]},
+            "set": {
+                **score,
+                "model_version": model_version,
+                "last_analysis": datetime.now(timezone.utc)
+            },
+            "previous_risk_level": student.get("risk_level"),
+            "student": student
+        }], bulk=False)
         
         return {
             "student_id": student.get("student_id"),
             "name": student.get("name"),
-            "dropout_probability": probability,
-            "risk_level": risk_level,
-            "risk_factors": risk_factors
+            "dropout_probability": score["dropout_probability"],
+            "risk_level": score["risk_level"],
+            "risk_factors": student_risk_factors({**student, **score}),
+            "model_version": model_version,
+            "feature_contributions": contributions_by_feature(score["feature_contributions"])
         }
     
     except HTTPException:
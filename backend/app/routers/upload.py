@@ -1,81 +1,117 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.services.preprocessing import process_csv
-from app.database import students_collection
-from app.ml.predict import predict_dropout_probability, calculate_risk_level, identify_risk_factors
+from app.services.preprocessing import process_upload, upload_format, row_hashes, UPLOAD_FORMATS
+from app.services.scoring import write_scores, fetch_by_student_id, refresh_caseloads
+from app.ml.predict import score_students
+from app.ml.load_model import get_model_version
+from app.services.events import JobProgress
+from app.profiling import profile_threadpool
 import traceback
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
+# Number of student upserts sent per bulk write
+WRITE_BATCH_SIZE = 1000
+
 @router.post("/")
-async def upload_data(file: UploadFile = File(...)):
-    """Upload and process student data CSV file"""
+@profile_threadpool
+def upload_data(file: UploadFile = File(...), force: bool = False):
+    """
+    Upload and process a student data file (CSV, Parquet or Arrow IPC).
+    
+    Rows whose content is unchanged since the last upload are skipped;
+    pass force=true to re-score and rewrite every existing student.
+    """
     try:
         # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+        if upload_format(file.filename) is None:
+            allowed = ", ".join(sorted(UPLOAD_FORMATS))
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {allowed}")
         
-        # Process CSV
-        df = process_csv(file.file)
+        # Parse the file against the upload schema
+        try:
+            df = process_upload(file.file, file.filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file is empty")
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        
+        # Ensure required fields
+        if "student_id" not in df.columns:
+            return {
+                "message": "No student_id column found",
+                "rows_processed": 0,
+                "rows_analyzed": 0,
+                "total_rows": len(df),
+                "inserted": 0,
+                "changed": 0,
+                "skipped": 0
+            }
+        
+        # Replace NaN with 0; the last row wins for repeated student ids
+        df = df.fillna(0).drop_duplicates(subset="student_id", keep="last")
+        df["content_hash"] = row_hashes(df)
+        
+        # Compare content hashes with the stored documents, fetched in bulk
+        existing = fetch_by_student_id(df["student_id"].tolist(), ["content_hash", "risk_level", "counsellor_id"])
+        stored_hashes = df["student_id"].map(lambda sid: existing.get(sid, {}).get("content_hash"))
+        is_new = ~df["student_id"].isin(existing.keys())
+        is_changed = ~is_new & (stored_hashes != df["content_hash"])
+        if force:
+            is_changed = ~is_new
+        
+        # Only new or changed rows are scored and written
+        pending = df[is_new | is_changed]
+        records = pending.to_dict("records")
         
-        rows_processed = 0
-        rows_analyzed = 0
+        # Predict risk for all rows in one vectorized pass
+        if records and all(k in pending.columns for k in ["attendance", "internal_marks"]):
+            scores = score_students(pending, source="upload")
+            model_version = get_model_version()
+            for record, score in zip(records, scores.to_dict("records")):
+                record.update(score)
+                record["model_version"] = model_version
+            rows_analyzed = len(records)
+        else:
+            # Set default values if features missing
+            for record in records:
+                record["dropout_probability"] = 0.0
+                record["risk_level"] = "low"
+                record["risk_flags"] = 0
+            rows_analyzed = 0
         
-        for _, row in df.iterrows():
+        # Upsert student records in bulk, alerting on risk tier increases
+        alerts_created = 0
+        caseloads = set()
+        with JobProgress("upload", total=len(records)) as progress:
             try:
-                # Convert row to dict and handle NaN values
-                student_data = row.to_dict()
-                student_data = {k: (v if v == v else 0) for k, v in student_data.items()}  # Replace NaN with 0
-                
-                # Ensure required fields
-                if "student_id" not in student_data:
-                    continue
-                
-                # Predict risk if features are available
-                if all(k in student_data for k in ["attendance", "internal_marks"]):
-                    prediction_data = {
-                        "attendance": float(student_data.get("attendance", 75)),
-                        "internal_marks": float(student_data.get("internal_marks", 75)),
-                        "backlogs": int(student_data.get("backlogs", 0)),
-                        "study_hours": float(student_data.get("study_hours", 4)),
-                        "previous_failures": int(student_data.get("previous_failures", 0))
-                    }
-                    
-                    # Get ML prediction
-                    probability = predict_dropout_probability(prediction_data)
-                    risk_level = calculate_risk_level(probability, prediction_data)
-                    risk_factors = identify_risk_factors(prediction_data)
-                    
-                    student_data["dropout_probability"] = probability
-                    student_data["risk_level"] = risk_level
-                    student_data["risk_factors"] = risk_factors
-                    rows_analyzed += 1
-                else:
-                    # Set default values if features missing
-                    student_data["dropout_probability"] = 0.0
-                    student_data["risk_level"] = "low"
-                    student_data["risk_factors"] = []
-                
-                # Upsert student record
-                students_collection.update_one(
-                    {"student_id": student_data["student_id"]},
-                    {"$set": student_data},
-                    upsert=True
-                )
-                
-                rows_processed += 1
-                
-            except Exception as e:
-                print(f"Error processing row: {str(e)}")
-                continue
+                for start in range(0, len(records), WRITE_BATCH_SIZE):
+                    updates = [
+                        {
+                            "filter": {"student_id": record["student_id"]},
+                            "set": record,
+                            "previous_risk_level": existing.get(record["student_id"], {}).get("risk_level"),
+                            "previous_counsellor_id": existing.get(record["student_id"], {}).get("counsellor_id"),
+                            "upsert": True
+                        }
+                        for record in records[start:start + WRITE_BATCH_SIZE]
+                    ]
+                    alerts_created += write_scores(updates, caseloads)["alerts_created"]
+                    progress.advance(len(updates))
+            finally:
+                # Partial uploads still leave consistent caseload counts
+                refresh_caseloads(caseloads)
+            progress.finish(rows_processed=len(records), alerts_created=alerts_created)
         
         return {
             "message": "Data uploaded successfully",
-            "rows_processed": rows_processed,
+            "rows_processed": len(records),
             "rows_analyzed": rows_analyzed,
-            "total_rows": len(df)
+            "total_rows": len(df),
+            "inserted": int(is_new.sum()),
+            "changed": int(is_changed.sum()),
+            "skipped": int(len(df) - len(records)),
+            "alerts_created": alerts_created
         }
     
     except HTTPException:
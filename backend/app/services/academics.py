@@ -0,0 +1,96 @@
+"""
+Academic Features
+Derives per-student academic model features from the nested academics array
+(subject, scores, attempts_used) in one aggregation pass inside MongoDB
+
+The results are written back onto the student documents with $merge, so
+neither the derivation nor scoring ever ships the nested arrays to Python.
+$merge into the aggregated collection needs MongoDB 4.4+.
+"""
+import time
+from typing import Dict, Any, List, Optional
+from app.database import students_collection
+from app.ml.load_model import load_feature_order
+from app.ml.predict import ACADEMIC_FEATURES
+
+# ACADEMIC_FEATURES, in order:
+#   mean of every subject score, lowest subject score,
+#   mean per-subject least-squares slope of score per attempt,
+#   sum of attempts_used, subjects with attempts_used >= 2
+
+def academic_features_pipeline(query: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Aggregation computing ACADEMIC_FEATURES for students with academics and merging them back"""
+    match = {"academics.0": {"$exists": True}}
+    if query:
+        match = {"$and": [query, match]}
+
+    # Per subject: score count, sum, min, sum of attempt index x score, attempts
+    subject_sums = {"$map": {"input": "$academics", "as": "subject", "in": {"$let": {
+        "vars": {"scores": {"$ifNull": ["$$subject.scores", []]}},
+        "in": {
+            "n": {"$size": "$$scores"},
+            "sum": {"$sum": "$$scores"},
+            "min": {"$min": "$$scores"},
+            "sum_iy": {"$reduce": {
+                "input": {"$range": [0, {"$size": "$$scores"}]},
+                "initialValue": 0,
+                "in": {"$add": ["$$value", {"$multiply": ["$$this", {"$arrayElemAt": ["$$scores", "$$this"]}]}]}
+            }},
+            "attempts": {"$ifNull": ["$$subject.attempts_used", 0]},
+        }
+    }}}}
+
+    # Least-squares slope over attempt index i = 0..n-1:
+    # (n * sum(i*y) - sum(i) * sum(y)) / (n * sum(i^2) - sum(i)^2), with
+    # sum(i) = n(n-1)/2 and n * sum(i^2) - sum(i)^2 = n^2 (n^2 - 1) / 12
+    subject_slopes = {"$map": {"input": "$_subjects", "as": "s", "in": {"$cond": [
+        {"$gte": ["$$s.n", 2]},
+        {"$divide": [
+            {"$subtract": [
+                {"$multiply": ["$$s.n", "$$s.sum_iy"]},
+                {"$multiply": [{"$divide": [{"$multiply": ["$$s.n", {"$subtract": ["$$s.n", 1]}]}, 2]}, "$$s.sum"]}
+            ]},
+            {"$divide": [{"$multiply": ["$$s.n", "$$s.n", {"$subtract": [{"$multiply": ["$$s.n", "$$s.n"]}, 1]}]}, 12]}
+        ]},
+        None
+    ]}}}
+
+    return [
+        {"$match": match},
+        {"$project": {"_subjects": subject_sums}},
+        {"$project": {
+            "_score_count": {"$sum": "$_subjects.n"},
+            "_score_sum": {"$sum": "$_subjects.sum"},
+            "academic_min_score": {"$min": "$_subjects.min"},
+            "academic_score_slope": {"$ifNull": [{"$avg": subject_slopes}, 0]},
+            "academic_total_attempts": {"$sum": "$_subjects.attempts"},
+            "academic_repeat_subjects": {"$size": {"$filter": {
+                "input": "$_subjects", "cond": {"$gte": ["$$this.attempts", 2]}
+            }}},
+        }},
+        {"$project": {
+            "academic_mean_score": {"$cond": [
+                {"$gt": ["$_score_count", 0]}, {"$divide": ["$_score_sum", "$_score_count"]}, None
+            ]},
+            "academic_min_score": 1,
+            "academic_score_slope": {"$round": ["$academic_score_slope", 4]},
+            "academic_total_attempts": 1,
+            "academic_repeat_subjects": 1,
+            "academic_features_at": "$$NOW",
+        }},
+        {"$merge": {
+            "into": students_collection.name,
+            "on": "_id",
+            "whenMatched": "merge",
+            "whenNotMatched": "discard",
+        }},
+    ]
+
+def model_uses_academic_features() -> bool:
+    return any(name in ACADEMIC_FEATURES for name in load_feature_order())
+
+def refresh_academic_features(query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Recompute and store academic features for every (matching) student with academics"""
+    started = time.perf_counter()
+    students_collection.aggregate(academic_features_pipeline(query), allowDiskUse=True)
+    return {"features": ACADEMIC_FEATURES, "seconds": round(time.perf_counter() - started, 3)}
@@ -0,0 +1,147 @@
+"""
+Alert Feed Service
+Stores alert records in alerts_collection when a student's risk tier goes up
+
+Each alert gets a monotonically increasing seq, so the feed can be polled with a
+since cursor: a poll with nothing new is an indexed range read returning nothing.
+
+Seq ranges are reserved before the insert, so concurrent writers can commit them out
+of order. Open reservations are kept on the counter document and the feed is only
+served up to the first of them (the high-water mark), so a poller never moves its
+cursor past an alert that is still being inserted.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from pymongo.errors import DuplicateKeyError
+from app.database import alerts_collection, counters_collection
+from app.config import ALERT_FEED_PENDING_TIMEOUT
+from app.services.events import broadcaster
+from app.ml.risk_factors import triggering_values
+
+# counters_collection sequence for alert seq values
+ALERT_SEQUENCE = "alerts"
+
+# Fields returned by the feed
+FEED_PROJECTION = {"_id": 0, "sent_at": 0}
+
+RISK_TIERS = {"low": 0, "medium": 1, "high": 2}
+
+def is_escalation(previous_risk_level: Optional[str], risk_level: Optional[str]) -> bool:
+    """Check whether a student moved into a higher risk tier (new students count as coming from low)"""
+    previous_tier = RISK_TIERS.get(str(previous_risk_level).lower(), 0)
+    return RISK_TIERS.get(str(risk_level).lower(), 0) > previous_tier
+
+def build_alert(student: Dict[str, Any], previous_risk_level: Optional[str]) -> Dict[str, Any]:
+    """Build an unsent alert record for a risk tier transition"""
+    flags = student.get("risk_flags")
+    if flags is not None:
+        flags = int(flags)
+        factors = {"risk_flags": flags, "risk_factor_values": triggering_values(flags, student)}
+    else:
+        factors = {"risk_factors": student.get("risk_factors", [])}
+    return {
+        "student_id": student.get("student_id"),
+        "name": student.get("name"),
+        "department": student.get("department"),
+        "counsellor_id": _counsellor_id(student.get("counsellor_id")),
+        "previous_risk_level": previous_risk_level if isinstance(previous_risk_level, str) else None,
+        "risk_level": student.get("risk_level"),
+        "dropout_probability": student.get("dropout_probability", 0.0),
+        **factors,
+        "attendance": student.get("attendance", 0),
+        "created_at": datetime.now(timezone.utc),
+        "sent": False,
+        "sent_at": None,
+    }
+
+def _counsellor_id(value) -> Optional[str]:
+    """Counsellor id as stored on alerts (None for missing, empty or NaN values)"""
+    return value if isinstance(value, str) and value else None
+
+def reserve_sequence(name: str, count: int) -> int:
+    """
+    Atomically reserve count consecutive values of a named sequence; returns the first.
+    The range stays open (holding back the high-water mark) until release_sequence.
+    """
+    while True:
+        counter = counters_collection.find_one({"_id": name})
+        if counter is None:
+            try:
+                counters_collection.insert_one({"_id": name, "value": 0, "pending": []})
+            except DuplicateKeyError:
+                pass
+            continue
+        value = counter.get("value", 0)
+        # Compare-and-set on value, so the reservation and its pending entry land together
+        result = counters_collection.update_one(
+            {"_id": name, "value": value},
+            {
+                "$set": {"value": value + count},
+                "$push": {"pending": {"first": value + 1, "at": datetime.now(timezone.utc)}},
+            }
+        )
+        if result.matched_count:
+            return value + 1
+
+def release_sequence(name: str, first: int):
+    """Close a reservation once its values are written (or will never be)"""
+    counters_collection.update_one({"_id": name}, {"$pull": {"pending": {"first": first}}})
+
+def high_water_mark(name: str) -> int:
+    """Highest value below which every reserved value has been written"""
+    counter = counters_collection.find_one({"_id": name})
+    if counter is None:
+        return 0
+    # Reservations of a writer that died before releasing them stop holding the feed back
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ALERT_FEED_PENDING_TIMEOUT)
+    open_firsts = [
+        entry["first"] for entry in counter.get("pending", [])
+        if _aware(entry["at"]) >= cutoff
+    ]
+    return min(open_firsts) - 1 if open_firsts else counter.get("value", 0)
+
+def _aware(value: datetime) -> datetime:
+    """Mongo returns naive UTC datetimes unless the client is tz_aware"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def append_alerts(alerts: List[Dict[str, Any]]) -> int:
+    """Number alerts with the next feed seq values and append them in one bulk insert"""
+    if not alerts:
+        return 0
+    first = reserve_sequence(ALERT_SEQUENCE, len(alerts))
+    try:
+        for offset, alert in enumerate(alerts):
+            alert["seq"] = first + offset
+        # Acknowledged even under a relaxed bulk write concern: releasing must mean written
+        alerts_collection.insert_many(alerts, ordered=False)
+    finally:
+        release_sequence(ALERT_SEQUENCE, first)
+    broadcaster.publish("alerts", {"created": len(alerts), "next_since": alerts[-1]["seq"]})
+    return len(alerts)
+
+def alerts_since(since: int = 0, limit: int = 100, risk_level: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Alerts with seq > since, in seq order, up to the high-water mark. Alerts written
+    before feed ids existed have no seq and are not part of the feed.
+    """
+    query = {"seq": {"$gt": since, "$lte": high_water_mark(ALERT_SEQUENCE)}}
+    if risk_level:
+        query["risk_level"] = risk_level.lower()
+    return list(alerts_collection.find(query, FEED_PROJECTION).sort("seq", 1).limit(limit))
+
+def pending_alerts(risk_level: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Get unsent alerts, oldest first"""
+    query = {"sent": False}
+    if risk_level:
+        query["risk_level"] = risk_level.lower()
+    return list(alerts_collection.find(query).sort("created_at", 1).limit(limit))
+
+def mark_sent(alert_ids: List[Any]) -> int:
+    """Mark alerts as sent so they are not delivered again"""
+    if not alert_ids:
+        return 0
+    result = alerts_collection.update_many(
+        {"_id": {"$in": alert_ids}},
+        {"$set": {"sent": True, "sent_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count
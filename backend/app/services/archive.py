@@ -0,0 +1,128 @@
+"""
+Archive Service
+Moves students that match a retention policy from students_collection (active
+tier) to students_archive_collection, in bulk, and back again
+
+Hot-path endpoints only ever query the active tier; the archive is reached through
+explicit historical queries (/archive/..., /students/{id}?include_archived=true).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from pymongo import ReplaceOne
+from app.config import ARCHIVE_BATCH_SIZE
+from app.database import students_collection, students_archive_collection
+from app.services.counsellors import refresh_caseload_counts
+from app.services.search import student_search
+from app.services.events import stats_publisher, JobProgress
+
+def retention_query(graduated: bool = False, min_semester: Optional[int] = None,
+                    inactive_days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Query for students to archive: any of
+      - graduated: documents with graduated == true
+      - min_semester: semester >= min_semester
+      - inactive_days: not written (updated_at) for that many days; documents
+        without updated_at predate the field and are never archived by this rule
+    """
+    criteria = []
+    if graduated:
+        criteria.append({"graduated": True})
+    if min_semester is not None:
+        criteria.append({"semester": {"$gte": min_semester}})
+    if inactive_days is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+        criteria.append({"updated_at": {"$lt": cutoff}})
+    if not criteria:
+        raise ValueError("Retention policy is empty: set graduated, min_semester or inactive_days")
+    return criteria[0] if len(criteria) == 1 else {"$or": criteria}
+
+def archive_students(query: Dict[str, Any], dry_run: bool = False,
+                     batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, Any]:
+    """Move every active student matching query to the archive"""
+    matched = students_collection.count_documents(query)
+    if dry_run:
+        return {"matched": matched, "archived": 0, "dry_run": True}
+
+    with JobProgress("archive", total=matched) as progress:
+        moved = _move(students_collection, students_archive_collection, query, batch_size,
+                      archived_at=datetime.now(timezone.utc), progress=progress)
+        progress.finish(archived=moved["moved"])
+    return {"matched": matched, "archived": moved["moved"], "dry_run": False}
+
+def restore_students(student_ids: List[str], batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Move archived students back to the active tier, with updated_at set to the time
+    of the restore so an inactive_days policy does not archive them again straight
+    away. Students re-uploaded since they were archived already have an active
+    document; their archived copy is left in the archive rather than creating a
+    second active student.
+    """
+    active = {
+        doc["student_id"]
+        for doc in students_collection.find({"student_id": {"$in": student_ids}}, {"_id": 0, "student_id": 1})
+    }
+    restorable = [student_id for student_id in student_ids if student_id not in active]
+    with JobProgress("restore", total=len(restorable)) as progress:
+        moved = _move(students_archive_collection, students_collection,
+                      {"student_id": {"$in": restorable}}, batch_size, archived_at=None, progress=progress)
+        progress.finish(restored=moved["moved"], already_active=len(active))
+    return {"requested": len(student_ids), "restored": moved["moved"], "already_active": sorted(active)}
+
+def _move(source, target, query: Dict[str, Any], batch_size: int,
+          archived_at: Optional[datetime], progress: Optional[JobProgress] = None) -> Dict[str, int]:
+    """
+    Copy matching documents to target, then delete them from source, one batch at a
+    time. Copies are upserts on _id, so a run interrupted between the two steps can
+    simply be repeated. Restored documents (archived_at None) get a fresh updated_at.
+    """
+    restored_at = datetime.now(timezone.utc)
+    moved = 0
+    counsellor_ids = set()
+    while True:
+        batch = list(source.find(query).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            if archived_at is None:
+                doc.pop("archived_at", None)
+                doc["updated_at"] = restored_at
+            else:
+                doc["archived_at"] = archived_at
+            operations.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+            counsellor_ids.add(doc.get("counsellor_id"))
+        target.bulk_write(operations, ordered=False)
+        source.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        moved += len(batch)
+        if progress:
+            progress.advance(len(batch))
+
+    if moved:
+        refresh_caseload_counts(counsellor_ids)
+        student_search.request_rebuild()
+        stats_publisher.request_refresh()
+    return {"moved": moved}
+
+def find_archived(query: Dict[str, Any], limit: int = 500) -> List[Dict[str, Any]]:
+    return list(students_archive_collection.find(query).sort("archived_at", -1).limit(limit))
+
+def find_archived_student(student_id: str) -> Optional[Dict[str, Any]]:
+    return students_archive_collection.find_one({"student_id": student_id})
+
+def tier_stats() -> Dict[str, Any]:
+    """Document counts and, where the server reports them, data and index sizes per tier"""
+    stats = {}
+    for tier, collection in (("active", students_collection), ("archive", students_archive_collection)):
+        tier_stats = {"documents": collection.estimated_document_count()}
+        try:
+            coll_stats = collection.database.command("collStats", collection.name)
+            tier_stats.update({
+                "data_size_bytes": coll_stats.get("size"),
+                "storage_size_bytes": coll_stats.get("storageSize"),
+                "index_size_bytes": coll_stats.get("totalIndexSize"),
+            })
+        except Exception:
+            pass
+        stats[tier] = tier_stats
+    return stats
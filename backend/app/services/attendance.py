@@ -0,0 +1,172 @@
+"""
+Attendance Ingestion Service
+Buffers daily attendance marks and applies them to student records incrementally
+"""
+import threading
+from typing import Dict, Any, Iterable, List, Set
+import numpy as np
+import pandas as pd
+from pymongo.errors import BulkWriteError
+from app.database import students_collection
+from app.services.scoring import write_scores, refresh_caseloads
+from app.config import ATTENDANCE_FLUSH_SIZE, ATTENDANCE_PRIOR_SESSIONS
+from app.ml.load_model import load_feature_order, get_model_version
+from app.ml.predict import score_students, attendance_band, numeric_column
+from app.ml.risk_factors import RISK_FACTOR_FEATURES
+
+# Number of student ids sent per $in lookup
+LOOKUP_CHUNK_SIZE = 5000
+
+class AttendanceBuffer:
+    """Coalesces attendance marks per student and flushes them as one bulk write"""
+
+    def __init__(self, max_pending: int = ATTENDANCE_FLUSH_SIZE):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # student_id -> [sessions_held, sessions_attended, trailing_absences, attended_any]
+        self._pending: Dict[str, List[int]] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add_marks(self, present: Iterable[str], absent: Iterable[str]):
+        """Add one session worth of marks; sessions must be added in date order"""
+        with self._lock:
+            for student_id in present:
+                entry = self._pending.setdefault(student_id, [0, 0, 0, 0])
+                entry[0] += 1
+                entry[1] += 1
+                entry[2] = 0
+                entry[3] = 1
+            for student_id in absent:
+                entry = self._pending.setdefault(student_id, [0, 0, 0, 0])
+                entry[0] += 1
+                entry[2] += 1
+
+    def should_flush(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def flush(self) -> Dict[str, Any]:
+        """Apply all buffered marks to the database and re-score students whose risk band changed"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        summary = {"students_updated": 0, "students_rescored": 0, "unknown_students": 0}
+        if not pending:
+            return summary
+
+        caseloads = set()
+        student_ids = list(pending)
+        for start in range(0, len(student_ids), LOOKUP_CHUNK_SIZE):
+            chunk = {sid: pending[sid] for sid in student_ids[start:start + LOOKUP_CHUNK_SIZE]}
+            try:
+                result = _apply_chunk(chunk, caseloads)
+            except Exception as e:
+                # Put back every mark that was not written, so none is lost or applied twice:
+                # the failed writes of a partly applied chunk, or the whole chunk, plus later chunks
+                failed = getattr(e, "failed_student_ids", None)
+                unapplied = [sid for sid in failed if sid in chunk] if failed is not None else list(chunk)
+                unapplied += student_ids[start + LOOKUP_CHUNK_SIZE:]
+                self._restore({sid: pending[sid] for sid in unapplied})
+                refresh_caseloads(caseloads)
+                raise
+            for key in summary:
+                summary[key] += result[key]
+
+        refresh_caseloads(caseloads)
+        return summary
+
+    def _restore(self, marks: Dict[str, List[int]]):
+        """Merge unapplied marks back under any marks added since (those are the later sessions)"""
+        with self._lock:
+            for student_id, older in marks.items():
+                newer = self._pending.get(student_id)
+                if newer is None:
+                    self._pending[student_id] = older
+                    continue
+                self._pending[student_id] = [
+                    older[0] + newer[0],
+                    older[1] + newer[1],
+                    newer[2] if newer[3] else older[2] + newer[2],
+                    older[3] | newer[3],
+                ]
+
+def _apply_chunk(pending: Dict[str, List[int]], caseloads: Set[str]) -> Dict[str, int]:
+    """Apply coalesced marks for one chunk of students"""
+    projection = {name: 1 for name in set(load_feature_order()) | set(RISK_FACTOR_FEATURES)}
+    projection.update({
+        "student_id": 1, "attendance": 1, "consecutive_absences": 1,
+        "sessions_held": 1, "sessions_attended": 1, "risk_level": 1, "name": 1, "department": 1, "counsellor_id": 1,
+    })
+    docs = list(students_collection.find({"student_id": {"$in": list(pending)}}, projection))
+    if not docs:
+        return {"students_updated": 0, "students_rescored": 0, "unknown_students": len(pending)}
+
+    frame = pd.DataFrame(docs)
+    deltas = np.array([pending[sid] for sid in frame["student_id"]], dtype=np.int64)
+
+    old_attendance = numeric_column(frame, "attendance", 100.0)
+    old_absences = numeric_column(frame, "consecutive_absences", 0.0)
+
+    # Students without session counters are seeded from their uploaded attendance percentage
+    held = numeric_column(frame, "sessions_held", np.nan)
+    attended = numeric_column(frame, "sessions_attended", np.nan)
+    unseeded = np.isnan(held) | np.isnan(attended)
+    held = np.where(unseeded, ATTENDANCE_PRIOR_SESSIONS, held)
+    attended = np.where(unseeded, np.round(old_attendance / 100 * ATTENDANCE_PRIOR_SESSIONS), attended)
+
+    held = held + deltas[:, 0]
+    attended = attended + deltas[:, 1]
+    attendance = np.round(np.where(held > 0, attended / np.maximum(held, 1) * 100, 100.0), 2)
+    consecutive_absences = np.where(deltas[:, 3] > 0, deltas[:, 2], old_absences + deltas[:, 2])
+
+    frame["attendance"] = attendance
+    frame["consecutive_absences"] = consecutive_absences
+
+    # A changed attendance moves the probability when the model reads it (and so risk_level
+    # through the probability thresholds); otherwise only crossing an attendance band can
+    changed = attendance != old_attendance
+    if "attendance" not in load_feature_order():
+        changed &= attendance_band(old_attendance) != attendance_band(attendance)
+    rescored = frame[changed]
+    scores = {}
+    if not rescored.empty:
+        model_version = get_model_version()
+        for index, score in score_students(rescored, source="attendance").iterrows():
+            scores[index] = {**score.to_dict(), "model_version": model_version}
+
+    identities = frame.reindex(columns=["student_id", "name", "department", "counsellor_id", "risk_level"]).to_dict("records")
+    updates = []
+    for index, (doc_id, identity) in enumerate(zip(frame["_id"], identities)):
+        previous_risk_level = identity.pop("risk_level")
+        fields = {
+            "sessions_held": int(held[index]),
+            "sessions_attended": int(attended[index]),
+            "attendance": float(attendance[index]),
+            "consecutive_absences": int(consecutive_absences[index]),
+        }
+        fields.update(scores.get(index, {}))
+        updates.append({
+            "filter": {"_id": doc_id},
+            "set": fields,
+            "previous_risk_level": previous_risk_level,
+            "student": identity,
+        })
+
+    try:
+        write_scores(updates, caseloads)
+    except BulkWriteError as e:
+        # Tell flush which students' marks were not written (the rest must not be applied twice)
+        e.failed_student_ids = [
+            frame["student_id"].iat[error["index"]] for error in e.details.get("writeErrors", [])
+        ]
+        raise
+
+    return {
+        "students_updated": len(updates),
+        "students_rescored": len(scores),
+        "unknown_students": len(pending) - len(frame),
+    }
+
+attendance_buffer = AttendanceBuffer()
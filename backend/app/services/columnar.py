@@ -0,0 +1,145 @@
+"""
+Columnar Batch Input
+Parses column-oriented prediction batches (JSON arrays per feature, CSV or Arrow IPC)
+into a DataFrame and validates them with vectorized checks
+
+The bounds are read from a pydantic model's field constraints, so a columnar batch
+is held to exactly the same rules as the row format built on that model.
+"""
+import io
+import json
+from typing import Dict, Any, List, NamedTuple, Optional, Type
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+# Request Content-Type -> body format
+COLUMNAR_MEDIA_TYPES = {
+    "application/json": "json",
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+MAX_BATCH_ROWS = 100_000
+# Validation errors reported per request
+MAX_ERRORS = 100
+
+class ColumnSpec(NamedTuple):
+    required: bool
+    default: Any
+    ge: Optional[float]
+    le: Optional[float]
+    integer: bool
+
+class ColumnarValidationError(ValueError):
+    """Raised with FastAPI-style error entries ({loc, msg, type})"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} validation error(s)")
+        self.errors = errors
+
+def column_specs(model: Type[BaseModel]) -> Dict[str, ColumnSpec]:
+    """Column rules from a pydantic model's fields (required/default, ge/le, int)"""
+    specs = {}
+    for name, field in model.model_fields.items():
+        bounds = {"ge": None, "le": None}
+        for constraint in field.metadata:
+            for bound in bounds:
+                if getattr(constraint, bound, None) is not None:
+                    bounds[bound] = getattr(constraint, bound)
+        specs[name] = ColumnSpec(
+            required=field.is_required(),
+            default=None if field.is_required() else field.default,
+            ge=bounds["ge"],
+            le=bounds["le"],
+            integer=field.annotation is int,
+        )
+    return specs
+
+def read_columnar(body: bytes, body_format: str) -> pd.DataFrame:
+    """Parse a request body into a DataFrame with one column per field"""
+    if body_format == "csv":
+        frame = pd.read_csv(io.BytesIO(body))
+    elif body_format == "arrow":
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc as ipc
+        except ImportError:
+            raise ValueError("Arrow request bodies require pyarrow (pip install pyarrow)")
+        try:
+            table = ipc.open_stream(pa.py_buffer(body)).read_all()
+        except pa.ArrowInvalid:
+            table = ipc.open_file(pa.py_buffer(body)).read_all()
+        frame = table.to_pandas()
+    else:
+        columns = json.loads(body)
+        if not isinstance(columns, dict) or not all(isinstance(v, list) for v in columns.values()):
+            raise ColumnarValidationError([{
+                "loc": ["body"], "msg": "Expected an object of arrays, one per feature", "type": "dict_type"
+            }])
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ColumnarValidationError([{
+                "loc": ["body"], "msg": f"All columns must have the same length, got {sorted(lengths)}",
+                "type": "value_error"
+            }])
+        frame = pd.DataFrame(columns)
+
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    if len(frame) > MAX_BATCH_ROWS:
+        raise ColumnarValidationError([{
+            "loc": ["body"], "msg": f"Batch exceeds {MAX_BATCH_ROWS} rows", "type": "too_long"
+        }])
+    return frame
+
+def validate_columns(frame: pd.DataFrame, specs: Dict[str, ColumnSpec]) -> pd.DataFrame:
+    """
+    Check every column against its spec with array operations and return a numeric
+    frame holding just the spec columns (defaults filled in).
+    Raises ColumnarValidationError listing the offending rows.
+    """
+    errors: List[Dict[str, Any]] = []
+    validated = pd.DataFrame(index=frame.index)
+
+    def report(name: str, mask: np.ndarray, msg: str, error_type: str):
+        remaining = MAX_ERRORS - len(errors)
+        if remaining <= 0:
+            return
+        for row in np.flatnonzero(mask)[:remaining]:
+            errors.append({"loc": ["body", name, int(row)], "msg": msg, "type": error_type})
+
+    for name, spec in specs.items():
+        if name not in frame.columns:
+            if spec.required:
+                errors.append({"loc": ["body", name], "msg": "Field required", "type": "missing"})
+            else:
+                validated[name] = float(spec.default)
+            continue
+
+        raw = frame[name]
+        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+        missing = raw.isna().to_numpy()
+        report(name, np.isnan(values) & ~missing, "Input should be a valid number", "float_parsing")
+        if spec.required:
+            report(name, missing, "Field required", "missing")
+        else:
+            values = np.where(missing, float(spec.default), values)
+
+        finite = ~np.isnan(values)
+        if spec.integer:
+            report(name, finite & (values % 1 != 0), "Input should be a valid integer", "int_from_float")
+        if spec.ge is not None:
+            report(name, finite & (values < spec.ge), f"Input should be greater than or equal to {spec.ge}",
+                   "greater_than_equal")
+        if spec.le is not None:
+            report(name, finite & (values > spec.le), f"Input should be less than or equal to {spec.le}",
+                   "less_than_equal")
+        validated[name] = values
+
+    if errors:
+        raise ColumnarValidationError(errors[:MAX_ERRORS])
+    for name, spec in specs.items():
+        if spec.integer:
+            validated[name] = validated[name].astype("int64")
+    return validated
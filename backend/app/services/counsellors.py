@@ -0,0 +1,71 @@
+"""
+Counsellor Service
+Counsellor contacts and precomputed caseload risk counts (counsellors_collection)
+"""
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, Optional
+from pymongo import UpdateOne
+from app.database import students_collection, counsellors_collection
+
+RISK_LEVELS = ("low", "medium", "high")
+
+def refresh_caseload_counts(counsellor_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recount students per risk level for the given counsellors (all when None)
+    and store the counts on their counsellor documents.
+    """
+    match = {"counsellor_id": {"$nin": [None, ""]}}
+    if counsellor_ids is not None:
+        counsellor_ids = sorted({cid for cid in counsellor_ids if isinstance(cid, str) and cid})
+        if not counsellor_ids:
+            return 0
+        match = {"counsellor_id": {"$in": counsellor_ids}}
+
+    # Grouping on the (counsellor_id, risk_level) index prefix
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"counsellor_id": "$counsellor_id", "risk_level": "$risk_level"}, "count": {"$sum": 1}}},
+    ]
+    counts: Dict[str, Dict[str, int]] = {cid: {} for cid in (counsellor_ids or [])}
+    for row in students_collection.aggregate(pipeline):
+        # Unscored students count as low risk, like everywhere else in the API
+        level = row["_id"].get("risk_level")
+        level = level if level in RISK_LEVELS else "low"
+        by_level = counts.setdefault(row["_id"]["counsellor_id"], {})
+        by_level[level] = by_level.get(level, 0) + row["count"]
+
+    updated_at = datetime.now(timezone.utc)
+    operations = []
+    for counsellor_id, by_level in counts.items():
+        risk_counts = {level: by_level.get(level, 0) for level in RISK_LEVELS}
+        operations.append(UpdateOne(
+            {"counsellor_id": counsellor_id},
+            {"$set": {
+                "risk_counts": risk_counts,
+                "total_students": sum(risk_counts.values()),
+                "counts_updated_at": updated_at,
+            }},
+            upsert=True
+        ))
+    if operations:
+        counsellors_collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+def get_counsellor(counsellor_id: str) -> Optional[Dict[str, Any]]:
+    return counsellors_collection.find_one({"counsellor_id": counsellor_id}, {"_id": 0})
+
+def list_counsellors() -> List[Dict[str, Any]]:
+    return list(counsellors_collection.find({}, {"_id": 0}).sort("counsellor_id", 1))
+
+def save_counsellor(counsellor_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Create or update a counsellor's contact details"""
+    counsellors_collection.update_one({"counsellor_id": counsellor_id}, {"$set": fields}, upsert=True)
+    return get_counsellor(counsellor_id)
+
+def counsellor_contacts(counsellor_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Name and email of the given counsellors, in one query"""
+    cursor = counsellors_collection.find(
+        {"counsellor_id": {"$in": [cid for cid in counsellor_ids if cid]}},
+        {"_id": 0, "counsellor_id": 1, "name": 1, "email": 1}
+    )
+    return {doc["counsellor_id"]: doc for doc in cursor}
@@ -1,6 +1,8 @@
+from html import escape
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from app.config import SENDGRID_API_KEY, FROM_EMAIL
+from app.ml.risk_factors import student_risk_factors
 
 def send_alert(to_email, student_id, risk_level, student_name="Unknown"):
     """Send email alert for at-risk students"""
@@ -73,3 +75,86 @@ def send_alert(to_email, student_id, risk_level, student_name="Unknown"):
     except Exception as e:
         print(f"Error sending email alert: {str(e)}")
         return {"status": "failed", "error": str(e)}
+
+def send_digest(to_email, alerts, counsellor_name="Counsellor"):
+    """Send one email listing every pending alert of a counsellor's students"""
+    try:
+        by_risk = sorted(alerts, key=lambda a: a.get("dropout_probability") or 0, reverse=True)
+        high_count = sum(1 for a in alerts if a.get("risk_level") == "high")
+        subject = f"⚠️ EarlySignal.AI digest: {len(alerts)} student(s) need attention ({high_count} high risk)"
+        
+        # Every interpolated value comes from uploaded data, so it is escaped for the HTML body
+        rows = "".join(
+            f"""
+                    <tr>
+                        <td style="padding: 6px; border-bottom: 1px solid #eee;">{escape(str(a.get('name') or 'Unknown'))}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #eee;">{escape(str(a.get('student_id')))}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #eee;">{escape(str(a.get('previous_risk_level') or 'new').upper())} → <strong>{escape(str(a.get('risk_level')).upper())}</strong></td>
+                        <td style="padding: 6px; border-bottom: 1px solid #eee;">{(a.get('dropout_probability') or 0) * 100:.0f}%</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #eee;">{escape('; '.join(student_risk_factors(a)))}</td>
+                    </tr>"""
+            for a in by_risk
+        )
+        
+        html_content = f"""
+        <html>
+            <body style="font-family: Arial, sans-serif;">
+                <h2 style="color: #dc2626;">Student Risk Digest</h2>
+                <p>Hello {escape(str(counsellor_name))}, these students in your caseload moved to a higher risk level since the last digest.</p>
+                
+                <table style="border-collapse: collapse; width: 100%; margin: 20px 0;">
+                    <tr style="background-color: #fee2e2; text-align: left;">
+                        <th style="padding: 6px;">Name</th>
+                        <th style="padding: 6px;">Student ID</th>
+                        <th style="padding: 6px;">Risk Level</th>
+                        <th style="padding: 6px;">Dropout Probability</th>
+                        <th style="padding: 6px;">Risk Factors</th>
+                    </tr>{rows}
+                </table>
+                
+                <p><strong>Recommended Actions:</strong> schedule counseling sessions for high risk students first and review their attendance and academic performance.</p>
+                
+                <p style="margin-top: 30px; color: #666;">
+                    <small>This is an automated message from EarlySignal.AI Student Dropout Prediction System.</small>
+                </p>
+            </body>
+        </html>
+        """
+        
+        lines = "\n".join(
+            f"        - {a.get('name') or 'Unknown'} ({a.get('student_id')}): "
+            f"{(a.get('previous_risk_level') or 'new').upper()} -> {str(a.get('risk_level')).upper()}, "
+            f"{(a.get('dropout_probability') or 0) * 100:.0f}% dropout probability"
+            for a in by_risk
+        )
+        plain_text = f"""
+        STUDENT RISK DIGEST
+        
+        Hello {counsellor_name}, these students in your caseload moved to a higher risk level:
+        
+{lines}
+        
+        This is an automated message from EarlySignal.AI Student Dropout Prediction System.
+        """
+        
+        message = Mail(
+            from_email=FROM_EMAIL,
+            to_emails=to_email,
+            subject=subject,
+            plain_text_content=plain_text,
+            html_content=html_content
+        )
+        
+        # Check if API key is configured
+        if not SENDGRID_API_KEY or SENDGRID_API_KEY.startswith("SG_xxx"):
+            print(f"⚠️ SendGrid not configured. Would send: {subject} to {to_email}")
+            return {"status": "skipped", "reason": "SendGrid not configured"}
+        
+        sg = SendGridAPIClient(SENDGRID_API_KEY)
+        response = sg.send(message)
+        
+        return {"status": "sent", "status_code": response.status_code}
+    
+    except Exception as e:
+        print(f"Error sending digest email: {str(e)}")
+        return {"status": "failed", "error": str(e)}
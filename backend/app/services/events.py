@@ -0,0 +1,224 @@
+"""
+Event Stream
+Server-Sent Events fan-out of dashboard stats and job progress
+
+Writers (uploads, analysis, alert batches, archive moves) only mark the dashboard
+stats stale. A background thread recomputes them with one aggregation, at most every
+EVENTS_STATS_MIN_INTERVAL seconds and only while someone is subscribed, and
+broadcasts the result with its change since the previous broadcast. The number of
+dashboard viewers therefore does not change the number of stats queries. While
+anyone is subscribed, stats are also recomputed every EVENTS_STATS_INTERVAL seconds,
+which picks up writes made by other worker processes.
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from app.config import EVENTS_STATS_MIN_INTERVAL, EVENTS_STATS_INTERVAL, EVENTS_QUEUE_SIZE
+from app.database import students_read_collection
+
+RISK_LEVELS = ["high", "medium", "low"]
+
+# Minimum seconds between two progress events of one job
+PROGRESS_INTERVAL = 0.5
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """One SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class Subscription:
+    """Bounded queue of one stream client, fed from any thread through its event loop"""
+
+    def __init__(self, queue_size: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: str):
+        """Enqueue, dropping the oldest message when the client is not keeping up"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+class EventBroadcaster:
+    """Set of subscriptions; publish() may be called from worker threads"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        """Register a client (call from the event loop)"""
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """Send an event to every subscriber"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+        message = format_event(event, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # Event loop already closed (shutdown)
+                self.unsubscribe(subscription)
+        self.published += 1
+
+def compute_dashboard_stats() -> Dict[str, Any]:
+    """Student totals per risk level and average dropout probability, in one aggregation"""
+    pipeline = [
+        {"$group": {
+            "_id": "$risk_level",
+            "count": {"$sum": 1},
+            "probability_sum": {"$sum": "$dropout_probability"}
+        }}
+    ]
+    groups = {group["_id"]: group for group in students_read_collection.aggregate(pipeline)}
+    total = sum(group["count"] for group in groups.values())
+    probability_sum = sum(group["probability_sum"] or 0 for group in groups.values())
+
+    stats = {"total_students": total}
+    for level in RISK_LEVELS:
+        stats[f"{level}_risk_count"] = groups.get(level, {}).get("count", 0)
+    stats["avg_dropout_probability"] = round(probability_sum / total, 4) if total else 0.0
+    return stats
+
+class StatsPublisher:
+    """Recomputes dashboard stats when stale or due and broadcasts them"""
+
+    def __init__(self, broadcaster: EventBroadcaster, min_interval: float, interval: float):
+        self.broadcaster = broadcaster
+        self.min_interval = min_interval
+        self.interval = interval
+        self.stats: Optional[Dict[str, Any]] = None
+        # Last stats sent to subscribers; current() may refresh self.stats in between
+        self.broadcast_stats: Optional[Dict[str, Any]] = None
+        self.computed_at: Optional[float] = None
+        self.computations = 0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._refresh = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="stats-publisher", daemon=True)
+            self._thread.start()
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    def request_refresh(self):
+        """Mark stats stale after a write; subscribers get them recomputed shortly"""
+        self._stale = True
+        self._refresh.set()
+
+    def _run(self):
+        while True:
+            self._refresh.wait(self.interval)
+            self._refresh.clear()
+            if not self.broadcaster.subscriber_count:
+                continue
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"⚠️  Could not publish dashboard stats: {str(e).splitlines()[0][:200]}")
+            # Coalesce bursts of writes into one recomputation
+            time.sleep(self.min_interval)
+
+    def publish(self):
+        """Recompute stats and broadcast them with the change since the last broadcast, if any"""
+        stats = self._compute()
+        with self._lock:
+            previous = self.broadcast_stats
+            delta = {
+                key: round(value - previous.get(key, 0), 4)
+                for key, value in stats.items()
+                if previous and value != previous.get(key)
+            }
+            if previous and not delta:
+                return
+            self.broadcast_stats = stats
+        self.broadcaster.publish("stats", {"stats": stats, "delta": delta, "at": datetime.now(timezone.utc)})
+
+    def current(self) -> Dict[str, Any]:
+        """Latest stats, recomputed only when stale or older than the refresh interval"""
+        fresh = self.computed_at is not None and time.monotonic() - self.computed_at < self.interval
+        if self.stats is None or self._stale or not fresh:
+            return self._compute()
+        return self.stats
+
+    def _compute(self) -> Dict[str, Any]:
+        with self._lock:
+            self._stale = False
+            stats = compute_dashboard_stats()
+            self.stats, self.computed_at = stats, time.monotonic()
+            self.computations += 1
+            return stats
+
+class JobProgress:
+    """
+    Progress events for one long-running operation (upload, analysis, archive run).
+    Used as a context manager, an exception in the block is reported as "failed".
+    """
+
+    def __init__(self, job: str, total: Optional[int] = None):
+        self.job = job
+        self.job_id = uuid.uuid4().hex[:12]
+        self.total = total
+        self.done = 0
+        self._last_sent = 0.0
+        self._send("started")
+
+    def __enter__(self) -> "JobProgress":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.fail(str(exc) or exc_type.__name__)
+        return False
+
+    def advance(self, count: int):
+        self.done += count
+        if time.monotonic() - self._last_sent >= PROGRESS_INTERVAL:
+            self._send("running")
+
+    def finish(self, **summary):
+        self._send("completed", summary)
+
+    def fail(self, error: str):
+        self._send("failed", {"error": error})
+
+    def _send(self, status: str, extra: Optional[Dict[str, Any]] = None):
+        self._last_sent = time.monotonic()
+        broadcaster.publish("progress", {
+            "job": self.job,
+            "job_id": self.job_id,
+            "status": status,
+            "done": self.done,
+            "total": self.total,
+            **(extra or {})
+        })
+
+broadcaster = EventBroadcaster(EVENTS_QUEUE_SIZE)
+stats_publisher = StatsPublisher(broadcaster, EVENTS_STATS_MIN_INTERVAL, EVENTS_STATS_INTERVAL)
@@ -0,0 +1,138 @@
+"""
+Student Export Service
+Streams students from a projected Mongo cursor as CSV, NDJSON or Parquet
+"""
+import csv
+import io
+import json
+from typing import Dict, Any, Iterator, List
+from app.database import students_read_collection
+from app.services.scoring import iter_batches
+from app.ml.risk_factors import student_risk_factors
+
+# Documents fetched per cursor batch and written per output chunk
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_FIELDS = [
+    "student_id", "name", "email", "department", "counsellor_id", "semester", "gpa",
+    "attendance", "internal_marks", "backlogs", "study_hours", "previous_failures",
+    "academic_mean_score", "academic_min_score", "academic_score_slope",
+    "academic_total_attempts", "academic_repeat_subjects",
+    "risk_level", "dropout_probability", "risk_factors", "model_version",
+]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def export_students(query: Dict[str, Any], export_format: str) -> Iterator[bytes]:
+    """Stream every student matching query in the given format, one chunk per cursor batch"""
+    projection = {"_id": 0, "risk_flags": 1, **{field: 1 for field in EXPORT_FIELDS}}
+    cursor = students_read_collection.find(query, projection).batch_size(EXPORT_BATCH_SIZE)
+    batches = (_with_factor_text(batch) for batch in iter_batches(cursor, EXPORT_BATCH_SIZE))
+
+    if export_format == "csv":
+        return _csv_chunks(batches)
+    if export_format == "ndjson":
+        return _ndjson_chunks(batches)
+    if export_format == "parquet":
+        return _parquet_chunks(batches)
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+def _with_factor_text(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Expand coded risk factors to text in place"""
+    for doc in batch:
+        doc["risk_factors"] = student_risk_factors(doc)
+        doc.pop("risk_flags", None)
+    return batch
+
+def _csv_chunks(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        for doc in batch:
+            factors = doc.get("risk_factors")
+            if isinstance(factors, list):
+                doc["risk_factors"] = "; ".join(str(f) for f in factors)
+            writer.writerow(doc)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _ndjson_chunks(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps(doc, default=str) for doc in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def _parquet_chunks(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Write one Parquet row group per cursor batch and stream the bytes as they are produced"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("student_id", pa.string()), ("name", pa.string()), ("email", pa.string()),
+        ("department", pa.string()), ("counsellor_id", pa.string()), ("semester", pa.int64()), ("gpa", pa.float64()),
+        ("attendance", pa.float64()), ("internal_marks", pa.float64()), ("backlogs", pa.int64()),
+        ("study_hours", pa.float64()), ("previous_failures", pa.int64()),
+        ("academic_mean_score", pa.float64()), ("academic_min_score", pa.float64()),
+        ("academic_score_slope", pa.float64()), ("academic_total_attempts", pa.int64()),
+        ("academic_repeat_subjects", pa.int64()),
+        ("risk_level", pa.string()), ("dropout_probability", pa.float64()),
+        ("risk_factors", pa.list_(pa.string())), ("model_version", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batches:
+        rows = [{field: _parquet_value(doc.get(field), schema.field(field).type) for field in EXPORT_FIELDS}
+                for doc in batch]
+        writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def _parquet_value(value, arrow_type):
+    """Coerce loosely typed Mongo values to the export schema"""
+    if value is None or value == "":
+        return None
+    try:
+        if arrow_type == "string":
+            return str(value)
+        if arrow_type == "int64":
+            return int(value)
+        if arrow_type == "double":
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return None
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
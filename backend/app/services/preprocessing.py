@@ -1,84 +1,210 @@
+import os
 import pandas as pd
 import numpy as np
-from typing import BinaryIO
+from typing import BinaryIO, Dict
+from app.ml.load_model import load_feature_order
+
+# Upload formats by file extension
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+# Identity and profile columns kept from columnar uploads, with their types
+IDENTITY_SCHEMA = {
+    'student_id': 'string',
+    'name': 'string',
+    'email': 'string',
+    'department': 'string',
+    'counsellor_id': 'string',
+    'semester': 'int64',
+    'gpa': 'float64',
+    'consecutive_absences': 'int64',
+    # Set on leavers so the archive retention policy can move them out (POST /archive/run)
+    'graduated': 'bool',
+}
+
+# Types of known model features; any other feature in feature_order.json is float64
+FEATURE_TYPES = {
+    'attendance': 'float64',
+    'internal_marks': 'float64',
+    'backlogs': 'int64',
+    'study_hours': 'float64',
+    'previous_failures': 'int64',
+}
+
+# Values used when a column is missing or a value cannot be parsed
+FEATURE_DEFAULTS = {
+    'attendance': 75.0,
+    'internal_marks': 75.0,
+    'backlogs': 0,
+    'study_hours': 4.0,
+    'previous_failures': 0,
+    'gpa': 3.0,
+    'semester': 1
+}
+
+# read_csv dtypes per schema type (numeric columns as float64, which can hold missing values)
+CSV_DTYPES = {'string': 'str', 'bool': 'str'}
+TRUE_VALUES = ('true', '1', 'yes', 'y')
+
+def upload_schema() -> Dict[str, str]:
+    """Column name -> dtype for uploads: identity columns plus every model feature"""
+    schema = dict(IDENTITY_SCHEMA)
+    for feature in list(FEATURE_TYPES) + list(load_feature_order()):
+        schema.setdefault(feature, FEATURE_TYPES.get(feature, 'float64'))
+    return schema
+
+def upload_format(filename: str):
+    """Detect the upload format from the file extension (None if unsupported)"""
+    return UPLOAD_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+def process_upload(file: BinaryIO, filename: str) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV, Parquet or Arrow IPC file and prepare it for database insertion
+
+    Args:
+        file: Binary file object from upload
+        filename: Original file name, used to pick the parser
+
+    Returns:
+        DataFrame with processed student data
+    """
+    file_format = upload_format(filename)
+    if file_format is None:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+    try:
+        if file_format == "csv":
+            df = _read_csv(file)
+        elif file_format == "parquet":
+            df = _read_parquet(file)
+        else:
+            df = _read_arrow_ipc(file)
+    except ImportError:
+        raise ValueError(f"Reading {file_format} files requires pyarrow (pip install pyarrow)")
+
+    return prepare_students(df)
 
 def process_csv(file: BinaryIO) -> pd.DataFrame:
     """
     Process uploaded CSV file and prepare it for database insertion
-    
+
     Args:
         file: Binary file object from upload
-    
+
     Returns:
         DataFrame with processed student data
     """
+    return process_upload(file, "upload.csv")
+
+def prepare_students(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize columns, apply the upload schema, fill defaults and clip ranges"""
     try:
-        # Read CSV
-        df = pd.read_csv(file)
-        
         # Clean column names
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        
-        # Fill missing values
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
-        df[numeric_columns] = df[numeric_columns].fillna(0)
-        
-        # Fill string columns
-        string_columns = df.select_dtypes(include=['object']).columns
-        df[string_columns] = df[string_columns].fillna('')
-        
+        df.columns = _normalize_columns(df.columns)
+
         # Ensure required ML feature columns exist with defaults
-        feature_defaults = {
-            'attendance': 75.0,
-            'internal_marks': 75.0,
-            'backlogs': 0,
-            'study_hours': 4.0,
-            'previous_failures': 0,
-            'gpa': 3.0,
-            'semester': 1
-        }
-        
-        for column, default_value in feature_defaults.items():
+        for column, default_value in FEATURE_DEFAULTS.items():
             if column not in df.columns:
                 df[column] = default_value
-        
-        # Convert numeric fields to appropriate types
-        if 'attendance' in df.columns:
-            df['attendance'] = pd.to_numeric(df['attendance'], errors='coerce').fillna(75.0)
-        
-        if 'internal_marks' in df.columns:
-            df['internal_marks'] = pd.to_numeric(df['internal_marks'], errors='coerce').fillna(75.0)
-        
-        if 'backlogs' in df.columns:
-            df['backlogs'] = pd.to_numeric(df['backlogs'], errors='coerce').fillna(0).astype(int)
-        
-        if 'study_hours' in df.columns:
-            df['study_hours'] = pd.to_numeric(df['study_hours'], errors='coerce').fillna(4.0)
-        
-        if 'previous_failures' in df.columns:
-            df['previous_failures'] = pd.to_numeric(df['previous_failures'], errors='coerce').fillna(0).astype(int)
-        
-        if 'semester' in df.columns:
-            df['semester'] = pd.to_numeric(df['semester'], errors='coerce').fillna(1).astype(int)
-        
-        if 'gpa' in df.columns:
-            df['gpa'] = pd.to_numeric(df['gpa'], errors='coerce').fillna(3.0)
-        
+
+        # Convert schema columns to their types; columns that already have them are left alone
+        schema = upload_schema()
+        for column, dtype in schema.items():
+            if column in df.columns:
+                df[column] = _coerce(df[column], dtype, FEATURE_DEFAULTS.get(column, 0))
+
+        # Fill missing values in remaining columns
+        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        df[numeric_columns] = df[numeric_columns].fillna(0)
+
+        string_columns = [c for c in df.select_dtypes(include=['object', 'string']).columns]
+        df[string_columns] = df[string_columns].fillna('')
+
         # Validate ranges
-        if 'attendance' in df.columns:
-            df['attendance'] = df['attendance'].clip(0, 100)
-        
-        if 'internal_marks' in df.columns:
-            df['internal_marks'] = df['internal_marks'].clip(0, 100)
-        
-        if 'study_hours' in df.columns:
-            df['study_hours'] = df['study_hours'].clip(0, 24)
-        
-        if 'gpa' in df.columns:
-            df['gpa'] = df['gpa'].clip(0, 4)
-        
+        df['attendance'] = df['attendance'].clip(0, 100)
+        df['internal_marks'] = df['internal_marks'].clip(0, 100)
+        df['study_hours'] = df['study_hours'].clip(0, 24)
+        df['gpa'] = df['gpa'].clip(0, 4)
+
         return df
-    
+
     except Exception as e:
-        print(f"Error processing CSV: {str(e)}")
-        raise ValueError(f"Failed to process CSV file: {str(e)}")
+        print(f"Error processing upload: {str(e)}")
+        raise ValueError(f"Failed to process uploaded file: {str(e)}")
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """Content hash of every row (column names included), as 16-char hex strings"""
+    columns = sorted(df.columns)
+    hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    # Fold in the column names so adding or dropping a column changes every hash
+    hashes = hashes ^ pd.util.hash_array(np.array(["|".join(columns)], dtype=object))[0]
+    return pd.Series([f"{h:016x}" for h in hashes], index=df.index)
+
+def _normalize_columns(columns) -> pd.Index:
+    return pd.Index(columns).astype(str).str.strip().str.lower().str.replace(' ', '_')
+
+def _coerce(column: pd.Series, dtype: str, default) -> pd.Series:
+    """Convert a column to a schema dtype, only when it does not already have it"""
+    if dtype == 'bool':
+        if pd.api.types.is_bool_dtype(column) and not column.isna().any():
+            return column.astype(bool)
+        return column.astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+
+    if dtype == 'string':
+        if pd.api.types.is_string_dtype(column) and not column.isna().any():
+            return column
+        return column.astype(object).where(column.notna(), '').astype(str)
+
+    if dtype == 'int64':
+        if pd.api.types.is_integer_dtype(column):
+            return column.astype('int64')
+        return pd.to_numeric(column, errors='coerce').fillna(default).astype('int64')
+
+    if pd.api.types.is_float_dtype(column) and not column.isna().any():
+        return column
+    return pd.to_numeric(column, errors='coerce').fillna(default).astype('float64')
+
+def _read_csv(file: BinaryIO) -> pd.DataFrame:
+    """
+    Read a CSV with the schema columns parsed straight to their schema types.
+    Numeric schema columns are read as float64 (missing values stay NaN until defaults
+    are filled); a file with non-numeric values in them is re-read with those columns
+    as text and coerced value by value. Other columns are kept with inferred types.
+    """
+    names = list(pd.read_csv(file, nrows=0).columns)
+    file.seek(0)
+    schema = upload_schema()
+    dtypes = {
+        raw: CSV_DTYPES.get(schema[name], 'float64')
+        for raw, name in zip(names, _normalize_columns(names)) if name in schema
+    }
+    try:
+        return pd.read_csv(file, dtype=dtypes)
+    except ValueError:
+        file.seek(0)
+        return pd.read_csv(file, dtype=dict.fromkeys(dtypes, str))
+
+def _read_parquet(file: BinaryIO) -> pd.DataFrame:
+    """Read a Parquet file; its column types are already stored in the file"""
+    import pyarrow.parquet as pq
+
+    return pq.read_table(file).to_pandas()
+
+def _read_arrow_ipc(file: BinaryIO) -> pd.DataFrame:
+    """Read an Arrow IPC file (file or stream format)"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    try:
+        table = ipc.open_file(file).read_all()
+    except pa.ArrowInvalid:
+        file.seek(0)
+        table = ipc.open_stream(file).read_all()
+
+    return table.to_pandas()
@@ -0,0 +1,172 @@
+"""
+Score Writer Service
+Single write path for risk scores so that tier transitions always raise alerts
+"""
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Set
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database import students_collection, students_bulk_collection
+from app.services.counsellors import refresh_caseload_counts
+from app.services.search import student_search
+from app.services.events import stats_publisher, JobProgress
+from app.services.alert_feed import is_escalation, build_alert, append_alerts
+from app.ml.load_model import load_feature_order, get_model_version
+from app.ml.predict import score_students, FEATURE_DEFAULTS
+
+# Number of student ids sent per $in lookup
+LOOKUP_CHUNK_SIZE = 5000
+
+# Number of students scored and written per batch
+SCORING_BATCH_SIZE = 1000
+
+def fetch_by_student_id(student_ids: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Look up selected fields of many students by student_id, in chunked $in queries"""
+    projection = {"_id": 0, "student_id": 1, **{field: 1 for field in fields}}
+    found = {}
+    for start in range(0, len(student_ids), LOOKUP_CHUNK_SIZE):
+        chunk = student_ids[start:start + LOOKUP_CHUNK_SIZE]
+        for doc in students_collection.find({"student_id": {"$in": chunk}}, projection):
+            found[doc["student_id"]] = doc
+    return found
+
+def write_scores(updates: List[Dict[str, Any]], caseloads: Optional[Set[str]] = None,
+                 bulk: bool = True) -> Dict[str, int]:
+    """
+    Write score updates in one bulk write and append an alert for every student
+    whose risk tier went up.
+
+    Each update is a dict with:
+        filter: query selecting the student document
+        set: fields to $set, including risk_level
+        previous_risk_level: risk level stored before this write (None for new students)
+        upsert: whether to insert the student if missing (default False)
+        student: optional identity fields (student_id, name, department, counsellor_id) for alerts
+        previous_counsellor_id: counsellor stored before this write, when it may have changed
+
+    Every write stamps updated_at, which the archive retention policy uses.
+    Caseload risk counts of the affected counsellors, the search index and the
+    pushed dashboard stats are refreshed afterwards. Multi-batch jobs pass a
+    caseloads set instead: the affected counsellor ids are added to it and the
+    caller refreshes their counts once, with refresh_caseloads, at the end.
+
+    Bulk writes use the tunable MONGO_BULK_WRITE_* write concern; bulk=False (single
+    student updates) writes with the default write concern instead.
+    """
+    if not updates:
+        return {"matched": 0, "upserted": 0, "alerts_created": 0}
+
+    updated_at = datetime.now(timezone.utc)
+
+    operations = []
+    alerts = []
+    caseload_ids = []
+    searchable = []
+    for index, update in enumerate(updates):
+        operation = {"$set": {**update["set"], "updated_at": updated_at}}
+        if "risk_flags" in update["set"]:
+            # Coded factors replace the text stored by earlier versions
+            operation["$unset"] = {"risk_factors": ""}
+        operations.append(UpdateOne(update["filter"], operation, upsert=update.get("upsert", False)))
+
+        fields = update["set"]
+        if "risk_level" in fields and is_escalation(update.get("previous_risk_level"), fields["risk_level"]):
+            student = {**update["filter"], **update.get("student", {}), **fields}
+            alerts.append((index, build_alert(student, update.get("previous_risk_level"))))
+
+        searchable.append({**update["filter"], **update.get("student", {}), **fields})
+
+        touched = []
+        if "risk_level" in fields or "counsellor_id" in fields:
+            touched = [fields.get("counsellor_id", update.get("student", {}).get("counsellor_id")),
+                       update.get("previous_counsellor_id")]
+        caseload_ids.append(touched)
+
+    collection = students_bulk_collection if bulk else students_collection
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Unordered: the other operations were applied, so finish their alerts, caseloads and search
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        applied = [i for i in range(len(updates)) if i not in failed]
+        append_alerts([alert for i, alert in alerts if i not in failed])
+        _after_write([caseload_ids[i] for i in applied], [searchable[i] for i in applied], caseloads)
+        raise
+    alerts_created = append_alerts([alert for _, alert in alerts])
+    _after_write(caseload_ids, searchable, caseloads)
+
+    # Unacknowledged writes (MONGO_BULK_WRITE_W=0) report no counts
+    return {
+        "matched": result.matched_count if result.acknowledged else None,
+        "upserted": result.upserted_count if result.acknowledged else None,
+        "alerts_created": alerts_created,
+    }
+
+def _after_write(caseload_ids: List[List[Optional[str]]], searchable: List[Dict[str, Any]],
+                 caseloads: Optional[Set[str]]):
+    """Caseload counts, search overlay and dashboard stats after students were written"""
+    counsellor_ids = {cid for ids in caseload_ids for cid in ids}
+    if caseloads is None:
+        refresh_caseload_counts(counsellor_ids)
+    else:
+        caseloads.update(counsellor_ids)
+    student_search.note_writes(searchable)
+    stats_publisher.request_refresh()
+
+def refresh_caseloads(caseloads: Set[str]) -> int:
+    """Recount caseloads collected over a multi-batch job (see write_scores)"""
+    return refresh_caseload_counts(caseloads) if caseloads else 0
+
+def analyze_students(query: Optional[Dict[str, Any]] = None, batch_size: int = SCORING_BATCH_SIZE,
+                     progress: Optional[JobProgress] = None) -> Dict[str, int]:
+    """Re-score every student matching query, streaming the collection in vectorized batches"""
+    projection = {name: 1 for name in set(FEATURE_DEFAULTS) | set(load_feature_order())}
+    projection.update({"student_id": 1, "name": 1, "department": 1, "counsellor_id": 1, "risk_level": 1})
+    cursor = students_collection.find(query or {}, projection).batch_size(batch_size)
+    
+    summary = {"total_students": 0, "analyzed": 0, "failed": 0, "alerts_created": 0}
+    model_version = get_model_version()
+    caseloads = set()
+    
+    for docs in iter_batches(cursor, batch_size):
+        summary["total_students"] += len(docs)
+        try:
+            frame = pd.DataFrame(docs)
+            for name, default in FEATURE_DEFAULTS.items():
+                frame[name] = frame[name].fillna(default) if name in frame.columns else default
+            
+            scores = score_students(frame, source="analyze")
+            analyzed_at = datetime.now(timezone.utc)
+            updates = [
+                {
+                    "filter": {"_id": doc["_id"]},
+                    "set": {**score, "model_version": model_version, "last_analysis": analyzed_at},
+                    "previous_risk_level": doc.get("risk_level"),
+                    "student": doc
+                }
+                for doc, score in zip(docs, scores.to_dict("records"))
+            ]
+            summary["alerts_created"] += write_scores(updates, caseloads)["alerts_created"]
+            summary["analyzed"] += len(docs)
+        
+        except Exception as e:
+            print(f"Error analyzing batch of {len(docs)} students: {str(e)}")
+            summary["failed"] += len(docs)
+        
+        if progress:
+            progress.advance(len(docs))
+    
+    refresh_caseloads(caseloads)
+    return summary
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Group an iterable (e.g. a Mongo cursor) into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,239 @@
+"""
+Student Search
+In-process typeahead index over student_id and name
+
+- Prefix matches: a sorted key array (student id, full name and every name token)
+  searched with bisect
+- Fuzzy matches: a trigram inverted index scored with numpy by how many query
+  trigrams a student shares, lightly penalizing long names
+- Students written since the last rebuild live in a small overlay that is scanned
+  directly and shadows their old entries; a background thread rebuilds the index
+  every SEARCH_REFRESH_INTERVAL seconds (sooner once the overlay is full), which
+  also picks up writes made by other worker processes
+- A periodic rebuild is skipped when the collection's change signature (latest
+  updated_at, which every write stamps, and the document count) is unchanged, so
+  idle workers do not rescan the collection
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Iterable, List, Optional
+import numpy as np
+from app.config import SEARCH_REFRESH_INTERVAL, SEARCH_OVERLAY_LIMIT
+from app.database import students_read_collection
+
+SEARCH_FIELDS = ["student_id", "name", "department", "counsellor_id", "risk_level", "dropout_probability"]
+
+# Match scores; fuzzy matches score their similarity (0-1)
+EXACT_ID, EXACT_NAME, ID_PREFIX, NAME_PREFIX, TOKEN_PREFIX = 5.0, 4.0, 3.0, 2.5, 2.0
+MIN_SIMILARITY = 0.4
+# Weight of a student's unmatched trigrams in the similarity
+LENGTH_PENALTY = 0.1
+# Prefix entries examined per query, so one-letter queries stay cheap
+PREFIX_SCAN_LIMIT = 2000
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _search_text(doc: Dict[str, Any]):
+    return str(doc.get("student_id") or "").lower(), str(doc.get("name") or "").lower()
+
+def change_signature():
+    """Latest updated_at and document count; an index read and a metadata read, no scan"""
+    latest = students_read_collection.find_one({}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+    return (latest or {}).get("updated_at"), students_read_collection.estimated_document_count()
+
+class StudentSearchIndex:
+    """Immutable snapshot index plus a mutable overlay of recent writes"""
+
+    def __init__(self, refresh_interval: float, overlay_limit: int):
+        self.refresh_interval = refresh_interval
+        self.overlay_limit = overlay_limit
+        self._docs: List[Dict[str, Any]] = []
+        self._keys: List[str] = []
+        self._key_docs = np.zeros(0, dtype=np.int32)
+        self._key_scores = np.zeros(0, dtype=np.float32)
+        self._postings: Dict[str, np.ndarray] = {}
+        self._trigram_counts = np.zeros(0, dtype=np.int32)
+        self._overlay: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._rebuild = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self.skipped_rebuilds = 0
+        self._signature = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="student-search", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        requested = True
+        while True:
+            try:
+                self.refresh(requested)
+            except Exception as e:
+                print(f"⚠️  Could not build student search index: {str(e).splitlines()[0][:200]}")
+            # Explicit requests (archive runs, a full overlay) always rebuild
+            requested = self._rebuild.wait(self.refresh_interval)
+            self._rebuild.clear()
+
+    def refresh(self, requested: bool = False) -> bool:
+        """Rebuild when requested or when the collection changed since the last build"""
+        signature = change_signature()
+        if not requested and signature == self._signature:
+            self.skipped_rebuilds += 1
+            return False
+        self.build()
+        self._signature = signature
+        return True
+
+    def build(self):
+        """Load every student's search fields and swap in a new snapshot"""
+        started = time.perf_counter()
+        with self._lock:
+            # Writes arriving while we read are kept in the overlay
+            overlay_before = dict(self._overlay)
+
+        projection = {"_id": 0, **{field: 1 for field in SEARCH_FIELDS}}
+        docs = [doc for doc in students_read_collection.find({}, projection) if doc.get("student_id")]
+
+        keys, key_docs, key_scores = [], [], []
+        postings: Dict[str, List[int]] = {}
+        trigram_counts = np.zeros(len(docs), dtype=np.int32)
+        for index, doc in enumerate(docs):
+            student_id, name = _search_text(doc)
+            doc["student_id"] = str(doc["student_id"])
+            entries = [(student_id, ID_PREFIX), (name, NAME_PREFIX)]
+            entries += [(token, TOKEN_PREFIX) for token in name.split()[1:]]
+            for key, score in entries:
+                if key:
+                    keys.append(key)
+                    key_docs.append(index)
+                    key_scores.append(score)
+            grams = trigrams(student_id) | trigrams(name)
+            trigram_counts[index] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(index)
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        with self._lock:
+            self._docs = docs
+            self._keys = [keys[i] for i in order]
+            self._key_docs = np.asarray(key_docs, dtype=np.int32)[order] if keys else np.zeros(0, dtype=np.int32)
+            self._key_scores = np.asarray(key_scores, dtype=np.float32)[order] if keys else np.zeros(0, dtype=np.float32)
+            self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+            self._trigram_counts = trigram_counts
+            # Drop overlay entries the new snapshot already contains
+            for student_id, doc in overlay_before.items():
+                if self._overlay.get(student_id) is doc:
+                    del self._overlay[student_id]
+            self.ready = True
+            self.built_at = time.time()
+        print(f"🔎 Student search index built: {len(docs)} students in {time.perf_counter() - started:.2f}s")
+
+    def request_rebuild(self):
+        """Rebuild soon, e.g. after students were removed from the active tier"""
+        self._rebuild.set()
+
+    def note_writes(self, docs: Iterable[Dict[str, Any]]):
+        """Make written students searchable before the next rebuild"""
+        with self._lock:
+            for doc in docs:
+                student_id = doc.get("student_id")
+                if student_id is None or student_id != student_id:
+                    continue
+                entry = {field: doc.get(field) for field in SEARCH_FIELDS}
+                entry["student_id"] = str(student_id)
+                if len(self._overlay) < self.overlay_limit or entry["student_id"] in self._overlay:
+                    self._overlay[entry["student_id"]] = entry
+                else:
+                    self._rebuild.set()
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top matches for a typeahead query, best first"""
+        query = re.sub(r"\s+", " ", query.strip().lower())
+        if not query:
+            return []
+
+        with self._lock:
+            docs, keys, key_docs, key_scores = self._docs, self._keys, self._key_docs, self._key_scores
+            postings, trigram_counts = self._postings, self._trigram_counts
+            overlay = dict(self._overlay)
+
+        scores: Dict[int, float] = {}
+
+        # Prefix matches from the sorted keys
+        start = bisect_left(keys, query)
+        stop = start
+        while stop < len(keys) and stop - start < PREFIX_SCAN_LIMIT and keys[stop].startswith(query):
+            stop += 1
+        for position in range(start, stop):
+            index = int(key_docs[position])
+            score = float(key_scores[position])
+            if keys[position] == query:
+                score = EXACT_ID if score == ID_PREFIX else EXACT_NAME if score == NAME_PREFIX else score
+            if score > scores.get(index, 0.0):
+                scores[index] = score
+
+        # Fuzzy matches when prefixes do not fill the page
+        query_grams = trigrams(query)
+        if len(scores) < limit and len(query) >= 3 and len(docs):
+            lists = [postings[gram] for gram in query_grams if gram in postings]
+            if lists:
+                hits = np.bincount(np.concatenate(lists), minlength=len(docs))
+                similarity = hits / (len(query_grams) + LENGTH_PENALTY * (trigram_counts - hits))
+                top = min(limit * 2, len(docs))
+                candidates = np.argpartition(-similarity, top - 1)[:top]
+                for index in candidates:
+                    if similarity[index] >= MIN_SIMILARITY and int(index) not in scores:
+                        scores[int(index)] = float(similarity[index])
+
+        results = []
+        for index, score in scores.items():
+            doc = docs[index]
+            if doc["student_id"] not in overlay:
+                results.append((score, doc))
+
+        # Recently written students, matched directly
+        for doc in overlay.values():
+            score = _match_score(query, query_grams, *_search_text(doc))
+            if score:
+                results.append((score, doc))
+
+        results.sort(key=lambda item: (-item[0], -(item[1].get("dropout_probability") or 0)))
+        return [{**doc, "score": round(score, 3)} for score, doc in results[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "students": len(self._docs),
+            "pending_writes": len(self._overlay),
+            "built_at": self.built_at,
+        }
+
+def _match_score(query: str, query_grams: set, student_id: str, name: str) -> float:
+    """Score of one document, with the same rules as the index"""
+    if student_id == query:
+        return EXACT_ID
+    if name == query:
+        return EXACT_NAME
+    if student_id.startswith(query):
+        return ID_PREFIX
+    if name.startswith(query):
+        return NAME_PREFIX
+    if any(token.startswith(query) for token in name.split()[1:]):
+        return TOKEN_PREFIX
+    if len(query) >= 3:
+        grams = trigrams(student_id) | trigrams(name)
+        shared = len(query_grams & grams)
+        similarity = shared / (len(query_grams) + LENGTH_PENALTY * (len(grams) - shared))
+        if similarity >= MIN_SIMILARITY:
+            return similarity
+    return 0.0
+
+student_search = StudentSearchIndex(SEARCH_REFRESH_INTERVAL, SEARCH_OVERLAY_LIMIT)
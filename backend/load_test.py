@@ -0,0 +1,390 @@
+"""
+Load Test Harness
+Drives the real FastAPI routes with concurrent HTTP traffic and reports latency percentiles
+
+By default the app is started in-process (uvicorn in a background thread) on an
+in-memory MongoDB stand-in (mongomock) seeded with a synthetic cohort through the
+app's own /upload/ endpoint. Point --target at a running server to test a real
+deployment instead (add --seed to upload the synthetic cohort there first).
+
+Usage (from the backend directory):
+    pip install mongomock
+    python load_test.py --students 5000 --concurrency 16 --duration 30
+    python load_test.py --mix predict=70,detail=30 --concurrency 64 --output results/predict_heavy.json
+    python load_test.py --target http://localhost:8000 --duration 60
+
+Endpoints in the traffic mix:
+    predict        POST /predict/
+    predict_batch  POST /predict/batch        (--batch-size students)
+    predict_columnar POST /predict/batch/columnar (same batch, one array per feature)
+    list           GET  /students/            (random department / risk filter)
+    detail         GET  /students/{id}
+    dashboard      GET  /students/dashboard-stats
+    upload         POST /upload/              (--upload-rows changed students)
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlencode
+
+import numpy as np
+
+DEFAULT_MIX = "predict=35,predict_batch=5,list=15,detail=30,dashboard=10,upload=5"
+
+DEPARTMENTS = ["CSE", "ECE", "MECH", "CIVIL", "EEE", "IT"]
+RISK_LEVELS = ["low", "medium", "high"]
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Isha"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Kumar", "Gupta", "Reddy", "Iyer", "Nair", "Das", "Khan"]
+
+# ---------------------------------------------------------------------------
+# Synthetic cohort
+# ---------------------------------------------------------------------------
+
+def synthetic_student(index, rng):
+    attendance = min(100.0, max(20.0, rng.gauss(78, 12)))
+    return {
+        "student_id": f"LT{index:07d}",
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "email": f"lt{index}@example.edu",
+        "department": rng.choice(DEPARTMENTS),
+        "semester": rng.randint(1, 8),
+        "counsellor_id": f"C{rng.randint(1, 50):03d}",
+        "gpa": round(min(4.0, max(0.0, rng.gauss(3.0, 0.5))), 2),
+        "attendance": round(attendance, 1),
+        "internal_marks": round(min(100.0, max(0.0, rng.gauss(65, 15))), 1),
+        "backlogs": max(0, int(rng.gauss(0.8, 1.2))),
+        "study_hours": round(min(12.0, max(0.0, rng.gauss(4, 1.5))), 1),
+        "previous_failures": max(0, int(rng.gauss(0.3, 0.7))),
+    }
+
+def cohort_csv(students):
+    columns = list(students[0])
+    lines = [",".join(columns)]
+    lines += [",".join(str(student[c]) for c in columns) for student in students]
+    return ("\n".join(lines) + "\n").encode()
+
+def multipart_file(filename, content):
+    """multipart/form-data body with one 'file' field"""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    body.write(f"--{boundary}\r\n".encode())
+    body.write(f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode())
+    body.write(b"Content-Type: text/csv\r\n\r\n")
+    body.write(content)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    return body.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+# ---------------------------------------------------------------------------
+# In-process server on a MongoDB stand-in
+# ---------------------------------------------------------------------------
+
+def start_local_server(port):
+    """Start app.main:app with uvicorn in a background thread on mongomock"""
+    try:
+        import mongomock
+    except ImportError:
+        print("❌ The in-process mode needs mongomock (pip install mongomock), or use --target URL")
+        sys.exit(1)
+
+    import pymongo
+    import uvicorn
+
+    # Must happen before app.database creates its client
+    pymongo.MongoClient = mongomock.MongoClient
+    _patch_mongomock_bulk_sort()
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "loadtest")
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            print("❌ In-process server did not start")
+            sys.exit(1)
+        time.sleep(0.05)
+    return server, thread
+
+def _patch_mongomock_bulk_sort():
+    """pymongo >= 4.9 passes a sort argument to bulk updates that mongomock does not accept yet"""
+    import mongomock.collection as collection
+
+    add_update = collection.BulkOperationBuilder.add_update
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+    collection.BulkOperationBuilder.add_update = add_update_without_sort
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# ---------------------------------------------------------------------------
+# Traffic
+# ---------------------------------------------------------------------------
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in REQUEST_BUILDERS:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix (use {', '.join(REQUEST_BUILDERS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+def predict_request(ctx, rng):
+    student = synthetic_student(rng.randint(0, 10**6), rng)
+    body = {k: student[k] for k in ("attendance", "internal_marks", "backlogs", "study_hours", "previous_failures")}
+    return "POST", "/predict/", json.dumps(body).encode(), "application/json"
+
+def predict_batch_request(ctx, rng):
+    students = [synthetic_student(rng.randint(0, 10**6), rng) for _ in range(ctx["batch_size"])]
+    keys = ("attendance", "internal_marks", "backlogs", "study_hours", "previous_failures")
+    body = [{k: student[k] for k in keys} for student in students]
+    return "POST", "/predict/batch", json.dumps(body).encode(), "application/json"
+
+def predict_columnar_request(ctx, rng):
+    students = [synthetic_student(rng.randint(0, 10**6), rng) for _ in range(ctx["batch_size"])]
+    keys = ("attendance", "internal_marks", "backlogs", "study_hours", "previous_failures")
+    body = {k: [student[k] for student in students] for k in keys}
+    return "POST", "/predict/batch/columnar", json.dumps(body).encode(), "application/json"
+
+def list_request(ctx, rng):
+    params = {"department": rng.choice(DEPARTMENTS)}
+    if rng.random() < 0.5:
+        params["risk_level"] = rng.choice(RISK_LEVELS)
+    return "GET", f"/students/?{urlencode(params)}", None, None
+
+def detail_request(ctx, rng):
+    return "GET", f"/students/LT{rng.randint(0, ctx['students'] - 1):07d}", None, None
+
+def dashboard_request(ctx, rng):
+    return "GET", "/students/dashboard-stats", None, None
+
+def upload_request(ctx, rng):
+    # Re-upload existing students with changed marks, so they are re-scored and written
+    start = rng.randint(0, max(0, ctx["students"] - ctx["upload_rows"]))
+    students = [synthetic_student(i, random.Random(i)) for i in range(start, start + ctx["upload_rows"])]
+    for student in students:
+        student["internal_marks"] = round(rng.uniform(20, 100), 1)
+    body, content_type = multipart_file("loadtest.csv", cohort_csv(students))
+    return "POST", "/upload/", body, content_type
+
+REQUEST_BUILDERS = {
+    "predict": predict_request,
+    "predict_batch": predict_batch_request,
+    "predict_columnar": predict_columnar_request,
+    "list": list_request,
+    "detail": detail_request,
+    "dashboard": dashboard_request,
+    "upload": upload_request,
+}
+
+class Worker(threading.Thread):
+    """Sends requests over one keep-alive connection until the run ends"""
+
+    def __init__(self, index, host, port, ctx, weights, stop_at, max_requests, counter, samples):
+        super().__init__(name=f"loadtest-{index}", daemon=True)
+        self.host, self.port = host, port
+        self.ctx = ctx
+        self.names = list(weights)
+        self.weights = list(weights.values())
+        self.stop_at = stop_at
+        self.max_requests = max_requests
+        self.counter = counter
+        self.samples = samples
+        self.rng = random.Random(ctx["random_seed"] * 1000 + index)
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+        while time.time() < self.stop_at and self.counter.take(self.max_requests):
+            name = self.rng.choices(self.names, self.weights)[0]
+            method, path, body, content_type = REQUEST_BUILDERS[name](self.ctx, self.rng)
+            headers = {"Content-Type": content_type} if content_type else {}
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = 0
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            self.samples.append((name, status, time.perf_counter() - started, time.time()))
+        connection.close()
+
+class RequestCounter:
+    """Shared request budget for --requests runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+
+    def take(self, limit):
+        with self._lock:
+            if limit and self.sent >= limit:
+                return False
+            self.sent += 1
+            return True
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def summarize(samples, elapsed):
+    def stats(rows):
+        latencies = np.array([row[2] for row in rows]) * 1000
+        statuses = {}
+        for row in rows:
+            statuses[str(row[1])] = statuses.get(str(row[1]), 0) + 1
+        ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+        return {
+            "requests": len(rows),
+            "ok": ok,
+            "errors": len(rows) - ok,
+            "status_codes": statuses,
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 2),
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+                "max": round(float(latencies.max()), 2),
+            } if len(rows) else {},
+        }
+
+    by_endpoint = {}
+    for row in samples:
+        by_endpoint.setdefault(row[0], []).append(row)
+    return {
+        "overall": stats(samples),
+        "endpoints": {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+    }
+
+def print_report(report):
+    print()
+    print(f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    print("-" * 67)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        latency = stats["latency_ms"] or {"p50": 0, "p95": 0, "p99": 0}
+        print(f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+              f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}")
+
+# ---------------------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the EarlySignal.AI API")
+    parser.add_argument("--target", help="Base URL of a running server (default: start the app in-process on mongomock)")
+    parser.add_argument("--seed", action="store_true", help="Upload the synthetic cohort to --target before the run")
+    parser.add_argument("--students", type=int, default=5000, help="Synthetic cohort size")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Traffic mix as endpoint=weight pairs (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of measured traffic")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = run for --duration)")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unmeasured traffic before the run")
+    parser.add_argument("--batch-size", type=int, default=50, help="Students per /predict/batch request")
+    parser.add_argument("--upload-rows", type=int, default=200, help="Students per /upload/ request")
+    parser.add_argument("--random-seed", type=int, default=42, help="Seed for the cohort and the traffic")
+    parser.add_argument("--output", default="loadtest_results.json", help="Where to write the JSON report")
+    return parser.parse_args()
+
+def run_traffic(host, port, ctx, weights, concurrency, duration, max_requests):
+    samples = []
+    counter = RequestCounter()
+    stop_at = time.time() + duration
+    workers = [Worker(i, host, port, ctx, weights, stop_at, max_requests, counter, samples)
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return samples, time.perf_counter() - started
+
+def main():
+    args = parse_args()
+    weights = parse_mix(args.mix)
+
+    print("=" * 60)
+    print("  EarlySignal.AI Load Test")
+    print("=" * 60)
+
+    if args.target:
+        url = urlsplit(args.target)
+        host, port = url.hostname, url.port or 80
+        mode = "remote"
+    else:
+        host, port = "127.0.0.1", free_port()
+        print("🚀 Starting the app in-process on a mongomock database...")
+        start_local_server(port)
+        mode = "in-process (mongomock)"
+
+    ctx = {
+        "students": args.students,
+        "batch_size": args.batch_size,
+        "upload_rows": min(args.upload_rows, args.students),
+        "random_seed": args.random_seed,
+    }
+
+    if not args.target or args.seed:
+        print(f"📦 Seeding {args.students} synthetic students through /upload/...")
+        students = [synthetic_student(i, random.Random(i)) for i in range(args.students)]
+        body, content_type = multipart_file("cohort.csv", cohort_csv(students))
+        connection = http.client.HTTPConnection(host, port, timeout=600)
+        connection.request("POST", "/upload/", body=body, headers={"Content-Type": content_type})
+        response = connection.getresponse()
+        print(f"   {response.status}: {response.read().decode()[:200]}")
+        connection.close()
+
+    if args.warmup > 0:
+        print(f"🔥 Warming up for {args.warmup:g}s...")
+        run_traffic(host, port, ctx, weights, args.concurrency, args.warmup, 0)
+
+    limit = f"{args.requests} requests" if args.requests else f"{args.duration:g}s"
+    started_at = datetime.now(timezone.utc).isoformat()
+    print(f"⏱️  Running {limit} at concurrency {args.concurrency} with mix {args.mix}")
+    samples, elapsed = run_traffic(host, port, ctx, weights, args.concurrency,
+                                   args.duration if not args.requests else 10**9, args.requests)
+
+    report = {
+        "started_at": started_at,
+        "mode": mode,
+        "target": args.target or f"http://{host}:{port}",
+        "config": {
+            "students": args.students,
+            "mix": weights,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "warmup_s": args.warmup,
+            "batch_size": args.batch_size,
+            "upload_rows": ctx["upload_rows"],
+            "random_seed": args.random_seed,
+        },
+        **summarize(samples, elapsed),
+    }
+
+    print_report(report)
+    directory = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,46 @@
 """
 Quick Backend Server Startup Script
 Alternative to PowerShell script for cross-platform compatibility
+
+Development (single process, auto-reload):
+    python run_server.py
+
+Production (pre-forked workers sharing the preloaded model, POSIX only):
+    python run_server.py --prod --workers 4 --max-requests 10000
+    kill -HUP <master pid>    # graceful rolling restart, reloads model artifacts
+    kill -TERM <master pid>   # graceful shutdown
 """
+import argparse
+import gc
+import signal
+import socket
 import subprocess
 import sys
 import os
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start the EarlySignal.AI backend")
+    parser.add_argument("--prod", action="store_true", help="Production mode: pre-forked workers, no reload")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Bind address")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="Bind port")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="Worker processes in production mode (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "10000")),
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+                        help="Random extra requests per worker so workers do not recycle together")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("BACKLOG", "2048")),
+                        help="Listen socket backlog")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", "5")),
+                        help="Seconds to keep idle HTTP connections open")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="Seconds a worker may spend finishing requests on shutdown")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("=" * 60)
     print("  EarlySignal.AI Backend Server")
     print("=" * 60)
@@ -44,25 +78,169 @@ def main():
     print()
     print("🚀 Starting FastAPI server...")
     print()
-    print("   Server: http://localhost:8000")
-    print("   Docs:   http://localhost:8000/docs")
+    base_url = server_url(args.host, args.port)
+    print(f"   Listening on {args.host}:{args.port}")
+    print(f"   Server: {base_url}")
+    print(f"   Docs:   {base_url}/docs")
     print()
     print("   Press Ctrl+C to stop")
     print("=" * 60)
     print()
     
+    if args.prod:
+        serve_production(args)
+        return
+    
     # Start server
     try:
         subprocess.run([
             sys.executable, "-m", "uvicorn",
             "app.main:app",
             "--reload",
-            "--host", "0.0.0.0",
-            "--port", "8000"
+            "--host", args.host,
+            "--port", str(args.port)
         ])
     except KeyboardInterrupt:
         print("\n\n✓ Server stopped")
         sys.exit(0)
 
+def server_url(host, port):
+    """URL to reach the server on; wildcard binds are reachable on localhost"""
+    if host in ("0.0.0.0", "::", ""):
+        host = "localhost"
+    elif ":" in host:
+        host = f"[{host}]"
+    return f"http://{host}:{port}"
+
+def preload():
+    """Load model artifacts and heavy libraries once, before forking, so workers share them copy-on-write"""
+    sys.path.insert(0, os.getcwd())
+    from app.ml.load_model import load_model, load_scaler, load_feature_order, load_model_metadata
+    import app.ml.predict  # noqa: F401  (numpy, pandas, scikit-learn, scipy)
+    from app.ml.registry import model_registry
+    load_model_metadata()
+    load_model()
+    load_scaler()
+    load_feature_order()
+    model_registry.load_shadow()
+    # Move everything allocated so far out of the collector's reach; otherwise the
+    # first GC pass in each worker writes to (and so copies) every shared page
+    gc.collect()
+    gc.freeze()
+
+def reload_preloaded():
+    """Drop and reload cached artifacts so new workers pick up a retrained model"""
+    from app.ml.load_model import reload_models
+    from app.ml.registry import model_registry
+    gc.unfreeze()
+    reload_models()
+    model_registry.reload()
+    preload()
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def spawn_worker(sock, args):
+    """Fork a worker that serves the shared socket until it hits max requests or is told to stop"""
+    pid = os.fork()
+    if pid:
+        return pid
+    
+    # Worker process: the MongoClient is created here, after the fork
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    import uvicorn
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+        limit_max_requests_jitter=args.max_requests_jitter if args.max_requests else 0,
+        access_log=False,
+    )
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+def stop_worker(pid, timeout):
+    """Ask a worker to finish in-flight requests and exit, killing it after timeout"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        done, _ = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return
+        time.sleep(0.1)
+    os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+
+def serve_production(args):
+    """Pre-fork master: preload, bind once, keep args.workers workers alive"""
+    if not hasattr(os, "fork"):
+        print("❌ Production mode needs os.fork (Linux/macOS). Use: uvicorn app.main:app --workers N")
+        sys.exit(1)
+    
+    print(f"📦 Preloading model in master process {os.getpid()}...")
+    preload()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    print(f"🚀 Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    
+    state = {"running": True, "restart": False}
+    
+    def handle_stop(signum, frame):
+        state["running"] = False
+    
+    def handle_restart(signum, frame):
+        state["restart"] = True
+    
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGHUP, handle_restart)
+    
+    workers = set(spawn_worker(sock, args) for _ in range(args.workers))
+    
+    while state["running"]:
+        # Replace workers that exited (recycled after max requests or crashed)
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in workers:
+            workers.discard(pid)
+            if state["running"]:
+                workers.add(spawn_worker(sock, args))
+            continue
+        
+        if state["restart"]:
+            state["restart"] = False
+            print("🔁 Rolling restart: reloading model and replacing workers one at a time")
+            reload_preloaded()
+            for old_pid in list(workers):
+                workers.add(spawn_worker(sock, args))
+                stop_worker(old_pid, args.graceful_timeout)
+                workers.discard(old_pid)
+            continue
+        
+        time.sleep(0.2)
+    
+    print("\n🛑 Stopping workers...")
+    for pid in list(workers):
+        stop_worker(pid, args.graceful_timeout)
+    sock.close()
+    print("✓ Server stopped")
+
 if __name__ == "__main__":
     main()
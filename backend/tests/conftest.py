@@ -0,0 +1,37 @@
+"""
+Shared fixtures: the app runs against an in-memory mongomock client, so the suite
+needs no MongoDB server
+
+    cd backend && python -m pytest
+"""
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture(scope="session")
+def database():
+    """app.database bound to mongomock; app modules are imported only after this fixture"""
+    import pymongo
+    import mongomock.collection
+
+    patch = pytest.MonkeyPatch()
+    patch.setenv("MONGO_URI", "mongodb://localhost:27017")
+    patch.setenv("DB_NAME", "earlysignal_test")
+    patch.setattr(pymongo, "MongoClient", mongomock.MongoClient)
+    # pymongo's bulk operations pass a sort option mongomock does not know yet
+    for name in ("add_update", "add_replace"):
+        original = getattr(mongomock.collection.BulkOperationBuilder, name)
+        patch.setattr(mongomock.collection.BulkOperationBuilder, name,
+                      lambda self, *args, sort=None, _original=original, **kwargs: _original(self, *args, **kwargs))
+    try:
+        import app.database
+        yield app.database
+    finally:
+        patch.undo()
+
+@pytest.fixture
+def db(database):
+    """Empty collections for every test"""
+    for name in database.db.list_collection_names():
+        database.db[name].delete_many({})
+    yield database
@@ -0,0 +1,53 @@
+"""Admission control: batch load cannot take the threads reserved for interactive paths"""
+import asyncio
+
+import pytest
+
+@pytest.fixture
+def admission(monkeypatch):
+    from app import admission
+    monkeypatch.setattr(admission, "ADMISSION_THREADPOOL_SIZE", 3)
+    monkeypatch.setattr(admission, "ADMISSION_INTERACTIVE_RESERVED", 1)
+    monkeypatch.setattr(admission, "ADMISSION_SHARED_QUEUE_DEPTH", 0)
+    return admission
+
+def test_interactive_requests_pass_a_saturated_shared_budget(admission):
+    async def scenario():
+        release = asyncio.Event()
+        served = []
+
+        async def app(scope, receive, send):
+            served.append(scope["path"])
+            if scope["path"].startswith("/risk"):
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        middleware = admission.AdmissionControlMiddleware(app, limits={})
+
+        async def request(method, path):
+            statuses = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+            await middleware(
+                {"type": "http", "method": method, "path": path, "headers": []}, None, send
+            )
+            return statuses[0]
+
+        batch = [asyncio.create_task(request("GET", f"/risk/slow-{n}")) for n in range(2)]
+        await asyncio.sleep(0)
+        assert middleware.shared.active == 2
+
+        # Shared budget (3 threads - 1 reserved) is full: more batch work is shed...
+        assert await request("GET", "/students/") == 429
+        # ...while single-student and prediction requests go straight through
+        assert await request("GET", "/students/STU001") == 200
+        assert await request("POST", "/predict/") == 200
+
+        release.set()
+        assert await asyncio.gather(*batch) == [200, 200]
+        assert middleware.shared.active == 0
+        assert middleware.stats()["interactive_requests"] == 2
+
+    asyncio.run(scenario())
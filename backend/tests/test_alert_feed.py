@@ -0,0 +1,69 @@
+"""
+Alert feed ordering with concurrent writers (runs against mongomock, no server needed)
+
+    cd backend && python -m pytest
+"""
+import threading
+
+import pytest
+
+def make_alerts(prefix, count):
+    return [{"student_id": f"{prefix}{i}", "risk_level": "high", "sent": False} for i in range(count)]
+
+@pytest.fixture
+def alert_feed(db):
+    from app.services import alert_feed
+    return alert_feed
+
+def test_feed_waits_for_earlier_reservation(alert_feed, monkeypatch):
+    """Writer B commits after writer A reserved but before A inserted; the poller must not skip A"""
+    a_reserved, b_done = threading.Event(), threading.Event()
+    insert_many = alert_feed.alerts_collection.insert_many
+
+    def slow_insert(alerts, **kwargs):
+        if alerts[0]["student_id"].startswith("A"):
+            a_reserved.set()
+            b_done.wait(5)
+        return insert_many(alerts, **kwargs)
+
+    monkeypatch.setattr(alert_feed.alerts_collection, "insert_many", slow_insert)
+    writer_a = threading.Thread(target=alert_feed.append_alerts, args=(make_alerts("A", 3),))
+    writer_a.start()
+    assert a_reserved.wait(5)
+
+    alert_feed.append_alerts(make_alerts("B", 2))
+    # B's seqs (4, 5) are written, A's (1-3) are not yet: nothing may be served past seq 0
+    assert alert_feed.alerts_since(0) == []
+
+    b_done.set()
+    writer_a.join(5)
+
+    feed = alert_feed.alerts_since(0)
+    assert [alert["seq"] for alert in feed] == [1, 2, 3, 4, 5]
+    assert [alert["student_id"] for alert in feed] == ["A0", "A1", "A2", "B0", "B1"]
+
+def test_failed_insert_releases_reservation(alert_feed, monkeypatch):
+    def failing_insert(alerts, **kwargs):
+        raise RuntimeError("write failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(alert_feed.alerts_collection, "insert_many", failing_insert)
+        with pytest.raises(RuntimeError):
+            alert_feed.append_alerts(make_alerts("A", 2))
+
+    alert_feed.append_alerts(make_alerts("B", 1))
+    assert [alert["seq"] for alert in alert_feed.alerts_since(0)] == [3]
+
+def test_concurrent_writers_get_distinct_seqs(alert_feed):
+    threads = [
+        threading.Thread(target=alert_feed.append_alerts, args=(make_alerts(f"W{n}-", 5),))
+        for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    seqs = [alert["seq"] for alert in alert_feed.alerts_since(0, limit=1000)]
+    assert seqs == list(range(1, 41))
+    assert alert_feed.high_water_mark(alert_feed.ALERT_SEQUENCE) == 40
@@ -0,0 +1,38 @@
+"""Archive tier: restores never create a second active document for a student"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+@pytest.fixture
+def archive(db):
+    from app.services import archive
+    db.ensure_unique_student_id()
+    return archive
+
+def student(student_id, **fields):
+    return {"student_id": student_id, "name": student_id, "counsellor_id": "C1", "semester": 8, **fields}
+
+def test_restore_skips_students_that_are_active_again(archive, db):
+    long_ago = datetime.now(timezone.utc) - timedelta(days=400)
+    db.students_collection.insert_many([student("S1", updated_at=long_ago), student("S2", updated_at=long_ago)])
+    archive.archive_students({"semester": 8})
+    # S2 is re-uploaded while its old copy sits in the archive
+    db.students_collection.insert_one(student("S2", name="S2 again"))
+
+    result = archive.restore_students(["S1", "S2"])
+
+    assert result == {"requested": 2, "restored": 1, "already_active": ["S2"]}
+    assert db.students_collection.count_documents({"student_id": "S2"}) == 1
+    assert db.students_collection.find_one({"student_id": "S2"})["name"] == "S2 again"
+    assert archive.find_archived_student("S2") is not None
+
+    restored = db.students_collection.find_one({"student_id": "S1"})
+    assert "archived_at" not in restored
+    # A fresh updated_at keeps an inactivity policy from archiving it again right away
+    assert db.students_collection.count_documents(archive.retention_query(inactive_days=30)) == 0
+
+def test_student_id_is_unique_in_the_active_tier(archive, db):
+    db.students_collection.insert_one(student("S1"))
+    with pytest.raises(DuplicateKeyError):
+        db.students_collection.insert_one(student("S1"))
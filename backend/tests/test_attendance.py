@@ -0,0 +1,76 @@
+"""Attendance buffer: marks survive failed flushes without being applied twice"""
+import pytest
+from pymongo.errors import BulkWriteError
+
+@pytest.fixture
+def attendance(db):
+    from app.services import attendance
+    db.students_collection.insert_many([
+        {"student_id": sid, "name": sid, "counsellor_id": "C1", "attendance": 90.0, "internal_marks": 70,
+         "backlogs": 0, "risk_level": "low", "sessions_held": 10, "sessions_attended": 9}
+        for sid in ("S1", "S2", "S3")
+    ])
+    return attendance
+
+def sessions(db, student_id):
+    doc = db.students_collection.find_one({"student_id": student_id})
+    return doc["sessions_held"], doc["sessions_attended"]
+
+def test_failed_chunk_is_put_back(attendance, db, monkeypatch):
+    buffer = attendance.AttendanceBuffer()
+    buffer.add_marks(["S1", "S2"], ["S3"])
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("mongo timeout")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(attendance.students_collection, "find", unavailable)
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+    assert buffer.pending == 3
+
+    # Marks added after the failure are later sessions and merge on top
+    buffer.add_marks(["S3"], [])
+    buffer.flush()
+    assert sessions(db, "S1") == (11, 10)
+    assert sessions(db, "S3") == (12, 10)
+    assert db.students_collection.find_one({"student_id": "S3"})["consecutive_absences"] == 0
+
+def test_partly_applied_chunk_puts_back_only_failed_writes(attendance, db, monkeypatch):
+    from app.services import scoring
+
+    real = scoring.students_bulk_collection
+
+    class PartlyFailing:
+        """Applies every operation except the second, then reports it like an unordered bulk write"""
+        def bulk_write(self, operations, ordered=False):
+            real.bulk_write([op for index, op in enumerate(operations) if index != 1], ordered=ordered)
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate"}],
+                                  "nInserted": 0, "nMatched": 2})
+
+    buffer = attendance.AttendanceBuffer()
+    buffer.add_marks(["S1", "S2", "S3"], [])
+    with monkeypatch.context() as patch:
+        patch.setattr(scoring, "students_bulk_collection", PartlyFailing())
+        with pytest.raises(BulkWriteError):
+            buffer.flush()
+
+    assert list(buffer._pending) == ["S2"]
+    assert sessions(db, "S1") == (11, 10)
+    assert sessions(db, "S2") == (10, 9)
+
+    buffer.flush()
+    # Each session counted exactly once
+    assert [sessions(db, sid) for sid in ("S1", "S2", "S3")] == [(11, 10)] * 3
+
+def test_attendance_change_within_band_is_rescored(attendance, db):
+    buffer = attendance.AttendanceBuffer()
+    # 90% -> 90.91%: same attendance band, but the model reads attendance
+    buffer.add_marks(["S1"], [])
+    summary = buffer.flush()
+    assert summary["students_rescored"] == 1
+    assert db.students_collection.find_one({"student_id": "S1"})["dropout_probability"] is not None
+
+    # No change in attendance, no new score
+    buffer.add_marks([], [])
+    assert buffer.flush()["students_rescored"] == 0
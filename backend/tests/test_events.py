@@ -0,0 +1,56 @@
+"""Event stream: stats deltas and job progress"""
+import pytest
+
+class RecordingBroadcaster:
+    subscriber_count = 1
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event, data):
+        self.events.append((event, data))
+
+@pytest.fixture
+def events(db):
+    from app.services import events
+    db.students_collection.insert_many([
+        {"student_id": "S1", "risk_level": "high", "dropout_probability": 0.9},
+        {"student_id": "S2", "risk_level": "low", "dropout_probability": 0.1},
+    ])
+    return events
+
+def test_delta_is_against_the_last_broadcast(events, db):
+    broadcaster = RecordingBroadcaster()
+    publisher = events.StatsPublisher(broadcaster, min_interval=0, interval=60)
+    publisher.publish()
+    assert broadcaster.events[-1][1]["delta"] == {}
+
+    db.students_collection.insert_one({"student_id": "S3", "risk_level": "high", "dropout_probability": 0.8})
+    # A dashboard GET after the write recomputes the stats without broadcasting them...
+    publisher.request_refresh()
+    assert publisher.current()["high_risk_count"] == 2
+
+    # ...so the next broadcast must still report the change subscribers have not seen
+    publisher.publish()
+    event, data = broadcaster.events[-1]
+    assert event == "stats"
+    assert data["delta"] == {"total_students": 1, "high_risk_count": 1, "avg_dropout_probability": 0.1}
+
+    # Nothing new: nothing sent
+    publisher.publish()
+    assert len(broadcaster.events) == 2
+
+def test_job_progress_reports_failure(events, monkeypatch):
+    broadcaster = RecordingBroadcaster()
+    monkeypatch.setattr(events, "broadcaster", broadcaster)
+
+    with pytest.raises(RuntimeError):
+        with events.JobProgress("archive", total=10) as progress:
+            progress.advance(4)
+            raise RuntimeError("mongo went away")
+
+    statuses = [data["status"] for _, data in broadcaster.events]
+    assert statuses[0] == "started" and statuses[-1] == "failed"
+    assert "completed" not in statuses
+    assert broadcaster.events[-1][1]["error"] == "mongo went away"
+    assert broadcaster.events[-1][1]["done"] == 4
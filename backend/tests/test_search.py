@@ -0,0 +1,52 @@
+"""Student search index: rebuilds only when the collection changed"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+@pytest.fixture
+def search(db):
+    from app.services import search
+    written = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.students_collection.insert_many([
+        {"student_id": "STU001", "name": "Asha Rao", "updated_at": written},
+        {"student_id": "STU002", "name": "Ben Okafor", "updated_at": written},
+    ])
+    return search
+
+def names(index, query):
+    return [doc["name"] for doc in index.search(query)]
+
+def test_unchanged_collection_skips_rebuild(search, db):
+    index = search.StudentSearchIndex(refresh_interval=60, overlay_limit=100)
+    assert index.refresh()
+    built_at = index.built_at
+
+    assert not index.refresh()
+    assert not index.refresh()
+    assert index.skipped_rebuilds == 2
+    assert index.built_at == built_at
+
+    # Explicit requests rebuild even without a change
+    assert index.refresh(requested=True)
+
+def test_write_from_another_process_triggers_rebuild(search, db):
+    index = search.StudentSearchIndex(refresh_interval=60, overlay_limit=100)
+    index.refresh()
+
+    # Not seen through note_writes, only through the stamped updated_at
+    db.students_collection.update_one(
+        {"student_id": "STU002"},
+        {"$set": {"name": "Ben Adeyemi", "updated_at": datetime.now(timezone.utc)}}
+    )
+    assert names(index, "ben") == ["Ben Okafor"]
+    assert index.refresh()
+    assert names(index, "ben") == ["Ben Adeyemi"]
+
+def test_removed_student_triggers_rebuild(search, db):
+    index = search.StudentSearchIndex(refresh_interval=60, overlay_limit=100)
+    index.refresh()
+
+    # A delete leaves the latest updated_at alone; the count changes
+    db.students_collection.delete_one({"student_id": "STU001"})
+    assert index.refresh()
+    assert names(index, "asha") == []